@@ -1,24 +1,44 @@
 import asyncio
+import multiprocessing
 import platform
-from datetime import datetime, timedelta
+import signal
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
-from aiogram import BaseMiddleware
+from aiogram import BaseMiddleware, Dispatcher
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from dateutil.relativedelta import relativedelta
 from loguru import logger
 
 from app import handlers, utils
-from app.api import APIRequest
+from app.api import APIRequest, breaker, stale
+from app.database.data import load_data_registries
+from app.database.partners import PartnerCache
+from app.database.redis import close_redis, open_redis
+from app.database.shared import SharedDict
+from app.database.test import loaded_achievements, user_achievements
 from app.loader import (
 	ACHIEVEMENTS,
 	bot,
 	config,
 	convert_to_human,
 	dp,
-	loaded_achievements,
 	scheduler,
-	user_achievements,
 )
+from app.middlewares import APIDeadlineMiddleware, MetricsMiddleware, PartnerMiddleware
+from app.utils.caching import cached_metrics
+from app.utils.metrics import (
+	create_metrics_app,
+	registry,
+	start_metrics_server,
+	watch_scheduler,
+)
+from app.utils.sender import SendQueue, TokenBucket, sender
+from app.utils.sharding import ShardMiddleware, ShardRouter, ShardWorker
+from app.utils.stats import collect_stats
+from app.utils.statscache import STATS_VARIANTS, StatsCache
+from app.utils.webhook import setup_webhook, wait_for_stop
 
 
 class SchedulerMiddleware(BaseMiddleware):
@@ -38,78 +58,39 @@ async def on_startup() -> None:
 	await utils.setup_default_commands(bot)
 
 	for admin_id in config.secrets.ADMINS_IDS:
-		await bot.send_message(chat_id=admin_id, text=f'Бот был запущен в: {system}')
+		await sender.send_message(
+			chat_id=admin_id,
+			text=f'Бот был запущен в: {system}',
+			priority=SendQueue.BULK,
+		)
 
 
-async def collect_stats(opts: dict):
-	result, status = await APIRequest.post('/user/find', {'opts': opts})
+def collect_runtime_metrics():
+	"""
+	Put state of send queue, caches and API circuit breaker to metrics
+	"""
+	for name, value in sender.metrics().items():
+		if isinstance(value, (int, float)):
+			registry.set(f'sinwin_sender_{name}', value)
 
-	# if opts.get('game', False):
-	# result_incomes, status2 = await APIRequest.get(f"/base/incomes?game={opts['game']}")
-	# incomes = result_incomes["income_stat"]
-	# postbacks = result_incomes["postbacks_stat"]
+	for name, value in PartnerCache.metrics().items():
+		registry.set(f'sinwin_partner_cache_{name}', value)
 
-	today = datetime.now().date()
-	yesterday = today - timedelta(days=1)
-	last_week_start = today - timedelta(days=today.weekday() + 7)
-	last_week_end = last_week_start + timedelta(days=6)
-	last_month_start = today - relativedelta(months=1)
-	last_month_end = last_month_start + relativedelta(day=31)
+	for function, metrics in cached_metrics().items():
+		registry.set('sinwin_cached_hit_ratio', metrics['hit_ratio'], function=function)
 
-	users = result['users']
+	for url in STATS_VARIANTS:
+		age = StatsCache.age(url)
 
-	users_count = len(users)
-	users_income = sum([user['income'] for user in users])
-	users_notreg_count = len([user for user in users if not user['approved']])
-	users_nottopup_count = len(
-		[user for user in users if user['balance'] < 500.0 and user['approved']]
-	)
-	users_gamed_count = len(
-		[user for user in users if user['balance'] > 500.0 and user['approved']]
-	)
-
-	users_today = [
-		user
-		for user in users
-		if datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date() == today
-	]
-	users_yesterday = [
-		user
-		for user in users
-		if datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date()
-		== yesterday
-	]
-	users_lastweek = [
-		user
-		for user in users
-		if last_week_start
-		<= datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date()
-		<= last_week_end
-	]
-	users_month = [
-		user
-		for user in users
-		if last_month_start
-		<= datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date()
-		<= last_month_end
-	]
+		if age is not None:
+			registry.set('sinwin_stats_cache_age_seconds', age, url=url)
 
-	users_today = len(users_today)
-	users_yesterday = len(users_yesterday)
-	users_lastweek = len(users_lastweek)
-	users_month = len(users_month)
+	for state in ('closed', 'open', 'half-open'):
+		registry.set(
+			'sinwin_api_breaker_state', int(breaker.state == state), state=state
+		)
 
-	return {
-		'users_count': users_count,
-		'users_today': users_today,
-		'users_yesterday': users_yesterday,
-		'users_lastweek': users_lastweek,
-		'users_month': users_month,
-		'users_notreg_count': users_notreg_count,
-		'users_nottopup_count': users_nottopup_count,
-		'users_gamed_count': users_gamed_count,
-		'users_income': users_income,
-	}
+	registry.set('sinwin_api_stale_responses', len(stale.responses))
 
 
 def check_achievements_for_reload(
@@ -179,155 +160,510 @@ def check_achievements_for_reload(
 	}
 
 
-async def achievs_alerts():
-	for userid, data in loaded_achievements.items():
-		if not user_achievements.get(userid, {}).get('alerts', True):
-			continue
+achievs_alerts_stats = {
+	'started_at': None,
+	'duration': None,
+	'total': 0,
+	'done': 0,
+	'failed': 0,
+}
+
 
+async def get_achievs_partners() -> Optional[Dict[str, Any]]:
+	"""
+	Get partners shared by all users of one achievs_alerts run
+
+	:returns:	approved partners by tg id and referrals count by partner hash,
+				None if backend failed
+	:rtype:		Optional[Dict[str, Any]]
+	"""
+	result, code = await APIRequest.post('/partner/get', {'index': None})
+
+	if not result or code != 200:
+		return None
+
+	by_tg_id = {}
+	referrals = Counter()
+
+	for partner in result['partners']:
+		if partner.get('approved'):
+			# backend keeps tg_id as string
+			by_tg_id[str(partner['tg_id'])] = partner
+
+		if partner.get('referrer_hash'):
+			referrals[partner['referrer_hash']] += 1
+
+	return {'by_tg_id': by_tg_id, 'referrals': referrals}
+
+
+async def user_achievs_alerts(userid: int, shared: Optional[Dict[str, Any]]):
+	"""
+	Check achievements of one user and send alerts about new ones
+
+	:param		userid:	 The userid
+	:type		userid:	 int
+	:param		shared:	 The shared partners (see get_achievs_partners)
+	:type		shared:	 Optional[Dict[str, Any]]
+	"""
+	if shared is not None:
+		partner = shared['by_tg_id'].get(str(userid))
+	else:
 		partners = await APIRequest.post(
 			'/partner/find', {'opts': {'tg_id': userid, 'approved': True}}
 		)
 		partner = partners[0]['partners']
+		partner = partner[-1] if partner else None
 
-		if partner:
-			partner = partner[-1]
-		else:
-			continue
+	if partner is None:
+		return
 
-		result, code = await APIRequest.get(
-			f'/base/achstats?partnerhash={partner["partner_hash"]}'
-		)
+	opts = {'game': 'Mines', 'referal_parent': partner['partner_hash']}
 
-		cpartners = await APIRequest.post(
-			'/partner/find', {'opts': {'referrer_hash': partner['partner_hash']}}
+	if shared is not None:
+		(result, code), data = await asyncio.gather(
+			APIRequest.get(f'/base/achstats?partnerhash={partner["partner_hash"]}'),
+			collect_stats(opts),
+		)
+		referrals_count = shared['referrals'][partner['partner_hash']]
+	else:
+		(result, code), cpartners, data = await asyncio.gather(
+			APIRequest.get(f'/base/achstats?partnerhash={partner["partner_hash"]}'),
+			APIRequest.post(
+				'/partner/find', {'opts': {'referrer_hash': partner['partner_hash']}}
+			),
+			collect_stats(opts),
 		)
-		cpartners = cpartners[0]['partners']
+		referrals_count = len(cpartners[0]['partners'])
+
+	api_count = result['api_count']
+
+	achievements = check_achievements_for_reload(
+		data['users_count'],
+		result['income'],
+		result['deposits_sum'],
+		result['first_deposits_count'],
+		referrals_count,
+		result['signals_count'],
+		api_count,
+	)
 
-		opts = {'game': 'Mines', 'referal_parent': partner['partner_hash']}
-		data = await collect_stats(opts)
+	count = achievements['count']
+	thresholds = achievements['thresholds']
 
-		api_count = result['api_count']
+	loaded_achievs = await loaded_achievements.get(userid, {})
 
-		achievements = check_achievements_for_reload(
-			data['users_count'],
-			result['income'],
-			result['deposits_sum'],
-			result['first_deposits_count'],
-			api_count,
+	await loaded_achievements.set(userid, achievements)
+
+	loaded_count = loaded_achievs.get('count', 0)
+
+	if count > loaded_count and 'thresholds' in loaded_achievs:
+		loaded_thresholds = loaded_achievs['thresholds']
+
+		users_count = list(
+			set(thresholds['users_count']) - set(loaded_thresholds['users_count'])
+		)
+		deposits_sum = list(
+			set(thresholds['deposits_sum']) - set(loaded_thresholds['deposits_sum'])
+		)
+		income = list(set(thresholds['income']) - set(loaded_thresholds['income']))
+		first_deposits_count = list(
+			set(thresholds['first_deposits_count'])
+			- set(loaded_thresholds['first_deposits_count'])
+		)
+		referrals_count = list(
+			set(thresholds['referrals_count'])
+			- set(loaded_thresholds['referrals_count'])
+		)
+		signals_count = list(
+			set(thresholds['signals_count']) - set(loaded_thresholds['signals_count'])
 		)
 
-		count = achievements['count']
-		thresholds = achievements['thresholds']
+		api_count = list(
+			set(thresholds['api_count']) - set(loaded_thresholds['api_count'])
+		)
 
-		loaded_achievs = loaded_achievements.get(userid, {})
+		if users_count:
+			for data in users_count:
+				await sender.send_message(
+					chat_id=userid,
+					text=f'Достижение успешно выполнено.\n\n✅ Пользователи по вашим ссылкам: больше {data}.',
+					priority=SendQueue.BULK,
+				)
+
+		if deposits_sum:
+			for data in deposits_sum:
+				await sender.send_message(
+					chat_id=userid,
+					text=f'Достижение успешно выполнено.\n\n✅ Депозиты: больше {convert_to_human(data)} рублей.',
+					priority=SendQueue.BULK,
+				)
+
+		if income:
+			for data in income:
+				await sender.send_message(
+					chat_id=userid,
+					text=f'Достижение успешно выполнено.\n\n✅ Доход: больше {convert_to_human(data)} рублей.',
+					priority=SendQueue.BULK,
+				)
+
+		if first_deposits_count:
+			for data in first_deposits_count:
+				await sender.send_message(
+					chat_id=userid,
+					text=f'Достижение успешно выполнено.\n\n✅ Количество первых депозитов: больше {data}.',
+					priority=SendQueue.BULK,
+				)
+
+		if referrals_count:
+			for data in referrals_count:
+				await sender.send_message(
+					chat_id=userid,
+					text=f'Достижение успешно выполнено.\n\n✅ Количество рефералов: больше {data}.',
+					priority=SendQueue.BULK,
+				)
+
+		if signals_count:
+			for data in signals_count:
+				await sender.send_message(
+					chat_id=userid,
+					text=f'Достижение успешно выполнено.\n\n✅ Сгенерировано сигналов: больше {data}.',
+					priority=SendQueue.BULK,
+				)
+
+		if api_count:
+			for data in api_count:
+				await sender.send_message(
+					chat_id=userid,
+					text=f'Достижение успешно выполнено.\n\n✅ API: больше {data}.',
+					priority=SendQueue.BULK,
+				)
 
-		loaded_achievements[userid] = achievements
 
-		loaded_count = loaded_achievs.get('count')
+async def achievs_alerts():
+	"""
+	Daily achievements alerts.
+
+	Users are processed by ACHIEVEMENTS.CONCURRENCY workers, their start
+	times are spread evenly over ACHIEVEMENTS.WINDOW seconds and every user
+	is limited by ACHIEVEMENTS.USER_TIMEOUT, so run time is bounded.
+	"""
+	started = time.monotonic()
+	userids = [
+		int(userid)
+		for userid in await loaded_achievements.keys()
+		if (await user_achievements.get(userid, {})).get('alerts', True)
+	]
 
-		if count > loaded_count:
-			loaded_thresholds = loaded_achievs['thresholds']
+	achievs_alerts_stats.update(
+		started_at=datetime.now(),
+		duration=None,
+		total=len(userids),
+		done=0,
+		failed=0,
+	)
 
-			users_count = list(
-				set(thresholds['users_count']) - set(loaded_thresholds['users_count'])
-			)
-			deposits_sum = list(
-				set(thresholds['deposits_sum']) - set(loaded_thresholds['deposits_sum'])
-			)
-			income = list(set(thresholds['income']) - set(loaded_thresholds['income']))
-			first_deposits_count = list(
-				set(thresholds['first_deposits_count'])
-				- set(loaded_thresholds['first_deposits_count'])
-			)
-			referrals_count = list(
-				set(thresholds['referrals_count'])
-				- set(loaded_thresholds['referrals_count'])
-			)
-			signals_count = list(
-				set(thresholds['signals_count'])
-				- set(loaded_thresholds['signals_count'])
-			)
+	if not userids:
+		achievs_alerts_stats['duration'] = 0.0
+		return
 
-			api_count = list(
-				set(thresholds['api_count']) - set(loaded_thresholds['api_count'])
-			)
+	shared = await get_achievs_partners()
 
-			if users_count:
-				for data in users_count:
-					await bot.send_message(
-						chat_id=userid,
-						text=f'Достижение успешно выполнено.\n\n✅ Пользователи по вашим ссылкам: больше {data}.',
-					)
-
-			if deposits_sum:
-				for data in deposits_sum:
-					await bot.send_message(
-						chat_id=userid,
-						text=f'Достижение успешно выполнено.\n\n✅ Депозиты: больше {convert_to_human(data)} рублей.',
-					)
-
-			if income:
-				for data in income:
-					await bot.send_message(
-						chat_id=userid,
-						text=f'Достижение успешно выполнено.\n\n✅ Доход: больше {convert_to_human(data)} рублей.',
-					)
-
-			if first_deposits_count:
-				for data in first_deposits_count:
-					await bot.send_message(
-						chat_id=userid,
-						text=f'Достижение успешно выполнено.\n\n✅ Количество первых депозитов: больше {data}.',
-					)
-
-			if referrals_count:
-				for data in referrals_count:
-					await bot.send_message(
-						chat_id=userid,
-						text=f'Достижение успешно выполнено.\n\n✅ Количество рефералов: больше {data}.',
-					)
-
-			if signals_count:
-				for data in signals_count:
-					await bot.send_message(
-						chat_id=userid,
-						text=f'Достижение успешно выполнено.\n\n✅ Сгенерировано сигналов: больше {data}.',
-					)
-
-			if api_count:
-				for data in api_count:
-					await bot.send_message(
-						chat_id=userid,
-						text=f'Достижение успешно выполнено.\n\n✅ API: больше {data}.',
-					)
+	if shared is None:
+		logger.warning('[achievs_alerts] shared partners fetch failed, use per-user')
 
+	spacing = config.achievements.WINDOW / len(userids)
+	queue = asyncio.Queue()
 
-async def main():
-	conn_ok = await APIRequest.get('/base/info')
-	if not conn_ok:
-		logger.error('Fatal error: API dont connected')
-		exit()
+	for index, userid in enumerate(userids):
+		queue.put_nowait((index, userid))
 
-	utils.setup_logger('INFO', ['sqlalchemy.engine', 'aiogram.bot.api'])
+	async def worker():
+		while not queue.empty():
+			index, userid = queue.get_nowait()
+			delay = started + index * spacing - time.monotonic()
+
+			if delay > 0:
+				await asyncio.sleep(delay)
+
+			try:
+				await asyncio.wait_for(
+					user_achievs_alerts(userid, shared),
+					timeout=config.achievements.USER_TIMEOUT,
+				)
+			except Exception as ex:
+				achievs_alerts_stats['failed'] += 1
+				logger.error(f'[achievs_alerts] {userid} failed: {ex!r}')
+
+			achievs_alerts_stats['done'] += 1
+
+			if achievs_alerts_stats['done'] % config.achievements.PROGRESS_EVERY == 0:
+				logger.info(
+					f'[achievs_alerts] {achievs_alerts_stats["done"]}/{len(userids)} '
+					f'in {time.monotonic() - started:.1f}s'
+				)
+
+	await asyncio.gather(
+		*[worker() for _ in range(min(config.achievements.CONCURRENCY, len(userids)))]
+	)
+
+	achievs_alerts_stats['duration'] = time.monotonic() - started
+	logger.info(
+		f'[achievs_alerts] done {achievs_alerts_stats["done"]} users '
+		f'({achievs_alerts_stats["failed"]} failed) '
+		f'in {achievs_alerts_stats["duration"]:.1f}s'
+	)
 
+
+def include_routers():
 	dp.include_routers(handlers.register_router)
 	dp.include_routers(handlers.admin_router)
 	dp.include_routers(handlers.default_router)
 
-	scheduler.add_job(achievs_alerts, 'cron', hour=12, minute=0)
 
+def setup_dispatcher(background: bool = True):
+	"""
+	Include routers, register middlewares, scheduler jobs and startup hooks
+
+	:param		background:	 Whether process runs background jobs (achievements
+							 alerts, stats refresh, startup notice)
+	:type		background:	 bool
+	"""
+	include_routers()
+
+	if background:
+		scheduler.add_job(achievs_alerts, 'cron', hour=12, minute=0)
+		scheduler.add_job(
+			SharedDict.purge_all, 'interval', seconds=config.storage.PURGE_INTERVAL
+		)
+		StatsCache.setup(scheduler)
+
+	watch_scheduler(scheduler)
 	scheduler.start()
 
+	metrics_middleware = MetricsMiddleware()
+	dp.update.outer_middleware(metrics_middleware)
+	dp.message.middleware(metrics_middleware)
+	dp.callback_query.middleware(metrics_middleware)
+
 	dp.update.middleware(SchedulerMiddleware(scheduler=scheduler))
+	dp.update.middleware(APIDeadlineMiddleware())
+
+	partner_middleware = PartnerMiddleware()
+	handlers.default_router.message.middleware(partner_middleware)
+	handlers.default_router.callback_query.middleware(partner_middleware)
+
+	dp.startup.register(APIRequest.open_session)
+	dp.startup.register(open_redis)
+
+	if background:
+		dp.startup.register(load_data_registries)
+		dp.startup.register(on_startup)
+
+	dp.shutdown.register(APIRequest.close_session)
+	dp.shutdown.register(sender.stop)
+	dp.shutdown.register(close_redis)
+
+
+async def receive_updates(dispatcher: Dispatcher, allowed_updates: List[str]):
+	"""
+	Receive updates by polling or webhook (WEBHOOK.MODE) until stop
+
+	:param		dispatcher:		  The dispatcher which gets updates
+	:type		dispatcher:		  Dispatcher
+	:param		allowed_updates:  The update types
+	:type		allowed_updates:  List[str]
+	"""
+	webhook = config.webhook.MODE == 'webhook'
+	web_app = create_metrics_app()
+	web_runner = None
+
+	if webhook:
+		if not config.metrics.PORT:
+			raise ValueError('Webhook mode needs METRICS.PORT to serve updates')
 
-	dp.startup.register(on_startup)
+		setup_webhook(web_app, dispatcher, bot, allowed_updates)
 
 	try:
-		logger.info('Start polling...')
-		await bot.delete_webhook(drop_pending_updates=True)
-		await dp.start_polling(bot, on_startup=on_startup)
+		if config.metrics.PORT:
+			# in webhook mode dispatcher startup is emitted here
+			web_runner = await start_metrics_server(
+				config.metrics.HOST, config.metrics.PORT, web_app
+			)
+
+		if webhook:
+			logger.info('Start webhook...')
+			await wait_for_stop()
+		else:
+			logger.info('Start polling...')
+			await bot.delete_webhook(drop_pending_updates=True)
+			await dispatcher.start_polling(bot, allowed_updates=allowed_updates)
+	finally:
+		if web_runner is not None:
+			# drains webhook updates before sessions are closed
+			await web_runner.cleanup()
+
+
+async def worker_main(index: int, count: int, port: int):
+	"""
+	Handle updates of worker shard which front process sends
+
+	:param		index:	The worker index
+	:type		index:	int
+	:param		count:	The workers count
+	:type		count:	int
+	:param		port:	The front IPC port
+	:type		port:	int
+	"""
+	utils.setup_logger('INFO', ['sqlalchemy.engine', 'aiogram.bot.api'])
+
+	# background jobs run once, in the first worker
+	setup_dispatcher(background=index == 0)
+	# workers share Telegram global limit
+	sender.global_bucket = TokenBucket(config.sender.GLOBAL_RATE / count)
+
+	worker = ShardWorker(dp, bot, index, scheduler)
+	# partner changed in one worker must not be served from LRU of others
+	worker.handlers['forget_partners'] = lambda message: PartnerCache.forget(
+		message['keys']
+	)
+	PartnerCache.listeners.append(
+		lambda keys: worker.broadcast({'type': 'forget_partners', 'keys': keys})
+	)
+
+	if config.metrics.PORT:
+		# front serves metrics of workers, collected over IPC
+		registry.labels['worker'] = str(index)
+		registry.collectors.append(collect_runtime_metrics)
+
+	try:
+		await dp.emit_startup(bot=bot, dispatcher=dp)
+		await worker.connect(port)
+		logger.info(f'Worker {index} started')
+		await worker.run()
+	finally:
+		await dp.emit_shutdown(bot=bot, dispatcher=dp)
+		await APIRequest.close_session()
+		await bot.session.close()
+
+
+def run_worker(
+	index: int, count: int, port: int, stores: Dict[str, Any], lock: Any = None
+):
+	"""
+	Worker process entry point
+
+	:param		index:	 The worker index
+	:type		index:	 int
+	:param		count:	 The workers count
+	:type		count:	 int
+	:param		port:	 The front IPC port
+	:type		port:	 int
+	:param		stores:	 The memory stores items of registries (manager dicts)
+	:type		stores:	 Dict[str, Any]
+	:param		lock:	 The lock of registry increments and modifications
+					 (manager lock)
+	:type		lock:	 Any
+	"""
+	# front handles SIGINT and asks workers to stop
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	SharedDict.attach(stores, lock)
+
+	asyncio.run(worker_main(index, count, port))
+
+
+async def front_main(count: int):
+	"""
+	Receive updates and send them to worker processes by chat
+
+	:param		count:	The workers count
+	:type		count:	int
+	"""
+	# handlers are included only to know update types workers handle
+	include_routers()
+	allowed_updates = dp.resolve_used_update_types()
+
+	context = multiprocessing.get_context('spawn')
+	manager = None
+	stores = {}
+	lock = None
+
+	if config.storage.BACKEND != 'redis':
+		# registries are shared by workers through manager process
+		manager = context.Manager()
+		stores = {name: manager.dict() for name in SharedDict.instances}
+		lock = manager.Lock()
+
+	router = ShardRouter(count)
+	port = await router.start()
+	registry.remotes.append(router.collect_metrics)
+	processes = {}
+	stopping = False
+
+	def start_worker(index: int):
+		processes[index] = context.Process(
+			target=run_worker,
+			args=(index, count, port, stores, lock),
+			name=f'sinwin-worker-{index}',
+			daemon=True,
+		)
+		processes[index].start()
+
+	async def supervise():
+		while not stopping:
+			await asyncio.sleep(1)
+
+			for index, process in list(processes.items()):
+				if not process.is_alive() and not stopping:
+					logger.error(f'Worker {index} exited ({process.exitcode}), restart')
+					start_worker(index)
+
+	for index in range(count):
+		start_worker(index)
+
+	supervisor = asyncio.create_task(supervise())
+
+	front = Dispatcher()
+	front.update.outer_middleware(ShardMiddleware(router))
+
+	try:
+		await receive_updates(front, allowed_updates)
+	finally:
+		stopping = True
+		supervisor.cancel()
+		await router.close()
+
+		for process in processes.values():
+			await asyncio.to_thread(process.join, config.webhook.DRAIN_TIMEOUT)
+
+			if process.is_alive():
+				process.terminate()
+
+		if manager is not None:
+			manager.shutdown()
+
+
+async def main():
+	result, status = await APIRequest.get('/base/info')
+	if status != 200:
+		# screens are served from stale responses until API is back
+		logger.warning(f'API is unavailable ({status}), starting anyway')
+
+	utils.setup_logger('INFO', ['sqlalchemy.engine', 'aiogram.bot.api'])
+
+	try:
+		if config.sharding.WORKERS > 1:
+			logger.info(f'Start {config.sharding.WORKERS} workers...')
+			await front_main(config.sharding.WORKERS)
+		else:
+			setup_dispatcher()
+
+			if config.metrics.PORT:
+				registry.collectors.append(collect_runtime_metrics)
+
+			await receive_updates(dp, dp.resolve_used_update_types())
 	finally:
 		logger.info('Close bot session...')
+		await APIRequest.close_session()
 		await bot.session.close()
 
 
@@ -1,10 +1,271 @@
+import asyncio
+import random
+import time
 import traceback
-from typing import Any, Dict, Tuple, Union
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, AsyncIterator, ClassVar, Dict, List, Optional, Tuple, Union
 
 import aiohttp
 from loguru import logger
 
+from app.database.partners import PartnerCache
 from app.loader import config
+from app.utils.jsonlib import dumps, dumps_bytes, loads
+from app.utils.metrics import normalize_endpoint, registry
+
+# POST endpoints without side effects, they are retried like GET requests
+IDEMPOTENT_POSTS = (
+	'/partner/find',
+	'/partner/find_many',
+	'/partner/get',
+	'/user/find',
+	'/transaction/find',
+)
+
+# heavy endpoints get config.api.SLOW_TIMEOUT instead of config.api.TIMEOUT
+SLOW_ENDPOINTS = ('/base/stats', '/partner/get', '/user/find')
+
+# read endpoints whose last good response is served while backend is down
+STALE_ENDPOINTS = (
+	'/base/info',
+	'/base/stats',
+	'/base/achstats',
+	'/base/admin_balance',
+	'/partner/find',
+	'/partner/get',
+	'/user/find',
+	'/transaction/find',
+)
+
+# status code of stale response, it is neither cached nor treated as fresh
+STALE_STATUS = 203
+
+# monotonic time until which API calls of current update may run
+api_deadline: ContextVar[Optional[float]] = ContextVar('api_deadline', default=None)
+
+
+def data_as_of(*results: Any) -> Optional[str]:
+	"""
+	Get time of stale data among API results
+
+	:param      results:  The results
+	:type       results:  Any
+
+	:returns:   "data as of" time of the first stale result, None if all
+	            results are fresh
+	:rtype:     Optional[str]
+	"""
+	for result in results:
+		if isinstance(result, dict) and result.get('data_as_of'):
+			return result['data_as_of']
+
+	return None
+
+
+def endpoint_timeout(endpoint: str) -> float:
+	"""
+	Get timeout of endpoint
+
+	:param      endpoint:  The endpoint path
+	:type       endpoint:  str
+
+	:returns:   timeout in seconds
+	:rtype:     float
+	"""
+	if endpoint in SLOW_ENDPOINTS:
+		return config.api.SLOW_TIMEOUT
+
+	return config.api.TIMEOUT
+
+
+class CircuitBreaker:
+	"""
+	This class describes a circuit breaker of backend API.
+
+	After THRESHOLD failures in a row requests fail fast for RESET seconds,
+	then one trial request decides whether circuit is closed again.
+	"""
+
+	def __init__(self, threshold: int, reset: float):
+		"""
+		Constructs a new instance.
+
+		:param      threshold:  The failures count which opens circuit
+		:type       threshold:  int
+		:param      reset:      The seconds circuit stays open
+		:type       reset:      float
+		"""
+		self.threshold = threshold
+		self.reset = reset
+		self.failures = 0
+		self.opened_at: Optional[float] = None
+		self.trial = False
+
+	@property
+	def state(self) -> str:
+		"""
+		Current state: closed, open or half-open
+
+		:returns:   state
+		:rtype:     str
+		"""
+		if self.opened_at is None:
+			return 'closed'
+
+		if time.monotonic() - self.opened_at < self.reset:
+			return 'open'
+
+		return 'half-open'
+
+	def allow(self) -> bool:
+		"""
+		Whether request may be sent
+
+		:returns:   True if circuit is closed or trial request is allowed
+		:rtype:     bool
+		"""
+		state = self.state
+
+		if state == 'closed':
+			return True
+
+		if state == 'half-open' and not self.trial:
+			self.trial = True
+			return True
+
+		return False
+
+	def success(self):
+		"""
+		Register successful request
+		"""
+		self.failures = 0
+		self.opened_at = None
+		self.trial = False
+
+	def release(self):
+		"""
+		Give back the trial request which was not completed
+		"""
+		self.trial = False
+
+	def failure(self):
+		"""
+		Register failed request
+		"""
+		self.failures += 1
+		self.trial = False
+
+		if self.opened_at is not None or self.failures >= self.threshold:
+			if self.opened_at is None or self.state == 'half-open':
+				logger.error(f'[CircuitBreaker] open for {self.reset}s')
+
+			self.opened_at = time.monotonic()
+
+
+class StaleStore:
+	"""
+	This class describes a store of last good responses of read endpoints.
+
+	While backend is unreachable the stored response is served with
+	"data_as_of" marker and revalidated in background.
+
+	Responses are kept encoded, the least recently stored are dropped when
+	count or total size of stored responses exceeds the limit.
+	"""
+
+	def __init__(self, max_size: int, max_bytes: int):
+		"""
+		Constructs a new instance.
+
+		:param      max_size:   The maximum count of stored responses
+		:type       max_size:   int
+		:param      max_bytes:  The maximum total size of stored responses
+		:type       max_bytes:  int
+		"""
+		self.max_size = max_size
+		self.max_bytes = max_bytes
+		self.size = 0
+		self.responses: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+		self.revalidating: Dict[str, asyncio.Task] = {}
+
+	@staticmethod
+	def key(url: str, data: Dict[Any, Any]) -> Optional[str]:
+		"""
+		Get store key of request
+
+		:param      url:   The url
+		:type       url:   str
+		:param      data:  The data
+		:type       data:  Dict[Any, Any]
+
+		:returns:   store key, None if endpoint is not a read endpoint
+		:rtype:     Optional[str]
+		"""
+		if url.split('?')[0] not in STALE_ENDPOINTS:
+			return None
+
+		return f'{url}|{dumps(data)}' if data else url
+
+	def remember(self, key: str, result: Any):
+		"""
+		Store good response
+
+		:param      key:     The store key
+		:type       key:     str
+		:param      result:  The result
+		:type       result:  Any
+		"""
+		raw = dumps_bytes(result)
+		self.forget(key)
+
+		if len(raw) > self.max_bytes:
+			return
+
+		self.responses[key] = (time.time(), raw)
+		self.size += len(raw)
+
+		while len(self.responses) > self.max_size or self.size > self.max_bytes:
+			_, (_, dropped) = self.responses.popitem(last=False)
+			self.size -= len(dropped)
+
+	def forget(self, key: str):
+		"""
+		Drop stored response
+
+		:param      key:  The store key
+		:type       key:  str
+		"""
+		item = self.responses.pop(key, None)
+
+		if item is not None:
+			self.size -= len(item[1])
+
+	def recall(self, key: str) -> Optional[Dict[str, Any]]:
+		"""
+		Get stored response marked with time it was received
+
+		:param      key:  The store key
+		:type       key:  str
+
+		:returns:   stale result, None if there is no stored response
+		:rtype:     Optional[Dict[str, Any]]
+		"""
+		item = self.responses.get(key)
+
+		if item is None:
+			return None
+
+		received_at, raw = item
+		as_of = datetime.fromtimestamp(received_at).strftime('%d.%m.%Y %H:%M:%S')
+
+		return {**loads(raw), 'data_as_of': as_of}
+
+
+breaker = CircuitBreaker(config.api.BREAKER_THRESHOLD, config.api.BREAKER_RESET)
+stale = StaleStore(config.api.STALE_MAX, config.api.STALE_MAX_BYTES)
 
 
 class APIRequest:
@@ -12,6 +273,125 @@ class APIRequest:
 	This class describes an api request.
 	"""
 
+	session: Optional[aiohttp.ClientSession] = None
+
+	@staticmethod
+	async def open_session() -> aiohttp.ClientSession:
+		"""
+		Open shared pooled ClientSession with keep-alive and DNS caching
+
+		:returns:	shared client session
+		:rtype:		aiohttp.ClientSession
+		"""
+		if APIRequest.session is None or APIRequest.session.closed:
+			connector = aiohttp.TCPConnector(
+				limit=config.http.LIMIT,
+				limit_per_host=config.http.LIMIT_PER_HOST,
+				ttl_dns_cache=config.http.DNS_CACHE_TTL,
+				keepalive_timeout=config.http.KEEPALIVE_TIMEOUT,
+			)
+			APIRequest.session = aiohttp.ClientSession(
+				connector=connector, json_serialize=dumps
+			)
+			logger.debug('[APIRequest] shared session opened')
+
+		return APIRequest.session
+
+	@staticmethod
+	async def close_session():
+		"""
+		Close shared ClientSession and release pooled connections
+		"""
+		if APIRequest.session is not None and not APIRequest.session.closed:
+			await APIRequest.session.close()
+			logger.debug('[APIRequest] shared session closed')
+
+		APIRequest.session = None
+
+	@staticmethod
+	async def _request(
+		client: aiohttp.ClientSession, url: str, data: Dict[Any, Any], timeout: float
+	) -> Tuple[Union[Any, bool], int, bool]:
+		"""
+		Send one request
+
+		:param      client:   The client
+		:type       client:   aiohttp.ClientSession
+		:param      url:      The full url
+		:type       url:      str
+		:param      data:     The data
+		:type       data:     Dict[Any, Any]
+		:param      timeout:  The timeout in seconds
+		:type       timeout:  float
+
+		:returns:   result, status code and whether backend failed (so request
+		            may be retried and counts against circuit breaker)
+		:rtype:     Tuple[Union[Any, bool], int, bool]
+		"""
+		client_timeout = aiohttp.ClientTimeout(total=timeout)
+		endpoint = normalize_endpoint(url[len(config.secrets.URL) :])
+		label = 'error'
+		# client error status is kept, so caller may tell unsupported
+		# endpoint from failed backend
+		status = 500
+		started_at = time.monotonic()
+
+		registry.add('sinwin_api_in_flight', 1, endpoint=endpoint)
+
+		try:
+			if data:
+				logger.debug(f'Post APIRequest: {url}')
+				request = client.post(
+					url=url,
+					data=dumps_bytes(data),
+					headers={'Content-Type': 'application/json'},
+					timeout=client_timeout,
+				)
+			else:
+				logger.debug(f'Get APIRequest: {url}')
+				request = client.get(url, timeout=client_timeout)
+
+			# body is always read inside the context, so the connection
+			# goes back to the shared pool instead of being dropped
+			async with request as response:
+				label = str(response.status)
+
+				if response.status >= 400:
+					status = response.status
+
+				if response.status >= 500:
+					logger.error(f'[APIRequest] {url} status {response.status}')
+					return False, response.status, True
+
+				raw = await response.read()
+				registry.observe(
+					'sinwin_api_response_bytes', len(raw), endpoint=endpoint
+				)
+				result = loads(raw)
+
+			if result.get('status', {'success': False}).get('success', False):
+				return result, response.status, False
+			else:
+				return result, status, False
+		except TimeoutError:
+			label = 'timeout'
+			logger.error(f'[APIRequest] {url} timeout ({timeout:.1f}s)')
+			return False, 504, True
+		except aiohttp.ClientError:
+			logger.error(f'[aiohttp] {url} error: {traceback.format_exc()}')
+			return False, 500, True
+		except Exception:
+			logger.error(f'[APIRequest] {url} error: {traceback.format_exc()}')
+			return False, status, False
+		finally:
+			registry.add('sinwin_api_in_flight', -1, endpoint=endpoint)
+			registry.observe(
+				'sinwin_api_request_seconds',
+				time.monotonic() - started_at,
+				endpoint=endpoint,
+			)
+			registry.inc('sinwin_api_responses_total', endpoint=endpoint, status=label)
+
 	@staticmethod
 	async def fetch(
 		client: aiohttp.ClientSession, url: str, data: Dict[Any, Any] = {}
@@ -19,6 +399,10 @@ class APIRequest:
 		"""
 		Fetch URL with data and ClientSession
 
+		Request is limited by endpoint timeout and by deadline of current
+		update. Idempotent requests are retried with jittered exponential
+		backoff, requests fail fast (503) while circuit breaker is open.
+
 		:param      client:  The client
 		:type       client:  aiohttp.ClientSession
 		:param      url:     The url
@@ -29,47 +413,186 @@ class APIRequest:
 		:returns:   tuple with result and status code
 		:rtype:     Tuple[Union[Any, bool], int]
 		"""
-		url = f'{config.secrets.URL}{url if url.startswith("/") else f"/{url}"}'
-		try:
-			if data:
-				logger.debug(f'Post APIRequest: {url}')
-				response = await client.post(
-					url=url, json=data, headers={'Content-Type': 'application/json'}
+		path = url if url.startswith('/') else f'/{url}'
+		endpoint = path.split('?')[0]
+		url = f'{config.secrets.URL}{path}'
+		retries = config.api.RETRIES if not data or endpoint in IDEMPOTENT_POSTS else 0
+
+		for attempt in range(retries + 1):
+			if not breaker.allow():
+				logger.warning(f'[APIRequest] {url} skipped: circuit breaker is open')
+				registry.inc(
+					'sinwin_api_responses_total',
+					endpoint=normalize_endpoint(path),
+					status='breaker',
 				)
-			else:
-				logger.debug(f'Get APIRequest: {url}')
-				response = await client.get(url)
+				return False, 503
 
-			result = await response.json()
+			timeout = endpoint_timeout(endpoint)
+			deadline = api_deadline.get()
 
-			if result.get('status', {'success': False}).get('success', False):
-				return result, response.status
+			if deadline is not None:
+				timeout = min(timeout, deadline - time.monotonic())
+
+				if timeout <= 0:
+					logger.warning(
+						f'[APIRequest] {url} skipped: update deadline exceeded'
+					)
+					registry.inc(
+						'sinwin_api_responses_total',
+						endpoint=normalize_endpoint(path),
+						status='deadline',
+					)
+					return False, 504
+
+			try:
+				result, status, failed = await APIRequest._request(
+					client, url, data, timeout
+				)
+			except asyncio.CancelledError:
+				# cancelled request tells nothing about backend, it only gives
+				# the half-open trial back
+				breaker.release()
+				raise
+
+			if failed:
+				breaker.failure()
 			else:
-				return result, 500
-		except aiohttp.ClientError:
-			logger.error(f'[aiohttp] {url} error: {traceback.format_exc()}')
-			return False, 500
-		except Exception:
-			logger.error(f'[APIRequest] {url} error: {traceback.format_exc()}')
-			return False, 500
+				breaker.success()
+				return result, status
+
+			if attempt < retries:
+				delay = config.api.RETRY_BASE * 2**attempt * random.uniform(0.5, 1.5)
+
+				if deadline is not None and time.monotonic() + delay >= deadline:
+					break
+
+				await asyncio.sleep(delay)
+
+		return result, status
 
 	@staticmethod
-	async def post(url: str, data: Dict[Any, Any]) -> Tuple[Union[Any, bool], int]:
+	async def _revalidate(url: str, data: Dict[Any, Any]):
 		"""
-		Post request to URL with data
+		Refetch stale response in background once backend may be up again
 
 		:param      url:   The url
 		:type       url:   str
 		:param      data:  The data
-		:type       data:  data: Dict[Any, Any]
+		:type       data:  Dict[Any, Any]
+		"""
+		# task copies context of update, its deadline must not apply here
+		api_deadline.set(None)
+		await asyncio.sleep(config.api.BREAKER_RESET)
+
+		if data:
+			result, status = await APIRequest.post(url, data)
+		else:
+			result, status = await APIRequest.get(url)
+
+		logger.info(f'[APIRequest] {url} revalidated: {status}')
+
+	@staticmethod
+	def _serve_stale(
+		url: str, data: Dict[Any, Any], result: Union[Any, bool], status: int
+	) -> Tuple[Union[Any, bool], int]:
+		"""
+		Remember good response of read endpoint, or serve the last good one
+		when backend is unreachable
+
+		:param      url:     The url
+		:type       url:     str
+		:param      data:    The data
+		:type       data:    Dict[Any, Any]
+		:param      result:  The result
+		:type       result:  Union[Any, bool]
+		:param      status:  The status code
+		:type       status:  int
+
+		:returns:   result and status code (STALE_STATUS for stale result)
+		:rtype:     Tuple[Union[Any, bool], int]
+		"""
+		key = stale.key(url, data)
+
+		if key is None:
+			return result, status
+
+		if status == 200:
+			stale.remember(key, result)
+			return result, status
+
+		# backend answered with error: it is up, stale data would hide it
+		if result is not False:
+			return result, status
+
+		stale_result = stale.recall(key)
+
+		if stale_result is None:
+			return result, status
+
+		logger.warning(
+			f'[APIRequest] {url} failed ({status}), serve data as of {stale_result["data_as_of"]}'
+		)
+
+		if key not in stale.revalidating:
+			task = asyncio.create_task(APIRequest._revalidate(url, data))
+			stale.revalidating[key] = task
+			task.add_done_callback(lambda _: stale.revalidating.pop(key, None))
+
+		return stale_result, STALE_STATUS
+
+	@staticmethod
+	async def post(
+		url: str, data: Dict[Any, Any], cache: bool = True
+	) -> Tuple[Union[Any, bool], int]:
+		"""
+		Post request to URL with data
+
+		Partner lookups which are changed and written back by /partner/update
+		must be made with cache=False: cached or stale partner would
+		overwrite changes (balance) made since it was cached.
+
+		:param      url:    The url
+		:type       url:    str
+		:param      data:   The data
+		:type       data:   data: Dict[Any, Any]
+		:param      cache:  Whether cached or stale result may be returned
+		:type       cache:  bool
 
 		:returns:   result and status code
 		:rtype:     Tuple[Union[Any, bool], int]
 		"""
-		async with aiohttp.ClientSession() as session:
+		partner_key = None
+
+		if url == '/partner/find':
+			partner_key = PartnerCache.key(data.get('opts'))
+
+			if partner_key is not None and cache:
+				result = await PartnerCache.get(partner_key)
+
+				if result is not None:
+					return result, 200
+
+		if url == '/partner/find' and PartnerLoader.key(data.get('opts')) is not None:
+			result, status = await PartnerLoader.load(data['opts'])
+		else:
+			session = await APIRequest.open_session()
 			result, status = await APIRequest.fetch(session, url, data)
+
+		if partner_key is not None and status == 200:
+			await PartnerCache.set(partner_key, result)
+		elif url.startswith('/partner/') and url not in (
+			'/partner/find',
+			'/partner/get',
+		):
+			# partner was created or changed: drop its cached lookups
+			await PartnerCache.invalidate(data)
+
+		if not cache and status != 200:
 			return result, status
 
+		return APIRequest._serve_stale(url, data, result, status)
+
 	@staticmethod
 	async def get(url: str) -> Tuple[Union[Any, bool], int]:
 		"""
@@ -81,7 +604,248 @@ class APIRequest:
 		:returns:   result and status code
 		:rtype:     Tuple[Union[Any, bool], int]
 		"""
-		async with aiohttp.ClientSession() as session:
-			result, status = await APIRequest.fetch(session, url)
+		session = await APIRequest.open_session()
+		result, status = await APIRequest.fetch(session, url)
 
-			return result, status
+		return APIRequest._serve_stale(url, {}, result, status)
+
+	@staticmethod
+	async def _fetch_partners(offset: int, limit: int) -> List[Dict[str, Any]]:
+		"""
+		Request page of partners
+
+		:param      offset:  The offset (cursor) of page
+		:type       offset:  int
+		:param      limit:   The page size
+		:type       limit:   int
+
+		:returns:   partners, every partner if backend does not support paging
+		:rtype:     List[Dict[str, Any]]
+		"""
+		result, status = await APIRequest.post(
+			'/partner/get', {'index': None, 'offset': offset, 'limit': limit}
+		)
+
+		return result['partners'] if result else []
+
+	@staticmethod
+	async def get_partners_page(
+		offset: int, limit: int
+	) -> Tuple[List[Dict[str, Any]], bool]:
+		"""
+		Get one page of partners
+
+		:param      offset:  The offset (cursor) of page
+		:type       offset:  int
+		:param      limit:   The page size
+		:type       limit:   int
+
+		:returns:   partners of page and whether there is next page
+		:rtype:     Tuple[List[Dict[str, Any]], bool]
+		"""
+		partners = await APIRequest._fetch_partners(offset, limit)
+
+		if len(partners) == limit:
+			# one partner of the next page tells whether it exists
+			following = await APIRequest._fetch_partners(offset + limit, 1)
+
+			if len(following) <= 1:
+				return partners, bool(following)
+
+			partners = following
+
+		if len(partners) > limit:
+			# backend without paging support returns every partner
+			return partners[offset : offset + limit], offset + limit < len(partners)
+
+		return partners, False
+
+	@staticmethod
+	async def iter_partners(page_size: int = 500) -> AsyncIterator[Dict[str, Any]]:
+		"""
+		Iterate over all partners page by page
+
+		:param      page_size:  The page size
+		:type       page_size:  int
+
+		:returns:   partners iterator
+		:rtype:     AsyncIterator[Dict[str, Any]]
+		"""
+		offset = 0
+		first = None
+
+		while True:
+			partners = await APIRequest._fetch_partners(offset, page_size)
+
+			if len(partners) > page_size or (
+				offset and partners and partners[0] == first
+			):
+				# backend without paging support returned every partner at once
+				for partner in partners[offset:]:
+					yield partner
+
+				return
+
+			for partner in partners:
+				yield partner
+
+			if len(partners) < page_size:
+				return
+
+			first = partners[0]
+			offset += page_size
+
+
+class PartnerLoader:
+	"""
+	This class describes batching loader of /partner/find lookups.
+
+	Lookups by one key (tg_id, partner_hash or referrer_hash) issued within
+	PARTNERS.BATCH_WINDOW milliseconds are deduplicated and sent as one
+	/partner/find_many request:
+
+		{"opts": [{"tg_id": 1}, {"partner_hash": "..."}]}
+		-> {"status": {"success": true}, "results": [{"partners": [...]}, ...]}
+
+	Results are in the order of opts. If the backend has no bulk endpoint,
+	the batch falls back to separate /partner/find requests.
+	"""
+
+	LOOKUP_KEYS = ('tg_id', 'partner_hash', 'referrer_hash')
+
+	pending: ClassVar[Dict[str, Tuple[Dict[str, Any], asyncio.Future]]] = {}
+	flush_handle: Optional[asyncio.TimerHandle] = None
+	bulk_disabled_until: float = 0.0
+	counters: ClassVar[Dict[str, int]] = {
+		'lookups': 0,
+		'deduplicated': 0,
+		'batches': 0,
+	}
+
+	@staticmethod
+	def key(opts: Dict[str, Any]) -> Optional[str]:
+		"""
+		Get loader key of /partner/find opts
+
+		:param      opts:  The opts
+		:type       opts:  Dict[str, Any]
+
+		:returns:   key, None if opts can not be batched
+		:rtype:     Optional[str]
+		"""
+		if not isinstance(opts, dict) or len(opts) != 1:
+			return None
+
+		name, value = next(iter(opts.items()))
+
+		if name not in PartnerLoader.LOOKUP_KEYS or value is None:
+			return None
+
+		return f'{name}:{value}'
+
+	@staticmethod
+	async def load(opts: Dict[str, Any]) -> Tuple[Union[Any, bool], int]:
+		"""
+		Schedule lookup to next batch and wait for its result
+
+		:param      opts:  The /partner/find opts
+		:type       opts:  Dict[str, Any]
+
+		:returns:   result and status code
+		:rtype:     Tuple[Union[Any, bool], int]
+		"""
+		key = PartnerLoader.key(opts)
+		PartnerLoader.counters['lookups'] += 1
+
+		if key in PartnerLoader.pending:
+			PartnerLoader.counters['deduplicated'] += 1
+			future = PartnerLoader.pending[key][1]
+		else:
+			loop = asyncio.get_running_loop()
+			future = loop.create_future()
+			PartnerLoader.pending[key] = (opts, future)
+
+			if len(PartnerLoader.pending) >= config.partners.BATCH_MAX:
+				PartnerLoader.flush()
+			elif PartnerLoader.flush_handle is None:
+				PartnerLoader.flush_handle = loop.call_later(
+					config.partners.BATCH_WINDOW / 1000, PartnerLoader.flush
+				)
+
+		# callers share one future: copy result, so they can mutate it
+		result, status = await asyncio.shield(future)
+
+		return (loads(dumps_bytes(result)) if result else result), status
+
+	@staticmethod
+	def flush():
+		"""
+		Send pending lookups as one batch
+		"""
+		if PartnerLoader.flush_handle is not None:
+			PartnerLoader.flush_handle.cancel()
+			PartnerLoader.flush_handle = None
+
+		batch = PartnerLoader.pending
+		PartnerLoader.pending = {}
+
+		if batch:
+			PartnerLoader.counters['batches'] += 1
+			asyncio.ensure_future(PartnerLoader._dispatch(list(batch.values())))
+
+	@staticmethod
+	async def _dispatch(batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+		try:
+			session = await APIRequest.open_session()
+			results = None
+
+			if len(batch) > 1 and time.monotonic() >= PartnerLoader.bulk_disabled_until:
+				results = await PartnerLoader._fetch_bulk(
+					session, [opts for opts, _ in batch]
+				)
+
+			if results is None:
+				results = await asyncio.gather(
+					*[
+						APIRequest.fetch(session, '/partner/find', {'opts': opts})
+						for opts, _ in batch
+					]
+				)
+
+			for (_, future), result in zip(batch, results):
+				if not future.done():
+					future.set_result(result)
+		except Exception as ex:
+			for _, future in batch:
+				if not future.done():
+					future.set_exception(ex)
+
+	@staticmethod
+	async def _fetch_bulk(
+		session: aiohttp.ClientSession, opts: List[Dict[str, Any]]
+	) -> Optional[List[Tuple[Dict[str, Any], int]]]:
+		result, status = await APIRequest.fetch(
+			session, '/partner/find_many', {'opts': opts}
+		)
+
+		if status in (400, 404, 405) or (
+			status == 200 and len(result.get('results', [])) != len(opts)
+		):
+			# no bulk endpoint: don't try it again for a while
+			PartnerLoader.bulk_disabled_until = time.monotonic() + 300
+			logger.warning(
+				'[PartnerLoader] /partner/find_many is not supported, use single finds'
+			)
+			return None
+
+		if status != 200 or not result:
+			# backend failure: single finds for this batch only
+			logger.warning(
+				f'[PartnerLoader] /partner/find_many status {status}, use single finds'
+			)
+			return None
+
+		return [
+			({'status': result['status'], 'partners': item['partners']}, 200)
+			for item in result['results']
+		]
@@ -23,8 +23,174 @@ class Secrets:
 
 @dataclass
 class RedisConfig:
+	"""
+	This dataclass describes Redis client params: pool size, timeouts,
+	PING interval of idle connections, retries with exponential backoff
+	(seconds from BACKOFF_BASE up to BACKOFF_CAP) and cache values format:
+	SERIALIZER (json or msgpack), COMPRESSION (none, zlib or lz4) of values
+	of COMPRESS_MIN_SIZE bytes and more.
+	"""
+
 	host: str
 	port: int
+	MAX_CONNECTIONS: int = 50
+	SOCKET_TIMEOUT: float = 5.0
+	HEALTH_CHECK_INTERVAL: int = 30
+	RETRIES: int = 3
+	BACKOFF_BASE: float = 0.05
+	BACKOFF_CAP: float = 2.0
+	SERIALIZER: str = 'json'
+	COMPRESSION: str = 'zlib'
+	COMPRESS_MIN_SIZE: int = 1024
+
+
+@dataclass
+class HttpConfig:
+	"""
+	This dataclass describes backend API http client params.
+	"""
+
+	LIMIT: int = 100
+	LIMIT_PER_HOST: int = 30
+	DNS_CACHE_TTL: int = 300
+	KEEPALIVE_TIMEOUT: float = 30.0
+	PAGE_SIZE: int = 500
+
+
+@dataclass
+class ApiConfig:
+	"""
+	This dataclass describes backend API timeouts, retries, circuit breaker
+	and stale responses params.
+	"""
+
+	TIMEOUT: float = 10.0
+	SLOW_TIMEOUT: float = 30.0
+	RETRIES: int = 2
+	RETRY_BASE: float = 0.2
+	BREAKER_THRESHOLD: int = 5
+	BREAKER_RESET: float = 30.0
+	UPDATE_DEADLINE: float = 25.0
+	STALE_MAX: int = 1000
+	STALE_MAX_BYTES: int = 32 * 1024 * 1024
+
+
+@dataclass
+class StatsConfig:
+	"""
+	This dataclass describes /base/stats cache params.
+	"""
+
+	REFRESH_INTERVAL: int = 60
+	MAX_AGE: int = 300
+	USERS_TTL: int = 30
+
+
+@dataclass
+class CacheConfig:
+	"""
+	This dataclass describes @cached functions params: JITTER is max share
+	added to TTL, BETA scales early refresh (0 disables it), TTLs of
+	/base/achstats, referrals lookups and of failed responses.
+	"""
+
+	JITTER: float = 0.1
+	BETA: float = 1.0
+	ACHSTATS_TTL: int = 60
+	REFERALS_TTL: int = 60
+	NEGATIVE_TTL: int = 5
+
+
+@dataclass
+class AchievementsConfig:
+	"""
+	This dataclass describes daily achievements alerts params.
+	"""
+
+	CONCURRENCY: int = 8
+	WINDOW: int = 1800
+	USER_TIMEOUT: int = 30
+	PROGRESS_EVERY: int = 500
+
+
+@dataclass
+class SenderConfig:
+	"""
+	This dataclass describes outbound Telegram queue params.
+	"""
+
+	GLOBAL_RATE: float = 30.0
+	CHAT_RATE: float = 1.0
+	WORKERS: int = 4
+	MAX_RETRIES: int = 3
+	MAX_CHATS: int = 10000
+
+
+@dataclass
+class PartnersConfig:
+	"""
+	This dataclass describes partner records cache params.
+	"""
+
+	TTL: int = 30
+	MAX_SIZE: int = 10000
+	BATCH_WINDOW: int = 5
+	BATCH_MAX: int = 100
+
+
+@dataclass
+class MetricsConfig:
+	"""
+	This dataclass describes http server params, it serves /metrics and
+	webhook endpoint (PORT=0 disables it in polling mode).
+	"""
+
+	HOST: str = '0.0.0.0'
+	PORT: int = 10011
+
+
+@dataclass
+class WebhookConfig:
+	"""
+	This dataclass describes updates receiving params: MODE is polling or
+	webhook. Empty SECRET is derived from bot token, empty URL keeps webhook
+	registered in Telegram as is (local testing).
+	"""
+
+	MODE: str = 'polling'
+	URL: str = ''
+	PATH: str = '/webhook'
+	SECRET: str = ''
+	MAX_CONNECTIONS: int = 40
+	DRAIN_TIMEOUT: float = 30.0
+
+
+@dataclass
+class ShardingConfig:
+	"""
+	This dataclass describes worker processes params: updates are spread
+	between WORKERS processes by chat, 1 runs everything in one process.
+	"""
+
+	WORKERS: int = 1
+
+
+@dataclass
+class StorageConfig:
+	"""
+	This dataclass describes state registries and FSM storage params: BACKEND
+	is memory (lost on restart) or redis. FSM_STATE_TTL and FSM_DATA_TTL are
+	seconds unfinished FSM flow is kept in redis.
+	"""
+
+	BACKEND: str = 'memory'
+	PREFIX: str = 'sinwin'
+	CACHE_TTL: float = 1.0
+	CACHE_SIZE: int = 10000
+	FLUSH_WINDOW: float = 0.005
+	PURGE_INTERVAL: int = 600
+	FSM_STATE_TTL: int = 86400
+	FSM_DATA_TTL: int = 86400
 
 
 @dataclass
@@ -50,6 +216,17 @@ class Config:
 	redis: RedisConfig
 	ALL_MEDIA_DIR: str
 	SINWIN_DATA: str
+	http: HttpConfig = field(default_factory=HttpConfig)
+	api: ApiConfig = field(default_factory=ApiConfig)
+	stats: StatsConfig = field(default_factory=StatsConfig)
+	cache: CacheConfig = field(default_factory=CacheConfig)
+	achievements: AchievementsConfig = field(default_factory=AchievementsConfig)
+	sender: SenderConfig = field(default_factory=SenderConfig)
+	partners: PartnersConfig = field(default_factory=PartnersConfig)
+	metrics: MetricsConfig = field(default_factory=MetricsConfig)
+	webhook: WebhookConfig = field(default_factory=WebhookConfig)
+	sharding: ShardingConfig = field(default_factory=ShardingConfig)
+	storage: StorageConfig = field(default_factory=StorageConfig)
 
 
 def get_config(config_path: str) -> str:
@@ -86,6 +263,21 @@ def get_config(config_path: str) -> str:
 	return config
 
 
+def get_section(config: dict, name: str) -> dict:
+	"""
+	Gets the optional configuration section.
+
+	:param		config:	 The configuration
+	:type		config:	 dict
+	:param		name:	 The section name
+	:type		name:	 str
+
+	:returns:	The section or empty dict if section is don't exists
+	:rtype:		dict
+	"""
+	return config[name] if name in config else {}
+
+
 def load_config(config: dict) -> Tuple[Config, Union[Database, Secrets]]:
 	"""
 	Loads a configuration.
@@ -113,5 +305,123 @@ def load_config(config: dict) -> Tuple[Config, Union[Database, Secrets]]:
 				int(admin_id) for admin_id in config['SECRETS']['ADMINS_IDS'].split(' ')
 			],
 		),
-		redis=RedisConfig(host=config['REDIS']['host'], port=config['REDIS']['port']),
+		redis=RedisConfig(
+			host=config['REDIS']['host'],
+			port=config['REDIS']['port'],
+			MAX_CONNECTIONS=int(
+				get_section(config, 'REDIS').get('MAX_CONNECTIONS', 50)
+			),
+			SOCKET_TIMEOUT=float(
+				get_section(config, 'REDIS').get('SOCKET_TIMEOUT', 5.0)
+			),
+			HEALTH_CHECK_INTERVAL=int(
+				get_section(config, 'REDIS').get('HEALTH_CHECK_INTERVAL', 30)
+			),
+			RETRIES=int(get_section(config, 'REDIS').get('RETRIES', 3)),
+			BACKOFF_BASE=float(get_section(config, 'REDIS').get('BACKOFF_BASE', 0.05)),
+			BACKOFF_CAP=float(get_section(config, 'REDIS').get('BACKOFF_CAP', 2.0)),
+			SERIALIZER=get_section(config, 'REDIS').get('SERIALIZER', 'json'),
+			COMPRESSION=get_section(config, 'REDIS').get('COMPRESSION', 'zlib'),
+			COMPRESS_MIN_SIZE=int(
+				get_section(config, 'REDIS').get('COMPRESS_MIN_SIZE', 1024)
+			),
+		),
+		http=HttpConfig(
+			LIMIT=int(get_section(config, 'HTTP').get('LIMIT', 100)),
+			LIMIT_PER_HOST=int(get_section(config, 'HTTP').get('LIMIT_PER_HOST', 30)),
+			DNS_CACHE_TTL=int(get_section(config, 'HTTP').get('DNS_CACHE_TTL', 300)),
+			KEEPALIVE_TIMEOUT=float(
+				get_section(config, 'HTTP').get('KEEPALIVE_TIMEOUT', 30.0)
+			),
+			PAGE_SIZE=int(get_section(config, 'HTTP').get('PAGE_SIZE', 500)),
+		),
+		api=ApiConfig(
+			TIMEOUT=float(get_section(config, 'API').get('TIMEOUT', 10.0)),
+			SLOW_TIMEOUT=float(get_section(config, 'API').get('SLOW_TIMEOUT', 30.0)),
+			RETRIES=int(get_section(config, 'API').get('RETRIES', 2)),
+			RETRY_BASE=float(get_section(config, 'API').get('RETRY_BASE', 0.2)),
+			BREAKER_THRESHOLD=int(
+				get_section(config, 'API').get('BREAKER_THRESHOLD', 5)
+			),
+			BREAKER_RESET=float(get_section(config, 'API').get('BREAKER_RESET', 30.0)),
+			UPDATE_DEADLINE=float(
+				get_section(config, 'API').get('UPDATE_DEADLINE', 25.0)
+			),
+			STALE_MAX=int(get_section(config, 'API').get('STALE_MAX', 1000)),
+			STALE_MAX_BYTES=int(
+				get_section(config, 'API').get('STALE_MAX_BYTES', 32 * 1024 * 1024)
+			),
+		),
+		stats=StatsConfig(
+			REFRESH_INTERVAL=int(
+				get_section(config, 'STATS').get('REFRESH_INTERVAL', 60)
+			),
+			MAX_AGE=int(get_section(config, 'STATS').get('MAX_AGE', 300)),
+			USERS_TTL=int(get_section(config, 'STATS').get('USERS_TTL', 30)),
+		),
+		cache=CacheConfig(
+			JITTER=float(get_section(config, 'CACHE').get('JITTER', 0.1)),
+			BETA=float(get_section(config, 'CACHE').get('BETA', 1.0)),
+			ACHSTATS_TTL=int(get_section(config, 'CACHE').get('ACHSTATS_TTL', 60)),
+			REFERALS_TTL=int(get_section(config, 'CACHE').get('REFERALS_TTL', 60)),
+			NEGATIVE_TTL=int(get_section(config, 'CACHE').get('NEGATIVE_TTL', 5)),
+		),
+		achievements=AchievementsConfig(
+			CONCURRENCY=int(get_section(config, 'ACHIEVEMENTS').get('CONCURRENCY', 8)),
+			WINDOW=int(get_section(config, 'ACHIEVEMENTS').get('WINDOW', 1800)),
+			USER_TIMEOUT=int(
+				get_section(config, 'ACHIEVEMENTS').get('USER_TIMEOUT', 30)
+			),
+			PROGRESS_EVERY=int(
+				get_section(config, 'ACHIEVEMENTS').get('PROGRESS_EVERY', 500)
+			),
+		),
+		sender=SenderConfig(
+			GLOBAL_RATE=float(get_section(config, 'SENDER').get('GLOBAL_RATE', 30.0)),
+			CHAT_RATE=float(get_section(config, 'SENDER').get('CHAT_RATE', 1.0)),
+			WORKERS=int(get_section(config, 'SENDER').get('WORKERS', 4)),
+			MAX_RETRIES=int(get_section(config, 'SENDER').get('MAX_RETRIES', 3)),
+			MAX_CHATS=int(get_section(config, 'SENDER').get('MAX_CHATS', 10000)),
+		),
+		partners=PartnersConfig(
+			TTL=int(get_section(config, 'PARTNERS').get('TTL', 30)),
+			MAX_SIZE=int(get_section(config, 'PARTNERS').get('MAX_SIZE', 10000)),
+			BATCH_WINDOW=int(get_section(config, 'PARTNERS').get('BATCH_WINDOW', 5)),
+			BATCH_MAX=int(get_section(config, 'PARTNERS').get('BATCH_MAX', 100)),
+		),
+		metrics=MetricsConfig(
+			HOST=get_section(config, 'METRICS').get('HOST', '0.0.0.0'),
+			PORT=int(get_section(config, 'METRICS').get('PORT', 10011)),
+		),
+		webhook=WebhookConfig(
+			MODE=get_section(config, 'WEBHOOK').get('MODE', 'polling'),
+			URL=get_section(config, 'WEBHOOK').get('URL', ''),
+			PATH=get_section(config, 'WEBHOOK').get('PATH', '/webhook'),
+			SECRET=get_section(config, 'WEBHOOK').get('SECRET', ''),
+			MAX_CONNECTIONS=int(
+				get_section(config, 'WEBHOOK').get('MAX_CONNECTIONS', 40)
+			),
+			DRAIN_TIMEOUT=float(
+				get_section(config, 'WEBHOOK').get('DRAIN_TIMEOUT', 30.0)
+			),
+		),
+		sharding=ShardingConfig(
+			WORKERS=int(get_section(config, 'SHARDING').get('WORKERS', 1)),
+		),
+		storage=StorageConfig(
+			BACKEND=get_section(config, 'STORAGE').get('BACKEND', 'memory'),
+			PREFIX=get_section(config, 'STORAGE').get('PREFIX', 'sinwin'),
+			CACHE_TTL=float(get_section(config, 'STORAGE').get('CACHE_TTL', 1.0)),
+			CACHE_SIZE=int(get_section(config, 'STORAGE').get('CACHE_SIZE', 10000)),
+			FLUSH_WINDOW=float(
+				get_section(config, 'STORAGE').get('FLUSH_WINDOW', 0.005)
+			),
+			PURGE_INTERVAL=int(
+				get_section(config, 'STORAGE').get('PURGE_INTERVAL', 600)
+			),
+			FSM_STATE_TTL=int(
+				get_section(config, 'STORAGE').get('FSM_STATE_TTL', 86400)
+			),
+			FSM_DATA_TTL=int(get_section(config, 'STORAGE').get('FSM_DATA_TTL', 86400)),
+		),
 	)
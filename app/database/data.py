@@ -0,0 +1,157 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from app.database.shared import SharedDict
+from app.loader import load_data, write_data
+
+# registries of data.json, shared by workers: data.json is loaded into
+# them at startup and rewritten from them after every change
+promocodes = SharedDict('promocodes')
+# activations left by promocode name, decremented atomically
+promocode_activations = SharedDict('promocode_activations')
+deleted_promocodes = SharedDict('deleted_promocodes')
+topworkers = SharedDict('topworkers')
+
+
+async def load_data_registries():
+	"""
+	Load data.json into registries unless they are already filled (by other
+	process or, with redis, before restart)
+	"""
+	if await topworkers.keys():
+		return
+
+	data = await asyncio.to_thread(load_data)
+
+	for place, reward in data['topworkers'].items():
+		await topworkers.set(place, reward)
+
+	for name, promocode in data['promocodes'].items():
+		await set_promocode(name, promocode)
+
+	logger.info(f'[data] {len(data["promocodes"])} promocodes loaded from data.json')
+
+
+async def save_data():
+	"""
+	Write registries to data.json
+	"""
+	data = {
+		'topworkers': await get_topworkers(),
+		'promocodes': await get_promocodes(),
+	}
+
+	def write():
+		# keys which are not kept in registries (debug) stay as they are
+		write_data({**load_data(), **data})
+
+	try:
+		await asyncio.to_thread(write)
+	except Exception as ex:
+		logger.error(f'[data] data.json write error: {ex}')
+
+
+async def get_topworkers() -> Dict[str, Dict[str, Any]]:
+	"""
+	Get rewards of top workers
+
+	:returns:	reward by place (first_place, second_place, third_place)
+	:rtype:		Dict[str, Dict[str, Any]]
+	"""
+	return {place: await topworkers.get(place) for place in await topworkers.keys()}
+
+
+async def get_promocode(name: str) -> Optional[Dict[str, Any]]:
+	"""
+	Get promocode with activations left
+
+	:param		name:  The promocode name
+	:type		name:  str
+
+	:returns:	promocode, None if it does not exist
+	:rtype:		Optional[Dict[str, Any]]
+	"""
+	promocode = await promocodes.get(name)
+
+	if promocode is None:
+		return None
+
+	return {
+		**promocode,
+		'activations_left': await promocode_activations.get(name, 0),
+	}
+
+
+async def get_promocodes() -> Dict[str, Dict[str, Any]]:
+	"""
+	Get all promocodes with activations left
+
+	:returns:	promocode by name
+	:rtype:		Dict[str, Dict[str, Any]]
+	"""
+	result = {}
+
+	for name in await promocodes.keys():
+		promocode = await get_promocode(name)
+
+		if promocode is not None:
+			result[name] = promocode
+
+	return result
+
+
+async def set_promocode(name: str, promocode: Dict[str, Any]):
+	"""
+	Create or replace promocode
+
+	:param		name:		The promocode name
+	:type		name:		str
+	:param		promocode:	The promocode with activations left
+	:type		promocode:	Dict[str, Any]
+	"""
+	promocode = dict(promocode)
+	activations = promocode.pop('activations_left', promocode.get('activates', 0))
+	await promocode_activations.set(name, int(activations))
+	await promocodes.set(name, promocode)
+
+
+async def delete_promocode(name: str) -> Optional[Dict[str, Any]]:
+	"""
+	Delete promocode, it is kept to be restored
+
+	:param		name:  The promocode name
+	:type		name:  str
+
+	:returns:	deleted promocode, None if it does not exist
+	:rtype:		Optional[Dict[str, Any]]
+	"""
+	promocode = await get_promocode(name)
+
+	if promocode is None:
+		return None
+
+	await promocodes.delete(name)
+	await promocode_activations.delete(name)
+	await deleted_promocodes.set(name, promocode)
+
+	return promocode
+
+
+async def activate_promocode(name: str) -> bool:
+	"""
+	Take one activation of promocode
+
+	:param		name:  The promocode name
+	:type		name:  str
+
+	:returns:	False if no activations are left
+	:rtype:		bool
+	"""
+	if await promocode_activations.incr(name, -1) >= 0:
+		return True
+
+	await promocode_activations.incr(name)
+
+	return False
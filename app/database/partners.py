@@ -0,0 +1,206 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple, TypedDict
+
+from app.database.redis import delete_many, get_cache, set_cache
+from app.loader import config
+from app.utils.jsonlib import dumps_bytes, loads
+
+PARTNERS_NAMESPACE = 'partners'
+
+# /partner/find opts which identify partner and can be cached
+PARTNER_KEYS = ('tg_id', 'partner_hash')
+
+
+class Partner(TypedDict, total=False):
+	"""
+	This class describes partner record of backend API.
+	"""
+
+	id: int
+	tg_id: str
+	partner_hash: str
+	referrer_hash: Optional[str]
+	is_referal: bool
+	username: str
+	fullname: str
+	number_phone: str
+	age: int
+	arbitration_experience: int
+	experience_time: str
+	status: str
+	approved: bool
+	is_freezed: bool
+	balance: float
+	total_income: float
+	ref_income: float
+	referals_count: int
+	additional_percent: float
+	showed_percent: str
+	register_date: str
+	last_withdraw_date: str
+	time_to_withdraw: Optional[str]
+
+
+class PartnerCache:
+	"""
+	This class describes two-tier cache of /partner/find results.
+
+	Results of lookups by tg_id or partner_hash are kept in in-process LRU
+	in front of Redis. Records are stored encoded, so callers can freely
+	mutate returned partners. Invalidated keys are passed to listeners, so
+	other processes (shard workers) drop them from their LRU too.
+	"""
+
+	memory: ClassVar['OrderedDict[str, Tuple[float, bytes]]'] = OrderedDict()
+	counters: ClassVar[Dict[str, int]] = {
+		'memory_hits': 0,
+		'redis_hits': 0,
+		'misses': 0,
+		'invalidations': 0,
+	}
+	listeners: ClassVar[List[Callable[[List[str]], None]]] = []
+
+	@staticmethod
+	def key(opts: Dict[str, Any]) -> Optional[str]:
+		"""
+		Get cache key of /partner/find opts
+
+		:param		opts:  The opts
+		:type		opts:  Dict[str, Any]
+
+		:returns:	cache key, None if opts are not cacheable
+		:rtype:		Optional[str]
+		"""
+		if not isinstance(opts, dict) or len(opts) != 1:
+			return None
+
+		name, value = next(iter(opts.items()))
+
+		if name not in PARTNER_KEYS or value is None:
+			return None
+
+		return f'{name}:{value}'
+
+	@staticmethod
+	def keys_of(partner: Dict[str, Any]) -> List[str]:
+		"""
+		Get all cache keys of partner
+
+		:param		partner:  The partner
+		:type		partner:  Dict[str, Any]
+
+		:returns:	cache keys
+		:rtype:		List[str]
+		"""
+		return [
+			f'{name}:{partner[name]}'
+			for name in PARTNER_KEYS
+			if partner.get(name) is not None
+		]
+
+	@staticmethod
+	def _remember(key: str, raw: bytes):
+		PartnerCache.memory[key] = (time.monotonic() + config.partners.TTL, raw)
+		PartnerCache.memory.move_to_end(key)
+
+		while len(PartnerCache.memory) > config.partners.MAX_SIZE:
+			PartnerCache.memory.popitem(last=False)
+
+	@staticmethod
+	async def get(key: str) -> Optional[Dict[str, Any]]:
+		"""
+		Get cached /partner/find result
+
+		:param		key:  The cache key
+		:type		key:  str
+
+		:returns:	result or None on miss
+		:rtype:		Optional[Dict[str, Any]]
+		"""
+		item = PartnerCache.memory.get(key)
+
+		if item is not None:
+			expires_at, raw = item
+
+			if expires_at > time.monotonic():
+				PartnerCache.memory.move_to_end(key)
+				PartnerCache.counters['memory_hits'] += 1
+				return loads(raw)
+
+			del PartnerCache.memory[key]
+
+		result = await get_cache(key, namespace=PARTNERS_NAMESPACE)
+
+		if result:
+			PartnerCache.counters['redis_hits'] += 1
+			PartnerCache._remember(key, dumps_bytes(result))
+			return result
+
+		PartnerCache.counters['misses'] += 1
+
+		return None
+
+	@staticmethod
+	async def set(key: str, result: Dict[str, Any]):
+		"""
+		Put /partner/find result to cache
+
+		:param		key:	 The cache key
+		:type		key:	 str
+		:param		result:	 The result
+		:type		result:	 Dict[str, Any]
+		"""
+		PartnerCache._remember(key, dumps_bytes(result))
+		await set_cache(
+			result, key, namespace=PARTNERS_NAMESPACE, ttl=config.partners.TTL
+		)
+
+	@staticmethod
+	async def invalidate(data: Dict[str, Any]):
+		"""
+		Drop cached lookups of partner after it was changed
+
+		:param		data:  The changed partner (or create/update payload)
+		:type		data:  Dict[str, Any]
+		"""
+		if not isinstance(data, dict):
+			return
+
+		keys = PartnerCache.keys_of(data)
+		PartnerCache.forget(keys)
+
+		for listener in PartnerCache.listeners:
+			listener(keys)
+
+		await delete_many(keys, namespace=PARTNERS_NAMESPACE)
+
+	@staticmethod
+	def forget(keys: List[str]):
+		"""
+		Drop lookups from in-process LRU
+
+		:param		keys:  The cache keys
+		:type		keys:  List[str]
+		"""
+		for key in keys:
+			PartnerCache.memory.pop(key, None)
+			PartnerCache.counters['invalidations'] += 1
+
+	@staticmethod
+	def metrics() -> Dict[str, Any]:
+		"""
+		Get cache counters
+
+		:returns:	hit/miss counters, hit ratio and LRU size
+		:rtype:		Dict[str, Any]
+		"""
+		counters = PartnerCache.counters
+		hits = counters['memory_hits'] + counters['redis_hits']
+		total = hits + counters['misses']
+
+		return {
+			**counters,
+			'hit_ratio': hits / total if total else 0.0,
+			'size': len(PartnerCache.memory),
+		}
@@ -1,38 +1,149 @@
-from typing import Any
+import time
+from typing import Any, Dict, Iterable, List, Optional
 
-from aiocache import Cache
 from loguru import logger
+from redis.asyncio import Redis
+from redis.asyncio.retry import Retry
+from redis.backoff import ExponentialWithJitterBackoff
+from redis.exceptions import ConnectionError, TimeoutError
 
 from app.loader import config
+from app.utils.codec import Codec
+from app.utils.metrics import registry
 
+# seconds caches skip Redis after error, so calls do not wait for retries
+REDIS_PAUSE = 5.0
 
-async def create_cache(namespace: str = 'main') -> Cache.REDIS:
+redis_client: Optional[Redis] = None
+redis_paused_until = 0.0
+
+try:
+	codec = Codec(
+		config.redis.SERIALIZER,
+		config.redis.COMPRESSION,
+		config.redis.COMPRESS_MIN_SIZE,
+	)
+except ValueError as ex:
+	logger.warning(f'[redis] {ex}, json with zlib is used')
+	codec = Codec(min_size=config.redis.COMPRESS_MIN_SIZE)
+
+registry.describe('sinwin_redis_up', 'gauge', 'Redis answered last health check')
+
+
+def get_redis() -> Redis:
 	"""
-	Gets the cache.
+	Gets the shared Redis client. It keeps connection pool: idle connections
+	are checked with PING before reuse, commands failed on connection error
+	are retried with exponential backoff (after reconnect).
 
-	:param		name:			The name
-	:type		name:			str
-	:param		namespace:		The namespace
-	:type		namespace:		str
-	:param		subspace:		The subspace
-	:type		subspace:		str
+	:returns:	The Redis client.
+	:rtype:		Redis
+	"""
+	global redis_client
+
+	if redis_client is None:
+		redis_client = Redis(
+			host=config.redis.host,
+			port=int(config.redis.port),
+			max_connections=config.redis.MAX_CONNECTIONS,
+			socket_timeout=config.redis.SOCKET_TIMEOUT,
+			socket_connect_timeout=config.redis.SOCKET_TIMEOUT,
+			health_check_interval=config.redis.HEALTH_CHECK_INTERVAL,
+			retry=Retry(
+				ExponentialWithJitterBackoff(
+					cap=config.redis.BACKOFF_CAP, base=config.redis.BACKOFF_BASE
+				),
+				config.redis.RETRIES,
+			),
+			retry_on_error=[ConnectionError, TimeoutError],
+		)
 
-	:returns:	The cache.
-	:rtype:		redis cache
+	return redis_client
 
-	:raises		HTTPException:	error connect to redis cache server
+
+async def check_redis() -> bool:
+	"""
+	Health check: ping Redis
+
+	:returns:	True if Redis answered
+	:rtype:		bool
 	"""
 	try:
-		cache = Cache.REDIS(
-			endpoint=config.redis.host,
-			port=config.redis.port,
-			namespace=namespace,
-		)
+		await get_redis().ping()
 	except Exception as ex:
-		logger.error(f'Error when get_cache: {ex}')
-		return None, None
+		logger.warning(f'[redis] health check failed: {ex}')
+		registry.set('sinwin_redis_up', 0)
+		return False
+
+	registry.set('sinwin_redis_up', 1)
+
+	return True
+
+
+def redis_paused() -> bool:
+	"""
+	Whether caches skip Redis after recent error
+
+	:returns:	True if Redis is skipped
+	:rtype:		bool
+	"""
+	return time.monotonic() < redis_paused_until
+
+
+def pause_redis(name: str, ex: Exception):
+	"""
+	Log cache error and skip Redis in all caches for REDIS_PAUSE seconds
+
+	:param		name:  The failed operation
+	:type		name:  str
+	:param		ex:	   The error
+	:type		ex:	   Exception
+	"""
+	global redis_paused_until
+
+	logger.error(f'[redis] {name} error: {ex}, caches skip Redis for {REDIS_PAUSE}s')
+	redis_paused_until = time.monotonic() + REDIS_PAUSE
+
 
-	return cache
+async def open_redis():
+	"""
+	Create the shared client at startup and check Redis (connection is
+	retried with backoff). Bot starts anyway: while Redis is down, cache
+	helpers of this module and cached functions treat every read as miss
+	and drop writes, after first error they skip Redis for REDIS_PAUSE
+	seconds instead of retrying each call. Registries (SharedDict) and FSM
+	storage with redis backend still need it.
+	"""
+	if not await check_redis():
+		logger.error('[redis] is unavailable, caches are skipped until it is back')
+
+
+async def close_redis():
+	"""
+	Close the shared client and its pooled connections
+	"""
+	global redis_client
+
+	if redis_client is not None:
+		await redis_client.aclose()
+		logger.debug('[redis] connections closed')
+
+	redis_client = None
+
+
+def cache_key(name: str, namespace: str = 'main') -> str:
+	"""
+	Build cache key of value in namespace
+
+	:param		name:		The name
+	:type		name:		str
+	:param		namespace:	The namespace
+	:type		namespace:	str
+
+	:returns:	key `{namespace}:{name}`
+	:rtype:		str
+	"""
+	return f'{namespace}:{name}'
 
 
 async def get_cache(name: str, namespace: str = 'main') -> Any:
@@ -43,24 +154,56 @@ async def get_cache(name: str, namespace: str = 'main') -> Any:
 	:type		name:		str
 	:param		namespace:	The namespace
 	:type		namespace:	str
-	:param		subspace:	The subspace
-	:type		subspace:	str
 
 	:returns:	The cached value by name.
 	:rtype:		Any
 	"""
+	cachename = cache_key(name, namespace)
+
+	if redis_paused():
+		return {}
+
 	try:
-		cachename = f'{namespace}:{name}'
-		cache = await create_cache(namespace)
-		value = await cache.get(cachename)
+		raw = await get_redis().get(cachename)
 	except Exception as ex:
-		logger.error(f'Exception thrown at get_cache ({cachename}): {ex}')
+		pause_redis(f'get_cache ({cachename})', ex)
 		return {}
 
-	return value
+	return None if raw is None else codec.decode(raw)
 
 
-async def set_cache(data: Any, name: str, namespace: str = 'main'):
+async def get_many(names: Iterable[str], namespace: str = 'main') -> List[Any]:
+	"""
+	Gets the cached values by names in one round trip (MGET).
+
+	:param		names:		The names
+	:type		names:		Iterable[str]
+	:param		namespace:	The namespace
+	:type		namespace:	str
+
+	:returns:	The cached values (None if missing) in order of names.
+	:rtype:		List[Any]
+	"""
+	keys = [cache_key(name, namespace) for name in names]
+
+	if not keys:
+		return []
+
+	if redis_paused():
+		return [None] * len(keys)
+
+	try:
+		values = await get_redis().mget(keys)
+	except Exception as ex:
+		pause_redis(f'get_many ({namespace})', ex)
+		return [None] * len(keys)
+
+	return [None if raw is None else codec.decode(raw) for raw in values]
+
+
+async def set_cache(
+	data: Any, name: str, namespace: str = 'main', ttl: Optional[int] = None
+):
 	"""
 	Sets the cache.
 
@@ -70,7 +213,86 @@ async def set_cache(data: Any, name: str, namespace: str = 'main'):
 	:type       name:       str
 	:param      namespace:  The namespace
 	:type       namespace:  str
+	:param      ttl:        The ttl in seconds, without expiration by default
+	:type       ttl:        Optional[int]
 	"""
-	cache_key = f'{namespace}:{name}'
-	cache = await create_cache(namespace)
-	await cache.set(cache_key, data)
+	if redis_paused():
+		return
+
+	try:
+		await get_redis().set(cache_key(name, namespace), codec.encode(data), ex=ttl)
+	except Exception as ex:
+		pause_redis(f'set_cache ({cache_key(name, namespace)})', ex)
+
+
+async def set_many(
+	items: Dict[str, Any], namespace: str = 'main', ttl: Optional[int] = None
+):
+	"""
+	Sets the cache of many values in one round trip: MSET or, with ttl,
+	pipeline of SET commands.
+
+	:param      items:      The data by name
+	:type       items:      Dict[str, Any]
+	:param      namespace:  The namespace
+	:type       namespace:  str
+	:param      ttl:        The ttl in seconds, without expiration by default
+	:type       ttl:        Optional[int]
+	"""
+	mapping = {
+		cache_key(name, namespace): codec.encode(data) for name, data in items.items()
+	}
+
+	if not mapping or redis_paused():
+		return
+
+	try:
+		if ttl is None:
+			await get_redis().mset(mapping)
+			return
+
+		async with get_redis().pipeline(transaction=False) as pipe:
+			for key, raw in mapping.items():
+				pipe.set(key, raw, ex=ttl)
+
+			await pipe.execute()
+	except Exception as ex:
+		pause_redis(f'set_many ({namespace})', ex)
+
+
+async def delete_cache(name: str, namespace: str = 'main'):
+	"""
+	Deletes the cached value by name.
+
+	:param      name:       The name
+	:type       name:       str
+	:param      namespace:  The namespace
+	:type       namespace:  str
+	"""
+	if redis_paused():
+		return
+
+	try:
+		await get_redis().delete(cache_key(name, namespace))
+	except Exception as ex:
+		pause_redis(f'delete_cache ({cache_key(name, namespace)})', ex)
+
+
+async def delete_many(names: Iterable[str], namespace: str = 'main'):
+	"""
+	Deletes the cached values by names in one round trip.
+
+	:param      names:      The names
+	:type       names:      Iterable[str]
+	:param      namespace:  The namespace
+	:type       namespace:  str
+	"""
+	keys = [cache_key(name, namespace) for name in names]
+
+	if not keys or redis_paused():
+		return
+
+	try:
+		await get_redis().delete(*keys)
+	except Exception as ex:
+		pause_redis(f'delete_many ({namespace})', ex)
@@ -0,0 +1,445 @@
+import asyncio
+import contextlib
+import time
+from typing import Any, Callable, ClassVar, Dict, List, Optional, Tuple
+
+from loguru import logger
+from redis.exceptions import WatchError
+
+from app.database.redis import get_redis
+from app.loader import config
+from app.utils.jsonlib import dumps_bytes, loads
+
+
+class MemoryStore:
+	"""
+	This class describes store of encoded values in process dict (or in
+	multiprocessing manager dict shared by workers, see SharedDict.attach).
+	"""
+
+	def __init__(self, items: Any = None, lock: Any = None):
+		"""
+		Constructs a new instance.
+
+		:param		items:	The dict of (expires at, value) by key
+		:type		items:	Any
+		:param		lock:	The lock of increments and modifications (manager
+							lock shared by workers), not needed in one process
+		:type		lock:	Any
+		"""
+		self.items = items if items is not None else {}
+		self.lock = lock
+
+	async def get(self, key: str, fresh: bool = False) -> Optional[bytes]:
+		item = self.items.get(key)
+
+		if item is None:
+			return None
+
+		expires_at, raw = item
+
+		if expires_at is not None and expires_at <= time.time():
+			self.items.pop(key, None)
+			return None
+
+		return raw
+
+	async def set(self, key: str, raw: bytes, ttl: Optional[float] = None):
+		self.items[key] = (time.time() + ttl if ttl else None, raw)
+
+	async def delete(self, key: str):
+		self.items.pop(key, None)
+
+	async def incr(self, key: str, amount: int) -> int:
+		# get and set are separate calls of manager dict
+		with self.lock if self.lock is not None else contextlib.nullcontext():
+			item = self.items.get(key)
+			value = (int(item[1]) if item is not None else 0) + amount
+			self.items[key] = (None, str(value).encode())
+
+		return value
+
+	async def modify(
+		self,
+		key: str,
+		func: Callable[[Optional[bytes]], Optional[bytes]],
+		ttl: Optional[float] = None,
+	) -> Optional[bytes]:
+		with self.lock if self.lock is not None else contextlib.nullcontext():
+			raw = await self.get(key)
+			changed = func(raw)
+
+			if changed is not None:
+				await self.set(key, changed, ttl)
+
+		return raw if changed is None else changed
+
+	async def keys(self) -> List[str]:
+		now = time.time()
+
+		return [
+			key
+			for key, (expires_at, _) in list(self.items.items())
+			if expires_at is None or expires_at > now
+		]
+
+	async def purge(self) -> int:
+		now = time.time()
+		expired = [
+			key
+			for key, (expires_at, _) in list(self.items.items())
+			if expires_at is not None and expires_at <= now
+		]
+
+		for key in expired:
+			self.items.pop(key, None)
+
+		return len(expired)
+
+
+class RedisStore:
+	"""
+	This class describes store of encoded values in Redis.
+
+	Values are kept in hash `{prefix}:{name}`, expiration times of keys with
+	TTL are kept in sorted set `{prefix}:{name}:expires`. Reads are cached
+	in process for STORAGE.CACHE_TTL seconds. Writes made within
+	STORAGE.FLUSH_WINDOW seconds are sent in one pipeline, each writer
+	waits until its write is stored. Read-modify-writes (modify) are WATCH
+	transactions reading past the cache.
+	"""
+
+	def __init__(self, name: str):
+		"""
+		Constructs a new instance.
+
+		:param		name:  The registry name
+		:type		name:  str
+		"""
+		self.hash = f'{config.storage.PREFIX}:{name}'
+		self.expires = f'{self.hash}:expires'
+		self.cache: Dict[str, Tuple[float, Optional[bytes]]] = {}
+		# key -> (value or None to delete, ttl)
+		self.pending: Dict[str, Tuple[Optional[bytes], Optional[float]]] = {}
+		self.flushed: Optional[asyncio.Future] = None
+
+	def _remember(self, key: str, raw: Optional[bytes]):
+		self.cache[key] = (time.monotonic() + config.storage.CACHE_TTL, raw)
+
+		if len(self.cache) > config.storage.CACHE_SIZE:
+			now = time.monotonic()
+			self.cache = {
+				key: item for key, item in self.cache.items() if item[0] > now
+			}
+
+	async def get(self, key: str, fresh: bool = False) -> Optional[bytes]:
+		item = self.cache.get(key)
+
+		if not fresh and item is not None and item[0] > time.monotonic():
+			return item[1]
+
+		async with get_redis().pipeline(transaction=False) as pipe:
+			pipe.hget(self.hash, key)
+			pipe.zscore(self.expires, key)
+			raw, expires_at = await pipe.execute()
+
+		if expires_at is not None and expires_at <= time.time():
+			raw = None
+
+		self._remember(key, raw)
+
+		return raw
+
+	async def _write(self, key: str, raw: Optional[bytes], ttl: Optional[float]):
+		self._remember(key, raw)
+		self.pending[key] = (raw, ttl)
+
+		if self.flushed is None:
+			self.flushed = asyncio.get_running_loop().create_future()
+			asyncio.create_task(self._flush())
+
+		await asyncio.shield(self.flushed)
+
+	async def _flush(self):
+		await asyncio.sleep(config.storage.FLUSH_WINDOW)
+		pending, self.pending = self.pending, {}
+		flushed, self.flushed = self.flushed, None
+		now = time.time()
+
+		try:
+			async with get_redis().pipeline(transaction=False) as pipe:
+				for key, (raw, ttl) in pending.items():
+					if raw is None:
+						pipe.hdel(self.hash, key)
+					else:
+						pipe.hset(self.hash, key, raw)
+
+					if raw is not None and ttl:
+						pipe.zadd(self.expires, {key: now + ttl})
+					else:
+						pipe.zrem(self.expires, key)
+
+				await pipe.execute()
+		except Exception as ex:
+			logger.error(f'[storage] {self.hash} write error: {ex}')
+
+			for key in pending:
+				self.cache.pop(key, None)
+
+			flushed.set_exception(ex)
+			return
+
+		flushed.set_result(len(pending))
+
+	async def set(self, key: str, raw: bytes, ttl: Optional[float] = None):
+		await self._write(key, raw, ttl)
+
+	async def delete(self, key: str):
+		await self._write(key, None, None)
+
+	async def incr(self, key: str, amount: int) -> int:
+		value = await get_redis().hincrby(self.hash, key, amount)
+		self._remember(key, str(value).encode())
+
+		return value
+
+	async def modify(
+		self,
+		key: str,
+		func: Callable[[Optional[bytes]], Optional[bytes]],
+		ttl: Optional[float] = None,
+	) -> Optional[bytes]:
+		if key in self.pending and self.flushed is not None:
+			# batched write of key must be stored before it is read
+			await asyncio.shield(self.flushed)
+
+		async with get_redis().pipeline(transaction=True) as pipe:
+			while True:
+				try:
+					# any write of registry by other process retries transaction
+					await pipe.watch(self.hash, self.expires)
+					raw = await pipe.hget(self.hash, key)
+					expires_at = await pipe.zscore(self.expires, key)
+
+					if expires_at is not None and expires_at <= time.time():
+						raw = None
+
+					changed = func(raw)
+
+					if changed is None:
+						await pipe.unwatch()
+						break
+
+					pipe.multi()
+					pipe.hset(self.hash, key, changed)
+
+					if ttl:
+						pipe.zadd(self.expires, {key: time.time() + ttl})
+					else:
+						pipe.zrem(self.expires, key)
+
+					await pipe.execute()
+					raw = changed
+					break
+				except WatchError:
+					continue
+
+		self._remember(key, raw)
+
+		return raw
+
+	async def keys(self) -> List[str]:
+		async with get_redis().pipeline(transaction=False) as pipe:
+			pipe.hkeys(self.hash)
+			pipe.zrangebyscore(self.expires, '-inf', time.time())
+			keys, expired = await pipe.execute()
+
+		expired = set(expired)
+
+		return [key.decode() for key in keys if key not in expired]
+
+	async def purge(self) -> int:
+		redis = get_redis()
+		expired = await redis.zrangebyscore(self.expires, '-inf', time.time())
+
+		if not expired:
+			return 0
+
+		async with redis.pipeline(transaction=False) as pipe:
+			pipe.hdel(self.hash, *expired)
+			pipe.zrem(self.expires, *expired)
+			await pipe.execute()
+
+		return len(expired)
+
+
+class SharedDict:
+	"""
+	This class describes registry of module-level state (users, withdrawals,
+	achievements) which survives restarts and is shared between workers
+	and replicas.
+
+	Values are JSON encoded, so registry returns copies: changed value must
+	be set back. Keys are strings. Store is chosen by STORAGE.BACKEND:
+	memory (process dict, shared by workers in sharded mode) or redis.
+	"""
+
+	instances: ClassVar[Dict[str, 'SharedDict']] = {}
+
+	def __init__(self, name: str, ttl: Optional[float] = None):
+		"""
+		Constructs a new instance.
+
+		:param		name:  The unique name of registry
+		:type		name:  str
+		:param		ttl:   The seconds values are kept, forever by default
+		:type		ttl:   Optional[float]
+		"""
+		self.name = name
+		self.ttl = ttl
+		self.store = (
+			RedisStore(name) if config.storage.BACKEND == 'redis' else MemoryStore()
+		)
+		SharedDict.instances[name] = self
+
+	async def get(self, key: Any, default: Any = None, fresh: bool = False) -> Any:
+		"""
+		Get value
+
+		:param		key:	  The key
+		:type		key:	  Any
+		:param		default:  The default value
+		:type		default:  Any
+		:param		fresh:	  Skip reads cache of redis store (values may be
+							  STORAGE.CACHE_TTL seconds old)
+		:type		fresh:	  bool
+
+		:returns:	value or default if key is missing
+		:rtype:		Any
+		"""
+		raw = await self.store.get(str(key), fresh)
+
+		return default if raw is None else loads(raw)
+
+	async def set(self, key: Any, value: Any, ttl: Optional[float] = None):
+		"""
+		Set value
+
+		:param		key:	The key
+		:type		key:	Any
+		:param		value:	The value
+		:type		value:	Any
+		:param		ttl:	The seconds value is kept, registry TTL by default
+		:type		ttl:	Optional[float]
+		"""
+		await self.store.set(str(key), dumps_bytes(value), ttl or self.ttl)
+
+	async def update(self, key: Any, **fields: Any) -> Dict[str, Any]:
+		"""
+		Set fields of dict value (missing value is empty dict) atomically, so
+		concurrent updates of other fields by workers are not lost
+
+		:param		key:	 The key
+		:type		key:	 Any
+		:param		fields:	 The fields
+		:type		fields:	 dict
+
+		:returns:	new value
+		:rtype:		Dict[str, Any]
+		"""
+
+		def merge(raw: Optional[bytes]) -> bytes:
+			value = loads(raw) if raw is not None else {}
+
+			return dumps_bytes({**value, **fields})
+
+		return loads(await self.store.modify(str(key), merge, self.ttl))
+
+	async def claim(self, key: Any, value: Any = True) -> bool:
+		"""
+		Set value if key is missing atomically, so only one of workers
+		claiming key at once gets it
+
+		:param		key:	The key
+		:type		key:	Any
+		:param		value:	The value
+		:type		value:	Any
+
+		:returns:	True if key was claimed, False if it already exists
+		:rtype:		bool
+		"""
+		claimed = False
+
+		def take(raw: Optional[bytes]) -> Optional[bytes]:
+			nonlocal claimed
+			# redis transaction may be retried, only the last call counts
+			claimed = raw is None
+
+			return dumps_bytes(value) if claimed else None
+
+		await self.store.modify(str(key), take, self.ttl)
+
+		return claimed
+
+	async def delete(self, key: Any):
+		"""
+		Delete value
+
+		:param		key:  The key
+		:type		key:  Any
+		"""
+		await self.store.delete(str(key))
+
+	async def incr(self, key: Any, amount: int = 1) -> int:
+		"""
+		Add amount to integer value (missing value is 0) atomically, so
+		concurrent increments of workers are not lost. Value is kept
+		without expiration.
+
+		:param		key:	 The key
+		:type		key:	 Any
+		:param		amount:	 The amount, negative to decrement
+		:type		amount:	 int
+
+		:returns:	new value
+		:rtype:		int
+		"""
+		return await self.store.incr(str(key), amount)
+
+	async def keys(self) -> List[str]:
+		"""
+		Get keys of values which are not expired
+
+		:returns:	keys
+		:rtype:		List[str]
+		"""
+		return await self.store.keys()
+
+	@staticmethod
+	def attach(stores: Dict[str, Any], lock: Any = None):
+		"""
+		Replace items of memory stores by name (manager dicts in workers)
+
+		:param		stores:	 The dicts by registry name
+		:type		stores:	 Dict[str, Any]
+		:param		lock:	 The lock of increments and modifications
+							 (manager lock)
+		:type		lock:	 Any
+		"""
+		for name, items in stores.items():
+			SharedDict.instances[name].store = MemoryStore(items, lock)
+
+	@staticmethod
+	async def purge_all():
+		"""
+		Delete expired values of all registries
+		"""
+		for registry in SharedDict.instances.values():
+			try:
+				count = await registry.store.purge()
+			except Exception as ex:
+				logger.error(f'[storage] {registry.name} purge error: {ex}')
+				continue
+
+			if count:
+				logger.info(f'[storage] {registry.name}: {count} expired values purged')
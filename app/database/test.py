@@ -1 +1,5 @@
-users = {}
+from app.database.shared import SharedDict
+
+users = SharedDict('users')
+loaded_achievements = SharedDict('loaded_achievements')
+user_achievements = SharedDict('user_achievements')
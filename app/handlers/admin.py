@@ -2,71 +2,114 @@ import random
 import string
 from collections import Counter
 from datetime import datetime, timedelta
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, Optional
 
-import pandas as pd
 from aiogram import F, Router
 from aiogram.enums import ParseMode
+from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import CallbackQuery, FSInputFile, Message
-from dateutil.relativedelta import relativedelta
 from loguru import logger
 
 import app.keyboards.admin_inline as inline
 from app.api import APIRequest
+from app.database.data import (
+	delete_promocode,
+	deleted_promocodes,
+	get_promocode,
+	get_promocodes,
+	get_topworkers,
+	save_data,
+	set_promocode,
+	topworkers,
+)
 from app.loader import (
-	bot,
+	config,
 	convert_to_human,
 	humanize_place,
 	humanize_promocode_type,
-	save_data,
-	sinwin_data,
 )
+from app.utils.excel import export_excel_file, iterate_in_thread
+from app.utils.metrics import api_summary
+from app.utils.sender import sender
+from app.utils.stats import StatsSnapshot, collect_stats, find_referals
+from app.utils.statscache import StatsCache
 
-admin_router = Router()
+admin_router = Router(name='admin')
 
-deleted_promocodes = {}
+PARTNERS_PAGE_SIZE = 30
 
 
-def generate_random_promocode() -> str:
+async def generate_random_promocode() -> str:
 	length = 16
 	characters = string.ascii_letters + string.digits  # Содержит буквы и цифры
 	promocode = ''.join(random.choice(characters) for _ in range(length))
 
-	while promocode in sinwin_data['promocodes']:
+	while await get_promocode(promocode) is not None:
 		promocode = ''.join(random.choice(characters) for _ in range(length))
 
 	return promocode
 
 
-def generate_excel_file(data: List[Dict[str, Any]]):
-	df = pd.DataFrame.from_dict(data)
-
-	# Сохраняем DataFrame в Excel-файл
-	file_name = f'{datetime.now().strftime("%Y%m%d")}_output.xlsx'
-	df.to_excel(file_name, index=False)
-
-	with pd.ExcelWriter(file_name, engine='openpyxl') as writer:
-		df.to_excel(writer, index=False, sheet_name='Partners')
-		ws = writer.sheets['Partners']
-
-		for word in list('CDEFGHIJKLMNOPQRSTUVWXYZ'):
-			ws.column_dimensions[word].width = 15
+def partners_excel_rows(
+	partners: Iterable[Dict[str, Any]], snapshot: StatsSnapshot
+) -> Iterator[Dict[str, str]]:
+	"""
+	Build rows of partners excel file one by one
 
-		ws.column_dimensions['B'].width = 30
-		ws.column_dimensions['AA'].width = 20
-		ws.column_dimensions['AB'].width = 20
-		ws.column_dimensions['AC'].width = 20
-		ws.column_dimensions['AD'].width = 20
-		ws.column_dimensions['AE'].width = 20
-		ws.column_dimensions['AF'].width = 20
-		ws.column_dimensions['AG'].width = 20
-		ws.column_dimensions['AH'].width = 20
-		ws.column_dimensions['AI'].width = 20
+	:param		partners:  The partners
+	:type		partners:  Iterable[Dict[str, Any]]
+	:param		snapshot:  The stats snapshot
+	:type		snapshot:  StatsSnapshot
 
-		writer.book.save(file_name)
-	return file_name
+	:returns:	rows iterator
+	:rtype:		Iterator[Dict[str, str]]
+	"""
+	for partner in partners:
+		summary = snapshot.summary(partner['partner_hash'])
+
+		yield {
+			'id': str(partner['id']),
+			'partner_hash': str(partner['partner_hash']),
+			'api_count': str(summary['api_count']),
+			'today_firstdeps': str(summary['today_firstdeps']),
+			'yesterday_firstdeps': str(summary['yesterday_firstdeps']),
+			'last_week_firstdeps': str(summary['last_week_firstdeps']),
+			'last_month_firstdeps': str(summary['last_month_firstdeps']),
+			'today_deps': str(summary['today_deps']),
+			'yesterday_deps': str(summary['yesterday_deps']),
+			'last_week_deps': str(summary['last_week_deps']),
+			'last_month_deps': str(summary['last_month_deps']),
+			'alltime_deps': str(summary['alltime_deps']),
+			'alltime_firstdeps': str(summary['alltime_firstdeps']),
+			'today_income': str(summary['today_income']),
+			'yesterday_income': str(summary['yesterday_income']),
+			'last_week_income': str(summary['last_week_income']),
+			'last_month_income': str(summary['last_month_income']),
+			'alltime_income': str(summary['alltime_income']),
+			'signals_gens': str(summary['signals_gens']),
+			'tg_id': str(partner['tg_id']),
+			'username': str(partner['username']),
+			'status': str(partner['status']),
+			'additional_percent': str(partner['additional_percent']),
+			'register_date': str(partner['register_date']),
+			'referals_count': str(partner['referals_count']),
+			'ref_income': str(partner['ref_income']),
+			'age': str(partner['ref_income']),
+			'referrer_hash': str(partner['ref_income']),
+			'approved': str(partner['ref_income']),
+			'is_referal': str(partner['is_referal']),
+			'arbitration_experience': str(partner['arbitration_experience']),
+			'fullname': str(partner['fullname']),
+			'number_phone': str(partner['number_phone']),
+			'experience_time': str(partner['experience_time']),
+			'balance': str(partner['balance']),
+			'showed_percent': str(partner['showed_percent']),
+			'is_freezed': str(partner['is_freezed']),
+			'last_withdraw_date': str(partner['last_withdraw_date']),
+			'total_income': str(partner['total_income']),
+		}
 
 
 class CreateRublesPromocodeGroup(StatesGroup):
@@ -153,77 +196,6 @@ def get_percent_by_status(status: str) -> float:
 			return 35
 
 
-async def collect_stats(opts: dict):
-	result, status = await APIRequest.post('/user/find', {'opts': opts})
-
-	# if opts.get('game', False):
-	# result_incomes, status2 = await APIRequest.get(f"/base/incomes?game={opts['game']}")
-	# incomes = result_incomes["income_stat"]
-	# postbacks = result_incomes["postbacks_stat"]
-
-	today = datetime.now().date()
-	yesterday = today - timedelta(days=1)
-	last_week_start = today - timedelta(days=today.weekday() + 7)
-	last_week_end = last_week_start + timedelta(days=6)
-	last_month_start = today - relativedelta(months=1)
-	last_month_end = last_month_start + relativedelta(day=31)
-
-	users = result['users']
-
-	users_count = len(users)
-	users_income = sum([user['income'] for user in users])
-	users_notreg_count = len([user for user in users if not user['approved']])
-	users_nottopup_count = len(
-		[user for user in users if user['balance'] < 500.0 and user['approved']]
-	)
-	users_gamed_count = len(
-		[user for user in users if user['balance'] > 500.0 and user['approved']]
-	)
-
-	users_today = [
-		user
-		for user in users
-		if datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date() == today
-	]
-	users_yesterday = [
-		user
-		for user in users
-		if datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date()
-		== yesterday
-	]
-	users_lastweek = [
-		user
-		for user in users
-		if last_week_start
-		<= datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date()
-		<= last_week_end
-	]
-	users_month = [
-		user
-		for user in users
-		if last_month_start
-		<= datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date()
-		<= last_month_end
-	]
-
-	users_today = len(users_today)
-	users_yesterday = len(users_yesterday)
-	users_lastweek = len(users_lastweek)
-	users_month = len(users_month)
-
-	return {
-		'users_count': users_count,
-		'users_today': users_today,
-		'users_yesterday': users_yesterday,
-		'users_lastweek': users_lastweek,
-		'users_month': users_month,
-		'users_notreg_count': users_notreg_count,
-		'users_nottopup_count': users_nottopup_count,
-		'users_gamed_count': users_gamed_count,
-		'users_income': users_income,
-	}
-
-
 @admin_router.callback_query(F.data.startswith('admin_info_by_user'))
 async def admin_info_by_user(call: CallbackQuery):
 	partner_hash = call.data.replace('admin_info_by_user', '')
@@ -244,9 +216,7 @@ async def admin_info_by_user(call: CallbackQuery):
 	difference = cur_date - reg_date
 	days_difference = max(difference.days, 1)
 
-	cpartners = await APIRequest.post(
-		'/partner/find', {'opts': {'referrer_hash': partner['partner_hash']}}
-	)
+	cpartners = await find_referals(partner['partner_hash'])
 	cpartners = cpartners[0]['partners']
 
 	cpartners_items = []
@@ -282,148 +252,9 @@ async def admin_info_by_user(call: CallbackQuery):
 
 	data = await collect_stats(opts)
 
-	result, code = await APIRequest.get('/base/stats')
-	stats = result['data']
-
-	api_count = result['api_count'].get(partner['partner_hash'], 0)
-
-	today_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['today']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	today_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['today']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['today']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	yesterday_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	last_week_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_week']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_month']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	today_income = sum(
-		[
-			dep['x']
-			for dep in stats['today']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_income = sum(
-		[
-			dep['x']
-			for dep in stats['yesterday']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_week']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_month']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-	other_dates_firstdep = [info for name, info in stats.items() if name == 'firstdep']
-	others_firstdep = len(
-		[
-			dep['x']
-			for dep in other_dates_firstdep
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
-	alltime_firstdeps = (
-		others_firstdep
-		+ today_firstdeps
-		+ yesterday_firstdeps
-		+ last_week_firstdeps
-		+ last_month_firstdeps
-	)
-	alltime_income = (
-		today_income + yesterday_income + last_week_income + last_month_income
-	)
-
-	signals_gens = sum(
-		[info[partner['partner_hash']] for _, info in result['signals'].items()]
-	)
+	summary = snapshot.summary(partner['partner_hash'])
 
 	showed_percent = (
 		partner['showed_percent']
@@ -458,12 +289,12 @@ async def admin_info_by_user(call: CallbackQuery):
 {transactions_items}
 
 Всего пользователей: {data['users_count']}
-├ Депозиты за все время: {alltime_deps}
-├ Доход за все время: {alltime_income}
+├ Депозиты за все время: {summary['alltime_deps']}
+├ Доход за все время: {summary['alltime_income']}
 
-Первые депозиты за все время: {alltime_firstdeps}
-├ Api за все время: {api_count}
-└ Сгенерировано сигналов: {signals_gens}
+Первые депозиты за все время: {summary['alltime_firstdeps']}
+├ Api за все время: {summary['api_count']}
+└ Сгенерировано сигналов: {summary['signals_gens']}
 
 ┌ Пользователей на этапе регистрации: {data['users_notreg_count']}
 ├ Пользователей на этапе пополнения: {data['users_nottopup_count']}
@@ -474,20 +305,20 @@ async def admin_info_by_user(call: CallbackQuery):
 ├ Пользователей за неделю: {data['users_lastweek']}
 └ Пользователей за месяц: {data['users_month']}
 
-Сумма депозитов за сегодня: {today_deps}
-├ Сумма депозитов за вчера: {yesterday_deps}
-├ Сумма депозитов за неделю: {last_week_deps}
-└ Сумма депозитов за месяц: {last_month_deps}
+Сумма депозитов за сегодня: {summary['today_deps']}
+├ Сумма депозитов за вчера: {summary['yesterday_deps']}
+├ Сумма депозитов за неделю: {summary['last_week_deps']}
+└ Сумма депозитов за месяц: {summary['last_month_deps']}
 
-Первые депозиты за сегодня: {today_firstdeps}
-├ Первые депозиты за вчера: {yesterday_firstdeps}
-├ Первые депозиты за неделю: {last_week_firstdeps}
-└ Первые депозиты за месяц: {last_month_firstdeps}
+Первые депозиты за сегодня: {summary['today_firstdeps']}
+├ Первые депозиты за вчера: {summary['yesterday_firstdeps']}
+├ Первые депозиты за неделю: {summary['last_week_firstdeps']}
+└ Первые депозиты за месяц: {summary['last_month_firstdeps']}
 
-Доход за сегодня: {today_income}
-├ Доход за вчера: {yesterday_income}
-├ Доход за неделю: {last_week_income}
-└ Доход за месяц: {last_month_income}
+Доход за сегодня: {summary['today_income']}
+├ Доход за вчера: {summary['yesterday_income']}
+├ Доход за неделю: {summary['last_week_income']}
+└ Доход за месяц: {summary['last_month_income']}
 """,
 		reply_markup=inline.create_partner_interactions_markup(partner['partner_hash']),
 	)
@@ -549,9 +380,7 @@ async def get_partner_by_key_message(message: Message, state: FSMContext):
 	difference = cur_date - reg_date
 	days_difference = max(difference.days, 1)
 
-	cpartners = await APIRequest.post(
-		'/partner/find', {'opts': {'referrer_hash': partner['partner_hash']}}
-	)
+	cpartners = await find_referals(partner['partner_hash'])
 	cpartners = cpartners[0]['partners']
 
 	cpartners_items = []
@@ -587,148 +416,9 @@ async def get_partner_by_key_message(message: Message, state: FSMContext):
 
 	data = await collect_stats(opts)
 
-	result, code = await APIRequest.get('/base/stats')
-	stats = result['data']
-
-	api_count = result['api_count'].get(partner['partner_hash'], 0)
-
-	today_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['today']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	today_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['today']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['today']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	yesterday_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	last_week_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_week']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_month']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	today_income = sum(
-		[
-			dep['x']
-			for dep in stats['today']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_income = sum(
-		[
-			dep['x']
-			for dep in stats['yesterday']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_week']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_month']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-	other_dates_firstdep = [info for name, info in stats.items() if name == 'firstdep']
-	others_firstdep = len(
-		[
-			dep['x']
-			for dep in other_dates_firstdep
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	alltime_firstdeps = (
-		others_firstdep
-		+ today_firstdeps
-		+ yesterday_firstdeps
-		+ last_week_firstdeps
-		+ last_month_firstdeps
-	)
-	alltime_income = (
-		today_income + yesterday_income + last_week_income + last_month_income
-	)
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
-	signals_gens = sum(
-		[info[partner['partner_hash']] for _, info in result['signals'].items()]
-	)
+	summary = snapshot.summary(partner['partner_hash'])
 
 	showed_percent = (
 		partner['showed_percent']
@@ -763,12 +453,12 @@ async def get_partner_by_key_message(message: Message, state: FSMContext):
 {transactions_items}
 
 Всего пользователей: {data['users_count']}
-├ Депозиты за все время: {alltime_deps}
-├ Доход за все время: {alltime_income}
+├ Депозиты за все время: {summary['alltime_deps']}
+├ Доход за все время: {summary['alltime_income']}
 
-Первые депозиты за все время: {alltime_firstdeps}
-├ Api за все время: {api_count}
-└ Сгенерировано сигналов: {signals_gens}
+Первые депозиты за все время: {summary['alltime_firstdeps']}
+├ Api за все время: {summary['api_count']}
+└ Сгенерировано сигналов: {summary['signals_gens']}
 
 ┌ Пользователей на этапе регистрации: {data['users_notreg_count']}
 ├ Пользователей на этапе пополнения: {data['users_nottopup_count']}
@@ -779,20 +469,20 @@ async def get_partner_by_key_message(message: Message, state: FSMContext):
 ├ Пользователей за неделю: {data['users_lastweek']}
 └ Пользователей за месяц: {data['users_month']}
 
-Сумма депозитов за сегодня: {today_deps}
-├ Сумма депозитов за вчера: {yesterday_deps}
-├ Сумма депозитов за неделю: {last_week_deps}
-└ Сумма депозитов за месяц: {last_month_deps}
+Сумма депозитов за сегодня: {summary['today_deps']}
+├ Сумма депозитов за вчера: {summary['yesterday_deps']}
+├ Сумма депозитов за неделю: {summary['last_week_deps']}
+└ Сумма депозитов за месяц: {summary['last_month_deps']}
 
-Первые депозиты за сегодня: {today_firstdeps}
-├ Первые депозиты за вчера: {yesterday_firstdeps}
-├ Первые депозиты за неделю: {last_week_firstdeps}
-└ Первые депозиты за месяц: {last_month_firstdeps}
+Первые депозиты за сегодня: {summary['today_firstdeps']}
+├ Первые депозиты за вчера: {summary['yesterday_firstdeps']}
+├ Первые депозиты за неделю: {summary['last_week_firstdeps']}
+└ Первые депозиты за месяц: {summary['last_month_firstdeps']}
 
-Доход за сегодня: {today_income}
-├ Доход за вчера: {yesterday_income}
-├ Доход за неделю: {last_week_income}
-└ Доход за месяц: {last_month_income}
+Доход за сегодня: {summary['today_income']}
+├ Доход за вчера: {summary['yesterday_income']}
+├ Доход за неделю: {summary['last_week_income']}
+└ Доход за месяц: {summary['last_month_income']}
 """,
 		reply_markup=inline.create_partner_interactions_markup(partner['partner_hash']),
 	)
@@ -877,7 +567,7 @@ async def admin_percent_income_disapprove_callback(
 	percent = data['new_percent']
 
 	partners, result = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners['partners'][-1]
 
@@ -925,7 +615,7 @@ async def admin_percent_income_approve_callback(call: CallbackQuery, state: FSMC
 	percent = data['new_percent']
 
 	partners, result = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners['partners'][-1]
 
@@ -978,7 +668,7 @@ async def admin_set_status_callback(call: CallbackQuery):
 	partner_hash = data.replace('admin_set_status_', '')
 
 	partners, code = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners['partners'][-1]
 
@@ -1044,7 +734,7 @@ async def admin_freeze_partner_callback(call: CallbackQuery, state: FSMContext):
 	partner_hash = call.data.replace('admin_freeze_partner_', '')
 
 	partners, code = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners['partners'][-1]
 
@@ -1090,7 +780,7 @@ async def admin_defreeze_partner_callback(call: CallbackQuery, state: FSMContext
 	partner_hash = call.data.replace('admin_defreeze_partner_', '')
 
 	partners, code = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners['partners'][-1]
 
@@ -1182,7 +872,7 @@ async def admin_totally_change_balance_callback(call: CallbackQuery):
 	new_balance = call.data.split('.')[-1]
 	partner_hash = call.data.split('.')[0].replace('admin_totally_change_balance_', '')
 	partners, code = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners['partners'][-1]
 
@@ -1250,7 +940,7 @@ async def admin_totally_block_callback(call: CallbackQuery):
 	partner_hash = call.data.replace('admin_totally_block_', '')
 
 	partners, code = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners['partners'][-1]
 
@@ -1287,7 +977,7 @@ async def admin_totally_unblock__callback(call: CallbackQuery):
 	partner_hash = call.data.replace('admin_totally_unblock_', '')
 
 	partners, code = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners['partners'][-1]
 
@@ -1362,7 +1052,7 @@ async def set_withdraw_period_callback(call: CallbackQuery):
 		period_timedelta = timedelta(days=3)
 
 	partners, code = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners['partners'][-1]
 
@@ -1394,7 +1084,7 @@ async def set_withdraw_period_callback(call: CallbackQuery):
 		reply_markup=inline.create_admin_give_withdraw_callback_back(partner_hash),
 	)
 
-	await bot.send_message(
+	await sender.send_message(
 		chat_id=partner['tg_id'],
 		text=f'Вам доступен вывод средств в течение {period}',
 		reply_markup=inline.create_profile_partner_markup(),
@@ -1589,17 +1279,18 @@ async def change_links_in_bot_by_name(call: CallbackQuery):
 	)
 
 
-@admin_router.callback_query(F.data == 'admin_all_partners_1win')
+@admin_router.callback_query(F.data.startswith('admin_all_partners_1win'))
 async def admin_all_partners_1win_callback(call: CallbackQuery):
-	partners, result = await APIRequest.post('/partner/get', {'index': None})
+	offset = call.data.replace('admin_all_partners_1win', '').lstrip('_')
+	offset = int(offset) if offset.isdigit() else 0
 
-	partners = partners['partners']
+	partners, has_next = await APIRequest.get_partners_page(offset, PARTNERS_PAGE_SIZE)
 
 	partners_message = []
 	total_balance = 0
 	approved_partners = 0
 
-	for i, partner in enumerate(partners):
+	for i, partner in enumerate(partners, start=offset):
 		partners_message.append(
 			f'{i + 1}) {partner["tg_id"]}:{partner["username"]}:{partner["partner_hash"]}:{partner["status"]}:{partner["balance"]}'
 		)
@@ -1610,188 +1301,52 @@ async def admin_all_partners_1win_callback(call: CallbackQuery):
 
 	partners_message = '\n'.join(partners_message)
 
-	(
-		await call.message.edit_text(
-			f"""
-Количество партнеров: {approved_partners}
-
-Баланс всех пользователей: {total_balance}
-
-tg_id:Ник:Хеш:Статус:Баланс
-{partners_message}
-""",
-			reply_markup=inline.admin_send_partners_excel(),
-		),
-	)
-
-
-@admin_router.callback_query(F.data.startswith('admin_get_info_by_partner_mines_'))
-async def admin_get_info_by_partner_mines_callback(call: CallbackQuery):
-	partner_hash = call.data.replace('admin_get_info_by_partner_mines_', '')
-
-	partners, result = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
-	)
-	partners = partners['partners']
-
-	partner = partners[-1]
-
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
-
-	opts = {'game': 'Mines', 'referal_parent': partner['partner_hash']}
-
-	data = await collect_stats(opts)
-
-	api_count = result['api_count'].get(partner['partner_hash'], 0)
-
-	today_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['today']['firstdep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	today_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['today']['firstdep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['today']['dep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['dep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['last_week']['dep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['last_month']['dep']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	today_income = sum(
-		[
-			dep['x']
-			for dep in stats['today']['income']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_income = sum(
-		[
-			dep['x']
-			for dep in stats['yesterday']['income']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_week']['income']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_month']['income']
-			if dep['game'] == 'Mines' and dep['partner_hash'] == partner['partner_hash']
-		]
-	)
+	await call.message.edit_text(
+		f"""
+Партнеры {offset + 1}-{offset + len(partners)}
 
-	alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-	other_dates_firstdep = [info for name, info in stats.items() if name == 'firstdep']
-	others_firstdep = len(
-		[
-			dep['x']
-			for dep in other_dates_firstdep
-			if dep['partner_hash'] == partner['partner_hash'] and dep['game'] == 'Mines'
-		]
-	)
+Количество партнеров на странице: {approved_partners}
 
-	alltime_firstdeps = (
-		others_firstdep
-		+ today_firstdeps
-		+ yesterday_firstdeps
-		+ last_week_firstdeps
-		+ last_month_firstdeps
-	)
-	alltime_income = (
-		today_income + yesterday_income + last_week_income + last_month_income
+Баланс пользователей на странице: {total_balance}
+
+tg_id:Ник:Хеш:Статус:Баланс
+{partners_message}
+""",
+		reply_markup=inline.admin_all_partners_markup(
+			offset, PARTNERS_PAGE_SIZE, has_next
+		),
 	)
 
-	signals_gens = sum(
-		[info[partner['partner_hash']] for _, info in result['signals'].items()]
+
+@admin_router.callback_query(F.data.startswith('admin_get_info_by_partner_mines_'))
+async def admin_get_info_by_partner_mines_callback(call: CallbackQuery):
+	partner_hash = call.data.replace('admin_get_info_by_partner_mines_', '')
+
+	partners, result = await APIRequest.post(
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}
 	)
+	partners = partners['partners']
+
+	partner = partners[-1]
+
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
+
+	opts = {'game': 'Mines', 'referal_parent': partner['partner_hash']}
+
+	data = await collect_stats(opts)
+
+	summary = snapshot.summary(partner['partner_hash'], 'Mines')
 
 	messages = [
 		'<b>💣️ СТАТИСТИКА ПО MINES</b>',
 		'<code>Пользователи которые запустили бота по вашим ссылкам</code>\n',
 		f'💰️ Баланс: {partner["balance"]} RUB\n',
 		f'Всего пользователей: {data["users_count"]}',
-		f'Депозиты за все время: {alltime_deps}',
-		f'Доход за все время: {alltime_income}',
-		f'Первые депозиты за все время: {alltime_firstdeps}',
-		f'API за все время: {api_count}',
-		f'Сгенерировано сигналов: {signals_gens}\n',
+		f'Депозиты за все время: {summary["alltime_deps"]}',
+		f'Доход за все время: {summary["alltime_income"]}',
+		f'Первые депозиты за все время: {summary["alltime_firstdeps"]}',
+		f'API за все время: {summary["api_count"]}',
+		f'Сгенерировано сигналов: {summary["signals_gens"]}\n',
 		f'Пользователей на этапе регистрации: {data["users_notreg_count"]}',
 		f'Пользователей на этапе пополнения: {data["users_nottopup_count"]}',
 		f'Пользователей на этапе игры: {data["users_gamed_count"]}\n',
@@ -1799,18 +1354,18 @@ async def admin_get_info_by_partner_mines_callback(call: CallbackQuery):
 		f'├ Пользователей за вчера: {data["users_yesterday"]}',
 		f'├ Пользователей за неделю: {data["users_lastweek"]}',
 		f'└ Пользователей за месяц: {data["users_month"]}\n',
-		f'Сумма депозитов за сегодня: {today_deps}',
-		f'├ Сумма депозитов за вчера: {yesterday_deps}',
-		f'├ Сумма депозитов за неделю: {last_week_deps}',
-		f'└ Сумма депозитов за месяц: {last_month_deps}\n',
-		f'Первые депозиты за сегодня: {today_firstdeps}',
-		f'├ Первые депозиты за вчера: {yesterday_firstdeps}',
-		f'├ Первые депозиты за неделю: {last_week_firstdeps}',
-		f'└ Первые депозиты за месяц: {last_month_firstdeps}\n',
-		f'Доход за сегодня: {today_income}',
-		f'├ Доход за вчера: {yesterday_income}',
-		f'├ Доход за неделю: {last_week_income}',
-		f'└ Доход за месяц: {last_month_income}',
+		f'Сумма депозитов за сегодня: {summary["today_deps"]}',
+		f'├ Сумма депозитов за вчера: {summary["yesterday_deps"]}',
+		f'├ Сумма депозитов за неделю: {summary["last_week_deps"]}',
+		f'└ Сумма депозитов за месяц: {summary["last_month_deps"]}\n',
+		f'Первые депозиты за сегодня: {summary["today_firstdeps"]}',
+		f'├ Первые депозиты за вчера: {summary["yesterday_firstdeps"]}',
+		f'├ Первые депозиты за неделю: {summary["last_week_firstdeps"]}',
+		f'└ Первые депозиты за месяц: {summary["last_month_firstdeps"]}\n',
+		f'Доход за сегодня: {summary["today_income"]}',
+		f'├ Доход за вчера: {summary["yesterday_income"]}',
+		f'├ Доход за неделю: {summary["last_week_income"]}',
+		f'└ Доход за месяц: {summary["last_month_income"]}',
 	]
 
 	await call.message.edit_text(
@@ -1827,203 +1382,25 @@ async def send_partners_excel_callback(call: CallbackQuery):
 		reply_markup=inline.create_back_markup('adminpanel'),
 	)
 
-	partners, result = await APIRequest.post('/partner/get', {'index': -1})
-	partners = partners['partners']
-
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
-
-	result_data = []
-
-	for i, partner in enumerate(partners):
-		api_count = result['api_count'].get(partner['partner_hash'], 0)
-
-		today_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		yesterday_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_week_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		today_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['today']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		yesterday_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		last_week_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		today_income = sum(
-			[
-				dep['x']
-				for dep in stats['today']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		yesterday_income = sum(
-			[
-				dep['x']
-				for dep in stats['yesterday']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_week_income = sum(
-			[
-				dep['x']
-				for dep in stats['last_week']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_income = sum(
-			[
-				dep['x']
-				for dep in stats['last_month']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-		other_dates_firstdep = [
-			info for name, info in stats.items() if name == 'firstdep'
-		]
-		others_firstdep = len(
-			[
-				dep['x']
-				for dep in other_dates_firstdep
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		alltime_firstdeps = (
-			others_firstdep
-			+ today_firstdeps
-			+ yesterday_firstdeps
-			+ last_week_firstdeps
-			+ last_month_firstdeps
-		)
-		alltime_income = (
-			today_income + yesterday_income + last_week_income + last_month_income
-		)
-
-		signals_gens = sum(
-			[info[partner['partner_hash']] for _, info in result['signals'].items()]
-		)
-
-		result_data.append(
-			{
-				'id': str(partner['id']),
-				'partner_hash': str(partner['partner_hash']),
-				'api_count': str(api_count),
-				'today_firstdeps': str(today_firstdeps),
-				'yesterday_firstdeps': str(yesterday_firstdeps),
-				'last_week_firstdeps': str(last_week_firstdeps),
-				'last_month_firstdeps': str(last_month_firstdeps),
-				'today_deps': str(today_deps),
-				'yesterday_deps': str(yesterday_deps),
-				'last_week_deps': str(last_week_deps),
-				'last_month_deps': str(last_month_deps),
-				'alltime_deps': str(alltime_deps),
-				'alltime_firstdeps': str(alltime_firstdeps),
-				'today_income': str(today_income),
-				'yesterday_income': str(yesterday_income),
-				'last_week_income': str(last_week_income),
-				'last_month_income': str(last_month_income),
-				'alltime_income': str(alltime_income),
-				'signals_gens': str(signals_gens),
-				'tg_id': str(partner['tg_id']),
-				'username': str(partner['username']),
-				'status': str(partner['status']),
-				'additional_percent': str(partner['additional_percent']),
-				'register_date': str(partner['register_date']),
-				'referals_count': str(partner['referals_count']),
-				'ref_income': str(partner['ref_income']),
-				'age': str(partner['ref_income']),
-				'referrer_hash': str(partner['ref_income']),
-				'approved': str(partner['ref_income']),
-				'is_referal': str(partner['is_referal']),
-				'arbitration_experience': str(partner['arbitration_experience']),
-				'fullname': str(partner['fullname']),
-				'number_phone': str(partner['number_phone']),
-				'experience_time': str(partner['experience_time']),
-				'balance': str(partner['balance']),
-				'showed_percent': str(partner['showed_percent']),
-				'is_freezed': str(partner['is_freezed']),
-				'last_withdraw_date': str(partner['last_withdraw_date']),
-				'total_income': str(partner['total_income']),
-			}
-		)
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
-	filename = generate_excel_file(result_data)
+	async def report(count: int, total: Optional[int]):
+		try:
+			await call.message.edit_text(
+				f'Формируем Excel-файл с информацией о партнерах: {count}',
+				reply_markup=inline.create_back_markup('adminpanel'),
+			)
+		except Exception:
+			pass
+
+	filename = await export_excel_file(
+		f'{datetime.now().strftime("%Y%m%d")}_output.xlsx',
+		partners_excel_rows(
+			iterate_in_thread(APIRequest.iter_partners(config.http.PAGE_SIZE)),
+			snapshot,
+		),
+		report=report,
+	)
 
 	efile = FSInputFile(path=filename)
 	await call.message.answer_document(
@@ -2040,70 +1417,23 @@ async def send_partners_excel_callback(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'admin_statistics')
 async def admin_statistics_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
 	data = await collect_stats({})
 
-	today_firstdeps = len([dep['amount'] for dep in stats['today']['firstdep']])
-	yesterday_firstdeps = len([dep['amount'] for dep in stats['yesterday']['firstdep']])
-	last_week_firstdeps = len([dep['amount'] for dep in stats['last_week']['firstdep']])
-	last_month_firstdeps = len(
-		[dep['amount'] for dep in stats['last_month']['firstdep']]
-	)
-
-	today_deps = sum([dep['amount'] for dep in stats['today']['dep']]) + sum(
-		[dep['amount'] for dep in stats['today']['firstdep']]
-	)
-	yesterday_deps = sum([dep['amount'] for dep in stats['yesterday']['dep']]) + sum(
-		[dep['amount'] for dep in stats['yesterday']['firstdep']]
-	)
-	last_week_deps = sum([dep['amount'] for dep in stats['last_week']['dep']]) + sum(
-		[dep['amount'] for dep in stats['last_week']['firstdep']]
-	)
-	last_month_deps = sum([dep['amount'] for dep in stats['last_month']['dep']]) + sum(
-		[dep['amount'] for dep in stats['last_month']['firstdep']]
-	)
-
-	today_income = sum([dep['income'] for dep in stats['today']['income']])
-	yesterday_income = sum([dep['income'] for dep in stats['yesterday']['income']])
-	last_week_income = sum([dep['income'] for dep in stats['last_week']['income']])
-	last_month_income = sum([dep['income'] for dep in stats['last_month']['income']])
-
-	alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-	other_dates_firstdep = [info for name, info in stats.items() if name == 'firstdep']
-	others_firstdep = len([dep['x'] for dep in other_dates_firstdep])
-
-	alltime_firstdeps = (
-		others_firstdep
-		+ today_firstdeps
-		+ yesterday_firstdeps
-		+ last_week_firstdeps
-		+ last_month_firstdeps
-	)
-	alltime_income = (
-		today_income + yesterday_income + last_week_income + last_month_income
-	)
+	summary = snapshot.summary(income_field='income')
 
 	balance, status_code = await APIRequest.get('/base/admin_balance')
 
-	signals_gens = [
-		[info[k] for k, _ in info.items()] for _, info in result['signals'].items()
-	]
-	signals_gens = sum(sum(x) for x in signals_gens)
-
-	api_count = sum([apinum for partnerhash, apinum in result['api_count'].items()])
-
 	messages = [
 		'<b>СТАТИСТИКА ПО ВСЕМ БОТАМ</b>\n',
 		f'💰️ Баланс: {balance["balance"]} RUB\n',
 		f'Всего пользователей: {data["users_count"]}',
-		f'Депозиты за все время: {alltime_deps}',
-		f'Доход за все время: {alltime_income}',
-		f'Первые депозиты за все время: {alltime_firstdeps}',
-		f'API за все время: {api_count}',
-		f'Сгенерировано сигналов: {signals_gens}\n',
+		f'Депозиты за все время: {summary["alltime_deps"]}',
+		f'Доход за все время: {summary["alltime_income"]}',
+		f'Первые депозиты за все время: {summary["alltime_firstdeps"]}',
+		f'API за все время: {summary["api_count"]}',
+		f'Сгенерировано сигналов: {summary["signals_gens"]}\n',
 		f'Пользователей на этапе регистрации: {data["users_notreg_count"]}',
 		f'Пользователей на этапе пополнения: {data["users_nottopup_count"]}',
 		f'Пользователей на этапе игры: {data["users_gamed_count"]}\n',
@@ -2111,18 +1441,18 @@ async def admin_statistics_callback(call: CallbackQuery):
 		f'├ Пользователей за вчера: {data["users_yesterday"]}',
 		f'├ Пользователей за неделю: {data["users_lastweek"]}',
 		f'└ Пользователей за месяц: {data["users_month"]}\n',
-		f'Сумма депозитов за сегодня: {today_deps}',
-		f'├ Сумма депозитов за вчера: {yesterday_deps}',
-		f'├ Сумма депозитов за неделю: {last_week_deps}',
-		f'└ Сумма депозитов за месяц: {last_month_deps}\n',
-		f'Первые депозиты за сегодня: {today_firstdeps}',
-		f'├ Первые депозиты за вчера: {yesterday_firstdeps}',
-		f'├ Первые депозиты за неделю: {last_week_firstdeps}',
-		f'└ Первые депозиты за месяц: {last_month_firstdeps}\n',
-		f'Доход за сегодня: {today_income}',
-		f'├ Доход за вчера: {yesterday_income}',
-		f'├ Доход за неделю: {last_week_income}',
-		f'└ Доход за месяц: {last_month_income}',
+		f'Сумма депозитов за сегодня: {summary["today_deps"]}',
+		f'├ Сумма депозитов за вчера: {summary["yesterday_deps"]}',
+		f'├ Сумма депозитов за неделю: {summary["last_week_deps"]}',
+		f'└ Сумма депозитов за месяц: {summary["last_month_deps"]}\n',
+		f'Первые депозиты за сегодня: {summary["today_firstdeps"]}',
+		f'├ Первые депозиты за вчера: {summary["yesterday_firstdeps"]}',
+		f'├ Первые депозиты за неделю: {summary["last_week_firstdeps"]}',
+		f'└ Первые депозиты за месяц: {summary["last_month_firstdeps"]}\n',
+		f'Доход за сегодня: {summary["today_income"]}',
+		f'├ Доход за вчера: {summary["yesterday_income"]}',
+		f'├ Доход за неделю: {summary["last_week_income"]}',
+		f'└ Доход за месяц: {summary["last_month_income"]}',
 	]
 
 	await call.message.edit_text('\n'.join(messages), parse_mode=ParseMode.HTML)
@@ -2198,7 +1528,7 @@ async def create_percent_promocode_state(message: Message, state: FSMContext):
 		await state.set_state(CreatePercentPromocodeGroup.promocode_name)
 		return
 
-	if data[0] in sinwin_data['promocodes']:
+	if await get_promocode(data[0]) is not None:
 		await message.answer(
 			'❌Такой промокод уже существует',
 			reply_markup=inline.create_back_markup('admin_promocodes'),
@@ -2231,7 +1561,7 @@ async def create_percent_promocode_state(message: Message, state: FSMContext):
 		return
 
 	if data[0] == 'Random':
-		name = generate_random_promocode()
+		name = await generate_random_promocode()
 	else:
 		name = data[0]
 
@@ -2244,9 +1574,8 @@ async def create_percent_promocode_state(message: Message, state: FSMContext):
 		'activations_left': int(data[2]),
 	}
 
-	sinwin_data['promocodes'][name] = promocode
-
-	save_data()
+	await set_promocode(name, promocode)
+	await save_data()
 
 	await message.answer(
 		f"""✅Промокод создан: {date.strftime('%d.%m.%Y %H:%M:%S')}
@@ -2327,7 +1656,7 @@ async def create_promocode_status_by_name(message: Message, state: FSMContext):
 		await state.set_state(CreateStatusPromocodeGroup.promocode_name)
 		return
 
-	if data[0] in sinwin_data['promocodes']:
+	if await get_promocode(data[0]) is not None:
 		await message.answer(
 			'❌Такой промокод уже существует',
 			reply_markup=inline.create_back_markup('admin_promocodes'),
@@ -2360,7 +1689,7 @@ async def create_promocode_status_by_name(message: Message, state: FSMContext):
 		return
 
 	if data[0] == 'Random':
-		name = generate_random_promocode()
+		name = await generate_random_promocode()
 	else:
 		name = data[0]
 
@@ -2377,9 +1706,8 @@ async def create_promocode_status_by_name(message: Message, state: FSMContext):
 		'activations_left': int(data[2]),
 	}
 
-	sinwin_data['promocodes'][name] = promocode
-
-	save_data()
+	await set_promocode(name, promocode)
+	await save_data()
 
 	await message.answer(
 		f"""✅Промокод создан: {date.strftime('%d.%m.%Y %H:%M:%S')}
@@ -2408,7 +1736,7 @@ async def create_promocode_rubles_by_name(message: Message, state: FSMContext):
 		await state.set_state(CreateRublesPromocodeGroup.promocode_name)
 		return
 
-	if data[0] in sinwin_data['promocodes']:
+	if await get_promocode(data[0]) is not None:
 		await message.answer(
 			'❌Такой промокод уже существует',
 			reply_markup=inline.create_back_markup('admin_promocodes'),
@@ -2433,7 +1761,7 @@ async def create_promocode_rubles_by_name(message: Message, state: FSMContext):
 		return
 
 	if data[0] == 'Random':
-		name = generate_random_promocode()
+		name = await generate_random_promocode()
 	else:
 		name = data[0]
 
@@ -2446,9 +1774,8 @@ async def create_promocode_rubles_by_name(message: Message, state: FSMContext):
 		'activations_left': int(data[2]),
 	}
 
-	sinwin_data['promocodes'][name] = promocode
-
-	save_data()
+	await set_promocode(name, promocode)
+	await save_data()
 
 	await message.answer(
 		f"""✅Промокод создан: {date.strftime('%d.%m.%Y %H:%M:%S')}
@@ -2468,12 +1795,17 @@ async def create_promocode_rubles_by_name(message: Message, state: FSMContext):
 async def reborn_promocode_by_name_callback(call: CallbackQuery):
 	promocode_name = call.data.split('_')[1]
 
-	promocode = deleted_promocodes.get(promocode_name, False)
-	date = promocode.get('date', datetime.now().strftime('%d.%m.%Y %H:%M:%S'))
+	promocode = await deleted_promocodes.get(promocode_name)
+
+	if not promocode:
+		await call.answer(f'Промокод "{promocode_name}" не найден')
+		return
 
-	sinwin_data['promocodes'][promocode_name] = promocode
+	date = promocode.get('date', datetime.now().strftime('%d.%m.%Y %H:%M:%S'))
 
-	save_data()
+	await set_promocode(promocode_name, promocode)
+	await deleted_promocodes.delete(promocode_name)
+	await save_data()
 
 	await call.message.edit_text(
 		f"""✅Промокод создан: {date}
@@ -2491,23 +1823,19 @@ async def reborn_promocode_by_name_callback(call: CallbackQuery):
 async def delete_promocode_by_name(call: CallbackQuery):
 	promocode_name = call.data.replace('delete_promocode_', '')
 
-	promocode = sinwin_data['promocodes'].get(promocode_name, False)
-
-	if not promocode:
-		await call.answer(f'Промокод "{promocode_name}" не найден')
-		return
-
 	try:
-		del sinwin_data['promocodes'][promocode_name]
+		promocode = await delete_promocode(promocode_name)
 	except Exception as ex:
 		await call.answer(
 			f'Ошибка при удалении промокода "{promocode_name}": {str(ex)}'
 		)
 		return
 
-	save_data()
+	if not promocode:
+		await call.answer(f'Промокод "{promocode_name}" не найден')
+		return
 
-	deleted_promocodes[promocode_name] = promocode
+	await save_data()
 
 	await call.message.answer(
 		f"""
@@ -2522,7 +1850,7 @@ async def delete_promocode_by_name(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'show_created_promocodes')
 async def show_created_promocodes_callback(call: CallbackQuery):
-	promocodes = sinwin_data['promocodes']
+	promocodes = await get_promocodes()
 
 	for promocode_name, promocode in promocodes.items():
 		await call.message.answer(
@@ -2546,7 +1874,7 @@ async def show_created_promocodes_callback(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'admin_statistics_panel_partners')
 async def admin_statistics_panel_partners_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats')
+	result, code = await StatsCache.get('/base/stats')
 
 	stats = result['data']
 
@@ -2725,71 +2053,24 @@ async def admin_statistics_panel_partners_callback(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'admin_statistics')
 async def admin_statistics_callback_panel(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
 	data = await collect_stats({})
 
-	today_firstdeps = len([dep['amount'] for dep in stats['today']['firstdep']])
-	yesterday_firstdeps = len([dep['amount'] for dep in stats['yesterday']['firstdep']])
-	last_week_firstdeps = len([dep['amount'] for dep in stats['last_week']['firstdep']])
-	last_month_firstdeps = len(
-		[dep['amount'] for dep in stats['last_month']['firstdep']]
-	)
-
-	today_deps = sum([dep['amount'] for dep in stats['today']['dep']]) + sum(
-		[dep['amount'] for dep in stats['today']['firstdep']]
-	)
-	yesterday_deps = sum([dep['amount'] for dep in stats['yesterday']['dep']]) + sum(
-		[dep['amount'] for dep in stats['yesterday']['firstdep']]
-	)
-	last_week_deps = sum([dep['amount'] for dep in stats['last_week']['dep']]) + sum(
-		[dep['amount'] for dep in stats['last_week']['firstdep']]
-	)
-	last_month_deps = sum([dep['amount'] for dep in stats['last_month']['dep']]) + sum(
-		[dep['amount'] for dep in stats['last_month']['firstdep']]
-	)
-
-	today_income = sum([dep['income'] for dep in stats['today']['income']])
-	yesterday_income = sum([dep['income'] for dep in stats['yesterday']['income']])
-	last_week_income = sum([dep['income'] for dep in stats['last_week']['income']])
-	last_month_income = sum([dep['income'] for dep in stats['last_month']['income']])
-
-	alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-	other_dates_firstdep = [info for name, info in stats.items() if name == 'firstdep']
-	others_firstdep = len([dep['x'] for dep in other_dates_firstdep])
-
-	alltime_firstdeps = (
-		others_firstdep
-		+ today_firstdeps
-		+ yesterday_firstdeps
-		+ last_week_firstdeps
-		+ last_month_firstdeps
-	)
-	alltime_income = (
-		today_income + yesterday_income + last_week_income + last_month_income
-	)
+	summary = snapshot.summary(income_field='income')
 
 	balance, status_code = await APIRequest.get('/base/admin_balance')
 
-	signals_gens = [
-		[info[k] for k, _ in info.items()] for _, info in result['signals'].items()
-	]
-	signals_gens = sum(sum(x) for x in signals_gens)
-
-	api_count = sum([apinum for partnerhash, apinum in result['api_count'].items()])
-
 	messages = [
 		'<b>СТАТИСТИКА ПО ВСЕМ БОТАМ</b>\n',
 		'<b>ЗА ВСЕ ВРЕМЯ</b>',
 		f'💰️ Баланс: {balance["balance"]} RUB\n',
 		f'Всего пользователей: {data["users_count"]}',
-		f'Депозиты за все время: {alltime_deps}',
-		f'Доход за все время: {alltime_income}',
-		f'Первые депозиты за все время: {alltime_firstdeps}',
-		f'API за все время: {api_count}',
-		f'Сгенерировано сигналов: {signals_gens}\n',
+		f'Депозиты за все время: {summary["alltime_deps"]}',
+		f'Доход за все время: {summary["alltime_income"]}',
+		f'Первые депозиты за все время: {summary["alltime_firstdeps"]}',
+		f'API за все время: {summary["api_count"]}',
+		f'Сгенерировано сигналов: {summary["signals_gens"]}\n',
 		f'Пользователей на этапе регистрации: {data["users_notreg_count"]}',
 		f'Пользователей на этапе пополнения: {data["users_nottopup_count"]}',
 		f'Пользователей на этапе игры: {data["users_gamed_count"]}\n',
@@ -2797,18 +2078,18 @@ async def admin_statistics_callback_panel(call: CallbackQuery):
 		f'├ Пользователей за вчера: {data["users_yesterday"]}',
 		f'├ Пользователей за неделю: {data["users_lastweek"]}',
 		f'└ Пользователей за месяц: {data["users_month"]}\n',
-		f'Сумма депозитов за сегодня: {today_deps}',
-		f'├ Сумма депозитов за вчера: {yesterday_deps}',
-		f'├ Сумма депозитов за неделю: {last_week_deps}',
-		f'└ Сумма депозитов за месяц: {last_month_deps}\n',
-		f'Первые депозиты за сегодня: {today_firstdeps}',
-		f'├ Первые депозиты за вчера: {yesterday_firstdeps}',
-		f'├ Первые депозиты за неделю: {last_week_firstdeps}',
-		f'└ Первые депозиты за месяц: {last_month_firstdeps}\n',
-		f'Доход за сегодня: {today_income}',
-		f'├ Доход за вчера: {yesterday_income}',
-		f'├ Доход за неделю: {last_week_income}',
-		f'└ Доход за месяц: {last_month_income}',
+		f'Сумма депозитов за сегодня: {summary["today_deps"]}',
+		f'├ Сумма депозитов за вчера: {summary["yesterday_deps"]}',
+		f'├ Сумма депозитов за неделю: {summary["last_week_deps"]}',
+		f'└ Сумма депозитов за месяц: {summary["last_month_deps"]}\n',
+		f'Первые депозиты за сегодня: {summary["today_firstdeps"]}',
+		f'├ Первые депозиты за вчера: {summary["yesterday_firstdeps"]}',
+		f'├ Первые депозиты за неделю: {summary["last_week_firstdeps"]}',
+		f'└ Первые депозиты за месяц: {summary["last_month_firstdeps"]}\n',
+		f'Доход за сегодня: {summary["today_income"]}',
+		f'├ Доход за вчера: {summary["yesterday_income"]}',
+		f'├ Доход за неделю: {summary["last_week_income"]}',
+		f'└ Доход за месяц: {summary["last_month_income"]}',
 	]
 
 	await call.message.edit_text(
@@ -2820,118 +2101,11 @@ async def admin_statistics_callback_panel(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'admin_statistics_panel_mines')
 async def admin_statistics_panel_mines_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
 	data = await collect_stats({'game': 'Mines'})
 
-	api_count = sum([apinum for partnerhash, apinum in result['api_count'].items()])
-
-	today_firstdeps = len(
-		[dep['amount'] for dep in stats['today']['firstdep'] if dep['game'] == 'Mines']
-	)
-	yesterday_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['game'] == 'Mines'
-		]
-	)
-	last_week_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['game'] == 'Mines'
-		]
-	)
-	last_month_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['game'] == 'Mines'
-		]
-	)
-
-	today_deps = sum(
-		[dep['amount'] for dep in stats['today']['firstdep'] if dep['game'] == 'Mines']
-	) + sum([dep['amount'] for dep in stats['today']['dep'] if dep['game'] == 'Mines'])
-	yesterday_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['game'] == 'Mines'
-		]
-	) + sum(
-		[dep['amount'] for dep in stats['yesterday']['dep'] if dep['game'] == 'Mines']
-	)
-	last_week_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['game'] == 'Mines'
-		]
-	) + sum(
-		[dep['amount'] for dep in stats['last_week']['dep'] if dep['game'] == 'Mines']
-	)
-	last_month_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['game'] == 'Mines'
-		]
-	) + sum(
-		[dep['amount'] for dep in stats['last_month']['dep'] if dep['game'] == 'Mines']
-	)
-
-	today_income = sum(
-		[dep['income'] for dep in stats['today']['income'] if dep['game'] == 'Mines']
-	)
-	yesterday_income = sum(
-		[
-			dep['income']
-			for dep in stats['yesterday']['income']
-			if dep['game'] == 'Mines'
-		]
-	)
-	last_week_income = sum(
-		[
-			dep['income']
-			for dep in stats['last_week']['income']
-			if dep['game'] == 'Mines'
-		]
-	)
-	last_month_income = sum(
-		[
-			dep['income']
-			for dep in stats['last_month']['income']
-			if dep['game'] == 'Mines'
-		]
-	)
-
-	alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-	other_dates_firstdep = [info for name, info in stats.items() if name == 'firstdep']
-	others_firstdep = len(
-		[dep['x'] for dep in other_dates_firstdep if dep['game'] == 'Mines']
-	)
-
-	alltime_firstdeps = (
-		others_firstdep
-		+ today_firstdeps
-		+ yesterday_firstdeps
-		+ last_week_firstdeps
-		+ last_month_firstdeps
-	)
-	alltime_income = (
-		today_income + yesterday_income + last_week_income + last_month_income
-	)
-
-	signals_gens = [
-		[info[k] for k, _ in info.items()]
-		for name, info in result['signals'].items()
-		if name == 'Mines'
-	]
-	signals_gens = sum(sum(x) for x in signals_gens)
+	summary = snapshot.summary(game='Mines', income_field='income')
 
 	balance, status_code = await APIRequest.get('/base/admin_balance')
 
@@ -2940,11 +2114,11 @@ async def admin_statistics_panel_mines_callback(call: CallbackQuery):
 		'<b>ЗА ВСЕ ВРЕМЯ</b>',
 		f'💰️ Баланс: {balance["balance"]} RUB\n',
 		f'Всего пользователей: {data["users_count"]}',
-		f'Депозиты за все время: {alltime_deps}',
-		f'Доход за все время: {alltime_income}',
-		f'Первые депозиты за все время: {alltime_firstdeps}',
-		f'API за все время: {api_count}',
-		f'Сгенерировано сигналов: {signals_gens}\n',
+		f'Депозиты за все время: {summary["alltime_deps"]}',
+		f'Доход за все время: {summary["alltime_income"]}',
+		f'Первые депозиты за все время: {summary["alltime_firstdeps"]}',
+		f'API за все время: {summary["api_count"]}',
+		f'Сгенерировано сигналов: {summary["signals_gens"]}\n',
 		f'Пользователей на этапе регистрации: {data["users_notreg_count"]}',
 		f'Пользователей на этапе пополнения: {data["users_nottopup_count"]}',
 		f'Пользователей на этапе игры: {data["users_gamed_count"]}\n',
@@ -2952,18 +2126,18 @@ async def admin_statistics_panel_mines_callback(call: CallbackQuery):
 		f'├ Пользователей за вчера: {data["users_yesterday"]}',
 		f'├ Пользователей за неделю: {data["users_lastweek"]}',
 		f'└ Пользователей за месяц: {data["users_month"]}\n',
-		f'Сумма депозитов за сегодня: {today_deps}',
-		f'├ Сумма депозитов за вчера: {yesterday_deps}',
-		f'├ Сумма депозитов за неделю: {last_week_deps}',
-		f'└ Сумма депозитов за месяц: {last_month_deps}\n',
-		f'Первые депозиты за сегодня: {today_firstdeps}',
-		f'├ Первые депозиты за вчера: {yesterday_firstdeps}',
-		f'├ Первые депозиты за неделю: {last_week_firstdeps}',
-		f'└ Первые депозиты за месяц: {last_month_firstdeps}\n',
-		f'Доход за сегодня: {today_income}',
-		f'├ Доход за вчера: {yesterday_income}',
-		f'├ Доход за неделю: {last_week_income}',
-		f'└ Доход за месяц: {last_month_income}',
+		f'Сумма депозитов за сегодня: {summary["today_deps"]}',
+		f'├ Сумма депозитов за вчера: {summary["yesterday_deps"]}',
+		f'├ Сумма депозитов за неделю: {summary["last_week_deps"]}',
+		f'└ Сумма депозитов за месяц: {summary["last_month_deps"]}\n',
+		f'Первые депозиты за сегодня: {summary["today_firstdeps"]}',
+		f'├ Первые депозиты за вчера: {summary["yesterday_firstdeps"]}',
+		f'├ Первые депозиты за неделю: {summary["last_week_firstdeps"]}',
+		f'└ Первые депозиты за месяц: {summary["last_month_firstdeps"]}\n',
+		f'Доход за сегодня: {summary["today_income"]}',
+		f'├ Доход за вчера: {summary["yesterday_income"]}',
+		f'├ Доход за неделю: {summary["last_week_income"]}',
+		f'└ Доход за месяц: {summary["last_month_income"]}',
 	]
 
 	await call.message.edit_text(
@@ -2980,7 +2154,7 @@ async def admin_statistics_panel_mines_callback(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'admin_top_workers')
 async def admin_top_workers_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats?exclude=1')
+	result, code = await StatsCache.get('/base/stats?exclude=1')
 
 	stats = result['data']
 	income_last_month = (
@@ -3065,7 +2239,7 @@ async def admin_top_workers_callback(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'admin_top_workers')
 async def admin_top_workers_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats?exclude=1')
+	result, code = await StatsCache.get('/base/stats?exclude=1')
 
 	stats = result['data']
 	income_last_month = (
@@ -3150,7 +2324,7 @@ async def admin_top_workers_callback(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'admin_top_workers_by_deps')
 async def admin_top_workers_by_deps_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats')
+	result, code = await StatsCache.get('/base/stats')
 
 	stats = result['data']
 
@@ -3294,7 +2468,7 @@ async def admin_top_workers_by_users_callback(call: CallbackQuery):
 				f'🏅 {partner_hash}: {count} пользователей'
 			)
 
-	result, code = await APIRequest.get('/base/stats')
+	result, code = await StatsCache.get('/base/stats')
 
 	stats = result['data']
 
@@ -3364,7 +2538,7 @@ async def admin_top_workers_by_users_callback(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'admin_top_workers_change')
 async def admin_top_workers_change_callback(call: CallbackQuery):
-	data = sinwin_data['topworkers']
+	data = await get_topworkers()
 
 	if data['first_place']['type'] is not None:
 		firstplace = (
@@ -3422,8 +2596,8 @@ async def admin_place_set_type_to_place_callback(call: CallbackQuery):
 		data_place['type'] = 'uplevel'
 		data_place['status'] = place_type
 
-	sinwin_data['topworkers'][place] = data_place
-	data = sinwin_data['topworkers']
+	await topworkers.set(place, data_place)
+	data = await get_topworkers()
 
 	if data['first_place']['type'] is not None:
 		firstplace = (
@@ -3452,7 +2626,7 @@ async def admin_place_set_type_to_place_callback(call: CallbackQuery):
 	else:
 		thirdplace = 'Ничего'
 
-	save_data()
+	await save_data()
 
 	message = f"""Статистика обнуляется 1 числа каждого месяца
 
@@ -3487,7 +2661,7 @@ async def change_bonus_for_place_num_callback(call: CallbackQuery):
 
 	# save_data()
 
-	data = sinwin_data['topworkers']
+	data = await get_topworkers()
 
 	if data['first_place']['type'] is not None:
 		firstplace = (
@@ -3527,15 +2701,12 @@ async def change_bonus_for_place_num_callback(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'disable_all_bonuses_for_places')
 async def disable_all_bonuses_for_places_callback(call: CallbackQuery):
-	data = sinwin_data['topworkers'] = {
-		'first_place': {'type': None, 'amount': 0},
-		'second_place': {'type': None, 'amount': 0},
-		'third_place': {'type': None, 'amount': 0},
-	}
+	for place in ('first_place', 'second_place', 'third_place'):
+		await topworkers.set(place, {'type': None, 'amount': 0})
 
-	save_data()
+	await save_data()
 
-	data = sinwin_data['topworkers']
+	data = await get_topworkers()
 
 	if data['first_place']['type'] is not None:
 		firstplace = (
@@ -3576,3 +2747,33 @@ async def disable_all_bonuses_for_places_callback(call: CallbackQuery):
 	await call.message.edit_text(
 		message, reply_markup=inline.get_change_bonus_for_place()
 	)
+
+
+@admin_router.message(
+	Command('apimetrics'), F.from_user.id.in_(config.secrets.ADMINS_IDS)
+)
+async def admin_api_metrics_command(message: Message):
+	"""
+	Command /apimetrics: backend API endpoints, the slowest in total first
+
+	:param		message:  The message
+	:type		message:  Message
+	"""
+	rows = api_summary()
+
+	if not rows:
+		await message.answer('Запросов к API еще не было')
+		return
+
+	messages = ['<b>API: время и размер ответов по эндпоинтам</b>\n']
+
+	for row in rows:
+		messages += [
+			f'<code>{row["endpoint"]}</code>',
+			f'├ Запросов: {row["count"]} (ошибок: {row["errors"]}, сейчас: {row["in_flight"]})',
+			f'├ Время: всего {row["total"]:.1f} с, среднее {row["avg"] * 1000:.0f} мс, '
+			f'p95 {row["p95"] * 1000:.0f} мс, макс {row["max"] * 1000:.0f} мс',
+			f'└ Размер: среднее {row["avg_size"] / 1024:.1f} KiB, макс {row["max_size"] / 1024:.1f} KiB\n',
+		]
+
+	await message.answer('\n'.join(messages), parse_mode=ParseMode.HTML)
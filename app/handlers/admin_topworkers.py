@@ -5,7 +5,7 @@
 
 @admin_router.callback_query(F.data == 'admin_top_workers')
 async def admin_top_workers_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats?exclude=1')
+	result, code = await StatsCache.get('/base/stats?exclude=1')
 
 	stats = result['data']
 	income_last_month = (
@@ -90,7 +90,7 @@ async def admin_top_workers_callback(call: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'admin_top_workers_by_deps')
 async def admin_top_workers_by_deps_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats?exclude=1')
+	result, code = await StatsCache.get('/base/stats?exclude=1')
 
 	stats = result['data']
 
@@ -228,7 +228,7 @@ async def admin_top_workers_by_users_callback(call: CallbackQuery):
 				f'🏅 {partner_hash}: {count} пользователей'
 			)
 
-	result, code = await APIRequest.get('/base/stats')
+	result, code = await StatsCache.get('/base/stats')
 
 	stats = result['data']
 
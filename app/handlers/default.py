@@ -1,33 +1,40 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from random import randint
-from typing import Dict, Union
+from typing import List, Optional, Union
 
 from aiogram import F, Router
 from aiogram.enums import ParseMode
 from aiogram.filters import BaseFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import CallbackQuery, FSInputFile, InputMediaPhoto, Message
+from aiogram.types import CallbackQuery, Message
 from apscheduler.triggers.interval import IntervalTrigger
-from dateutil.relativedelta import relativedelta
 from loguru import logger
 
 import app.keyboards.menu_inline as inline
-from app.api import APIRequest
-from app.database.test import users
+from app.api import APIRequest, data_as_of
+from app.database.data import (
+	activate_promocode,
+	get_promocode,
+	get_topworkers,
+	promocode_activations,
+	save_data,
+)
+from app.database.partners import Partner
+from app.database.shared import SharedDict
+from app.database.test import loaded_achievements, user_achievements, users
 from app.loader import (
 	ACHIEVEMENTS,
-	bot,
 	config,
 	convert_to_human,
 	humanize_place,
-	loaded_achievements,
-	save_data,
 	scheduler,
-	sinwin_data,
-	user_achievements,
 )
 from app.utils.algorithms import is_valid_card
+from app.utils.fileloader import edit_cached_photo, send_cached_photo
+from app.utils.sender import SendQueue, sender
+from app.utils.stats import achievement_stats, collect_stats, find_referals
+from app.utils.statscache import StatsCache
 
 
 class IsConfirmed(BaseFilter):
@@ -37,20 +44,67 @@ class IsConfirmed(BaseFilter):
 	async def __call__(
 		self, message: Message | CallbackQuery, state: FSMContext = None
 	) -> bool:
+		user = await users.get(message.from_user.id, {})
+
 		if (
-			users.get(message.from_user.id, {}).get('final', False) is True
+			user.get('final', False) is True
 			or message.from_user.id in config.secrets.ADMINS_IDS
 		):
 			return True
 		return False
 
 
-default_router = Router()
+default_router = Router(name='default')
 alerts = True
 
-transactions_dict = {}
-transactions_schedulded = {}
-withdraws_history = {}
+# withdrawal requests are reviewed by admins within days
+transactions_dict = SharedDict('transactions_dict', ttl=30 * 24 * 60 * 60)
+transactions_schedulded = SharedDict('transactions_schedulded', ttl=30 * 24 * 60 * 60)
+withdraws_history = SharedDict('withdraws_history')
+
+
+def stale_note(*results, as_of: Optional[str] = None) -> List[str]:
+	"""
+	Get note lines about stale data shown while API is unavailable
+
+	:param		results:  The API results of screen
+	:type		results:  Any
+	:param		as_of:	  The time of already known stale data (partner_as_of)
+	:type		as_of:	  Optional[str]
+
+	:returns:	note lines, empty if data is fresh
+	:rtype:		List[str]
+	"""
+	as_of = as_of or data_as_of(*results)
+
+	if as_of is None:
+		return []
+
+	return ['', f'⚠️ Сервер недоступен, данные на {as_of}']
+
+
+async def fresh_partner(partner: Partner) -> Optional[Partner]:
+	"""
+	Read partner past cache before it is changed and written back by
+	/partner/update, so changes made since it was cached are kept
+
+	:param		partner:  The partner (from middleware)
+	:type		partner:  Partner
+
+	:returns:	the partner as backend has it now, None if backend is
+				unavailable or has no such partner
+	:rtype:		Optional[Partner]
+	"""
+	result, status = await APIRequest.post(
+		'/partner/find',
+		{'opts': {'partner_hash': partner['partner_hash']}},
+		cache=False,
+	)
+
+	if status != 200 or not result or not result['partners']:
+		return None
+
+	return result['partners'][-1]
 
 
 def get_percent_by_status(status: str) -> float:
@@ -88,7 +142,8 @@ LIMITS = {
 	'tether bep20': (1500.0, 5000000.0),
 }
 
-last_update_time: Dict[int, datetime] = {}
+# achievements reload times, reload is allowed once a minute
+last_update_time = SharedDict('last_update_time', ttl=60)
 
 
 class CardWithdrawGroup(StatesGroup):
@@ -180,17 +235,16 @@ def get_next_level(status):
 
 
 @default_router.message(F.text, PromoGroup.promocode)
-async def get_entered_promocode(message: Message, state: FSMContext):
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': message.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
+async def get_entered_promocode(
+	message: Message, state: FSMContext, partner: Optional[Partner]
+):
 
 	await state.update_data(promocode=message.text)
 
 	promocode_name = message.text
+	promocode = await get_promocode(promocode_name)
 
-	if not sinwin_data.get('promocodes', {}).get(promocode_name, False):
+	if not promocode:
 		await message.answer(
 			'Такого промокода не существует',
 			reply_markup=inline.create_back_markup('profile'),
@@ -198,9 +252,18 @@ async def get_entered_promocode(message: Message, state: FSMContext):
 		await state.set_state(PromoGroup.promocode)
 		return
 
-	promocode = sinwin_data.get('promocodes', {}).get(promocode_name)
+	if partner is None:
+		await message.answer('Вы еще не зарегистрированы в системе')
+		return
+
+	partner = await fresh_partner(partner)
+
+	if partner is None:
+		await message.answer('⚠️ Сервер недоступен, попробуйте позже')
+		return
 
-	if promocode['activations_left'] <= 0:
+	# activation is taken before reward, so workers can't exceed the limit
+	if not await activate_promocode(promocode_name):
 		await message.answer(
 			'Такого промокода не существует',
 			reply_markup=inline.create_back_markup('profile'),
@@ -224,6 +287,7 @@ async def get_entered_promocode(message: Message, state: FSMContext):
 		if get_place(partner['status']) < get_place(promocode['data']):
 			partner['status'] = get_next_level(partner['status'])
 		else:
+			await promocode_activations.incr(promocode_name)
 			await state.set_state(PromoGroup.promocode)
 			await message.answer(
 				'Такого промокода не существует',
@@ -239,6 +303,7 @@ async def get_entered_promocode(message: Message, state: FSMContext):
 		value = promocode['percent'] / 100
 
 		if get_percent_by_status(partner['status']) + value >= 100:
+			await promocode_activations.incr(promocode_name)
 			await state.set_state(PromoGroup.promocode)
 			await message.answer(
 				'Такого промокода не существует',
@@ -255,11 +320,7 @@ async def get_entered_promocode(message: Message, state: FSMContext):
 
 	await APIRequest.post('/partner/update', {**partner})
 
-	promocode['activations_left'] -= 1
-
-	sinwin_data['promocodes'][promocode_name] = promocode
-
-	save_data()
+	await save_data()
 
 	# На ваш баланс начислено 5 000
 	# Вы перешли на статус Мастер
@@ -268,152 +329,28 @@ async def get_entered_promocode(message: Message, state: FSMContext):
 	await state.clear()
 
 
-async def collect_stats(opts: dict):
-	result, status = await APIRequest.post('/user/find', {'opts': opts})
-
-	# if opts.get('game', False):
-	# result_incomes, status2 = await APIRequest.get(f"/base/incomes?game={opts['game']}")
-	# incomes = result_incomes["income_stat"]
-	# postbacks = result_incomes["postbacks_stat"]
-
-	today = datetime.now().date()
-	yesterday = today - timedelta(days=1)
-	last_week_start = today - timedelta(days=today.weekday() + 7)
-	last_week_end = last_week_start + timedelta(days=6)
-	last_month_start = today - relativedelta(months=1)
-	last_month_end = last_month_start + relativedelta(day=31)
-
-	users = result['users']
-
-	users_count = len(users)
-	users_income = sum([user['income'] for user in users])
-	users_notreg_count = len([user for user in users if not user['approved']])
-	users_nottopup_count = len(
-		[user for user in users if user['balance'] < 500.0 and user['approved']]
-	)
-	users_gamed_count = len(
-		[user for user in users if user['balance'] > 500.0 and user['approved']]
-	)
-
-	users_today = [
-		user
-		for user in users
-		if datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date() == today
-	]
-	users_yesterday = [
-		user
-		for user in users
-		if datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date()
-		== yesterday
-	]
-	users_lastweek = [
-		user
-		for user in users
-		if last_week_start
-		<= datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date()
-		<= last_week_end
-	]
-	users_month = [
-		user
-		for user in users
-		if last_month_start
-		<= datetime.strptime(user['register_date'], '%Y-%m-%dT%H:%M:%S').date()
-		<= last_month_end
-	]
-
-	users_today = len(users_today)
-	users_yesterday = len(users_yesterday)
-	users_lastweek = len(users_lastweek)
-	users_month = len(users_month)
-
-	return {
-		'users_count': users_count,
-		'users_today': users_today,
-		'users_yesterday': users_yesterday,
-		'users_lastweek': users_lastweek,
-		'users_month': users_month,
-		'users_notreg_count': users_notreg_count,
-		'users_nottopup_count': users_nottopup_count,
-		'users_gamed_count': users_gamed_count,
-		'users_income': users_income,
-	}
-
-
 @default_router.callback_query(F.data == 'statistics', IsConfirmed())
-async def statistics_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
+async def statistics_callback(
+	call: CallbackQuery, partner: Optional[Partner], partner_as_of: Optional[str]
+):
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
 	if call.from_user.id in config.secrets.ADMINS_IDS:
 		data = await collect_stats({})
 
-		today_firstdeps = len([dep['amount'] for dep in stats['today']['firstdep']])
-		yesterday_firstdeps = len(
-			[dep['amount'] for dep in stats['yesterday']['firstdep']]
-		)
-		last_week_firstdeps = len(
-			[dep['amount'] for dep in stats['last_week']['firstdep']]
-		)
-		last_month_firstdeps = len(
-			[dep['amount'] for dep in stats['last_month']['firstdep']]
-		)
-
-		today_deps = sum([dep['amount'] for dep in stats['today']['dep']]) + sum(
-			[dep['amount'] for dep in stats['today']['firstdep']]
-		)
-		yesterday_deps = sum(
-			[dep['amount'] for dep in stats['yesterday']['dep']]
-		) + sum([dep['amount'] for dep in stats['yesterday']['firstdep']])
-		last_week_deps = sum(
-			[dep['amount'] for dep in stats['last_week']['dep']]
-		) + sum([dep['amount'] for dep in stats['last_week']['firstdep']])
-		last_month_deps = sum(
-			[dep['amount'] for dep in stats['last_month']['dep']]
-		) + sum([dep['amount'] for dep in stats['last_month']['firstdep']])
-
-		today_income = sum([dep['income'] for dep in stats['today']['income']])
-		yesterday_income = sum([dep['income'] for dep in stats['yesterday']['income']])
-		last_week_income = sum([dep['income'] for dep in stats['last_week']['income']])
-		last_month_income = sum(
-			[dep['income'] for dep in stats['last_month']['income']]
-		)
-
-		alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-		other_dates_firstdep = [
-			info for name, info in stats.items() if name == 'firstdep'
-		]
-		others_firstdep = len([dep['x'] for dep in other_dates_firstdep])
-
-		alltime_firstdeps = (
-			others_firstdep
-			+ today_firstdeps
-			+ yesterday_firstdeps
-			+ last_week_firstdeps
-			+ last_month_firstdeps
-		)
-		alltime_income = (
-			today_income + yesterday_income + last_week_income + last_month_income
-		)
+		summary = snapshot.summary(income_field='income')
 
 		balance, status_code = await APIRequest.get('/base/admin_balance')
 
-		signals_gens = [
-			[info[k] for k, _ in info.items()] for _, info in result['signals'].items()
-		]
-		signals_gens = sum(sum(x) for x in signals_gens)
-
-		api_count = sum([apinum for partnerhash, apinum in result['api_count'].items()])
-
 		messages = [
 			'<b>СТАТИСТИКА ПО ВСЕМ БОТАМ</b>\n',
 			f'💰️ Баланс: {balance["balance"]} RUB\n',
 			f'Всего пользователей: {data["users_count"]}',
-			f'Депозиты за все время: {alltime_deps}',
-			f'Доход за все время: {alltime_income}',
-			f'Первые депозиты за все время: {alltime_firstdeps}',
-			f'API за все время: {api_count}',
-			f'Сгенерировано сигналов: {signals_gens}\n',
+			f'Депозиты за все время: {summary["alltime_deps"]}',
+			f'Доход за все время: {summary["alltime_income"]}',
+			f'Первые депозиты за все время: {summary["alltime_firstdeps"]}',
+			f'API за все время: {summary["api_count"]}',
+			f'Сгенерировано сигналов: {summary["signals_gens"]}\n',
 			f'Пользователей на этапе регистрации: {data["users_notreg_count"]}',
 			f'Пользователей на этапе пополнения: {data["users_nottopup_count"]}',
 			f'Пользователей на этапе игры: {data["users_gamed_count"]}\n',
@@ -421,185 +358,37 @@ async def statistics_callback(call: CallbackQuery):
 			f'├ Пользователей за вчера: {data["users_yesterday"]}',
 			f'├ Пользователей за неделю: {data["users_lastweek"]}',
 			f'└ Пользователей за месяц: {data["users_month"]}\n',
-			f'Сумма депозитов за сегодня: {today_deps}',
-			f'├ Сумма депозитов за вчера: {yesterday_deps}',
-			f'├ Сумма депозитов за неделю: {last_week_deps}',
-			f'└ Сумма депозитов за месяц: {last_month_deps}\n',
-			f'Первые депозиты за сегодня: {today_firstdeps}',
-			f'├ Первые депозиты за вчера: {yesterday_firstdeps}',
-			f'├ Первые депозиты за неделю: {last_week_firstdeps}',
-			f'└ Первые депозиты за месяц: {last_month_firstdeps}\n',
-			f'Доход за сегодня: {today_income}',
-			f'├ Доход за вчера: {yesterday_income}',
-			f'├ Доход за неделю: {last_week_income}',
-			f'└ Доход за месяц: {last_month_income}',
+			f'Сумма депозитов за сегодня: {summary["today_deps"]}',
+			f'├ Сумма депозитов за вчера: {summary["yesterday_deps"]}',
+			f'├ Сумма депозитов за неделю: {summary["last_week_deps"]}',
+			f'└ Сумма депозитов за месяц: {summary["last_month_deps"]}\n',
+			f'Первые депозиты за сегодня: {summary["today_firstdeps"]}',
+			f'├ Первые депозиты за вчера: {summary["yesterday_firstdeps"]}',
+			f'├ Первые депозиты за неделю: {summary["last_week_firstdeps"]}',
+			f'└ Первые депозиты за месяц: {summary["last_month_firstdeps"]}\n',
+			f'Доход за сегодня: {summary["today_income"]}',
+			f'├ Доход за вчера: {summary["yesterday_income"]}',
+			f'├ Доход за неделю: {summary["last_week_income"]}',
+			f'└ Доход за месяц: {summary["last_month_income"]}',
 		]
+		messages += stale_note(result, data, balance)
 	else:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-
-		if not partner['approved']:
-			await call.answer('Вы заблокированы')
-			return
-
 		opts = {'referal_parent': partner['partner_hash']}
 
 		data = await collect_stats(opts)
 
-		api_count = result['api_count'].get(partner['partner_hash'], 0)
-
-		today_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		yesterday_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_week_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		today_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['today']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		yesterday_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		last_week_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		today_income = sum(
-			[
-				dep['x']
-				for dep in stats['today']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		yesterday_income = sum(
-			[
-				dep['x']
-				for dep in stats['yesterday']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_week_income = sum(
-			[
-				dep['x']
-				for dep in stats['last_week']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_income = sum(
-			[
-				dep['x']
-				for dep in stats['last_month']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-		other_dates_firstdep = [
-			info for name, info in stats.items() if name == 'firstdep'
-		]
-		others_firstdep = len(
-			[
-				dep['x']
-				for dep in other_dates_firstdep
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		alltime_firstdeps = (
-			others_firstdep
-			+ today_firstdeps
-			+ yesterday_firstdeps
-			+ last_week_firstdeps
-			+ last_month_firstdeps
-		)
-		alltime_income = (
-			today_income + yesterday_income + last_week_income + last_month_income
-		)
-
-		signals_gens = sum(
-			[info[partner['partner_hash']] for _, info in result['signals'].items()]
-		)
+		summary = snapshot.summary(partner['partner_hash'])
 
 		messages = [
 			'<b>СТАТИСТИКА ПО ВСЕМ БОТАМ</b>',
 			'<code>Пользователи которые запустили бота по вашим ссылкам</code>\n',
 			f'💰️ Баланс: {partner["balance"]} RUB\n',
 			f'Всего пользователей: {data["users_count"]}',
-			f'Депозиты за все время: {alltime_deps}',
-			f'Доход за все время: {alltime_income}',
-			f'Первые депозиты за все время: {alltime_firstdeps}',
-			f'API за все время: {api_count}',
-			f'Сгенерировано сигналов: {signals_gens}\n',
+			f'Депозиты за все время: {summary["alltime_deps"]}',
+			f'Доход за все время: {summary["alltime_income"]}',
+			f'Первые депозиты за все время: {summary["alltime_firstdeps"]}',
+			f'API за все время: {summary["api_count"]}',
+			f'Сгенерировано сигналов: {summary["signals_gens"]}\n',
 			f'Пользователей на этапе регистрации: {data["users_notreg_count"]}',
 			f'Пользователей на этапе пополнения: {data["users_nottopup_count"]}',
 			f'Пользователей на этапе игры: {data["users_gamed_count"]}\n',
@@ -607,19 +396,20 @@ async def statistics_callback(call: CallbackQuery):
 			f'├ Пользователей за вчера: {data["users_yesterday"]}',
 			f'├ Пользователей за неделю: {data["users_lastweek"]}',
 			f'└ Пользователей за месяц: {data["users_month"]}\n',
-			f'Сумма депозитов за сегодня: {today_deps}',
-			f'├ Сумма депозитов за вчера: {yesterday_deps}',
-			f'├ Сумма депозитов за неделю: {last_week_deps}',
-			f'└ Сумма депозитов за месяц: {last_month_deps}\n',
-			f'Первые депозиты за сегодня: {today_firstdeps}',
-			f'├ Первые депозиты за вчера: {yesterday_firstdeps}',
-			f'├ Первые депозиты за неделю: {last_week_firstdeps}',
-			f'└ Первые депозиты за месяц: {last_month_firstdeps}\n',
-			f'Доход за сегодня: {today_income}',
-			f'├ Доход за вчера: {yesterday_income}',
-			f'├ Доход за неделю: {last_week_income}',
-			f'└ Доход за месяц: {last_month_income}',
+			f'Сумма депозитов за сегодня: {summary["today_deps"]}',
+			f'├ Сумма депозитов за вчера: {summary["yesterday_deps"]}',
+			f'├ Сумма депозитов за неделю: {summary["last_week_deps"]}',
+			f'└ Сумма депозитов за месяц: {summary["last_month_deps"]}\n',
+			f'Первые депозиты за сегодня: {summary["today_firstdeps"]}',
+			f'├ Первые депозиты за вчера: {summary["yesterday_firstdeps"]}',
+			f'├ Первые депозиты за неделю: {summary["last_week_firstdeps"]}',
+			f'└ Первые депозиты за месяц: {summary["last_month_firstdeps"]}\n',
+			f'Доход за сегодня: {summary["today_income"]}',
+			f'├ Доход за вчера: {summary["yesterday_income"]}',
+			f'├ Доход за неделю: {summary["last_week_income"]}',
+			f'└ Доход за месяц: {summary["last_month_income"]}',
 		]
+		messages += stale_note(result, data, as_of=partner_as_of)
 
 	await call.message.edit_text(
 		'\n'.join(messages),
@@ -629,148 +419,13 @@ async def statistics_callback(call: CallbackQuery):
 
 
 @default_router.callback_query(F.data == 'statistics_mines', IsConfirmed())
-async def statistics_mines_callback(call: CallbackQuery):
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
+async def statistics_mines_callback(call: CallbackQuery, partner: Optional[Partner]):
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
 	if call.from_user.id in config.secrets.ADMINS_IDS:
 		data = await collect_stats({'game': 'Mines'})
 
-		api_count = sum([apinum for partnerhash, apinum in result['api_count'].items()])
-
-		today_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['game'] == 'Mines'
-			]
-		)
-		yesterday_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['game'] == 'Mines'
-			]
-		)
-		last_week_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['game'] == 'Mines'
-			]
-		)
-		last_month_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['game'] == 'Mines'
-			]
-		)
-
-		today_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['game'] == 'Mines'
-			]
-		) + sum(
-			[dep['amount'] for dep in stats['today']['dep'] if dep['game'] == 'Mines']
-		)
-		yesterday_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['game'] == 'Mines'
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['dep']
-				if dep['game'] == 'Mines'
-			]
-		)
-		last_week_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['game'] == 'Mines'
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['dep']
-				if dep['game'] == 'Mines'
-			]
-		)
-		last_month_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['game'] == 'Mines'
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['dep']
-				if dep['game'] == 'Mines'
-			]
-		)
-
-		today_income = sum(
-			[
-				dep['income']
-				for dep in stats['today']['income']
-				if dep['game'] == 'Mines'
-			]
-		)
-		yesterday_income = sum(
-			[
-				dep['income']
-				for dep in stats['yesterday']['income']
-				if dep['game'] == 'Mines'
-			]
-		)
-		last_week_income = sum(
-			[
-				dep['income']
-				for dep in stats['last_week']['income']
-				if dep['game'] == 'Mines'
-			]
-		)
-		last_month_income = sum(
-			[
-				dep['income']
-				for dep in stats['last_month']['income']
-				if dep['game'] == 'Mines'
-			]
-		)
-
-		alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-		other_dates_firstdep = [
-			info for name, info in stats.items() if name == 'firstdep'
-		]
-		others_firstdep = len(
-			[dep['x'] for dep in other_dates_firstdep if dep['game'] == 'Mines']
-		)
-
-		alltime_firstdeps = (
-			others_firstdep
-			+ today_firstdeps
-			+ yesterday_firstdeps
-			+ last_week_firstdeps
-			+ last_month_firstdeps
-		)
-		alltime_income = (
-			today_income + yesterday_income + last_week_income + last_month_income
-		)
-
-		signals_gens = [
-			[info[k] for k, _ in info.items()]
-			for name, info in result['signals'].items()
-			if name == 'Mines'
-		]
-		signals_gens = sum(sum(x) for x in signals_gens)
+		summary = snapshot.summary(game='Mines', income_field='income')
 
 		balance, status_code = await APIRequest.get('/base/admin_balance')
 
@@ -778,11 +433,11 @@ async def statistics_mines_callback(call: CallbackQuery):
 			'<b>💣️ СТАТИСТИКА ПО MINES</b>\n',
 			f'💰️ Баланс: {balance["balance"]} RUB\n',
 			f'Всего пользователей: {data["users_count"]}',
-			f'Депозиты за все время: {alltime_deps}',
-			f'Доход за все время: {alltime_income}',
-			f'Первые депозиты за все время: {alltime_firstdeps}',
-			f'API за все время: {api_count}',
-			f'Сгенерировано сигналов: {signals_gens}\n',
+			f'Депозиты за все время: {summary["alltime_deps"]}',
+			f'Доход за все время: {summary["alltime_income"]}',
+			f'Первые депозиты за все время: {summary["alltime_firstdeps"]}',
+			f'API за все время: {summary["api_count"]}',
+			f'Сгенерировано сигналов: {summary["signals_gens"]}\n',
 			f'Пользователей на этапе регистрации: {data["users_notreg_count"]}',
 			f'Пользователей на этапе пополнения: {data["users_nottopup_count"]}',
 			f'Пользователей на этапе игры: {data["users_gamed_count"]}\n',
@@ -790,200 +445,36 @@ async def statistics_mines_callback(call: CallbackQuery):
 			f'├ Пользователей за вчера: {data["users_yesterday"]}',
 			f'├ Пользователей за неделю: {data["users_lastweek"]}',
 			f'└ Пользователей за месяц: {data["users_month"]}\n',
-			f'Сумма депозитов за сегодня: {today_deps}',
-			f'├ Сумма депозитов за вчера: {yesterday_deps}',
-			f'├ Сумма депозитов за неделю: {last_week_deps}',
-			f'└ Сумма депозитов за месяц: {last_month_deps}\n',
-			f'Первые депозиты за сегодня: {today_firstdeps}',
-			f'├ Первые депозиты за вчера: {yesterday_firstdeps}',
-			f'├ Первые депозиты за неделю: {last_week_firstdeps}',
-			f'└ Первые депозиты за месяц: {last_month_firstdeps}\n',
-			f'Доход за сегодня: {today_income}',
-			f'├ Доход за вчера: {yesterday_income}',
-			f'├ Доход за неделю: {last_week_income}',
-			f'└ Доход за месяц: {last_month_income}',
+			f'Сумма депозитов за сегодня: {summary["today_deps"]}',
+			f'├ Сумма депозитов за вчера: {summary["yesterday_deps"]}',
+			f'├ Сумма депозитов за неделю: {summary["last_week_deps"]}',
+			f'└ Сумма депозитов за месяц: {summary["last_month_deps"]}\n',
+			f'Первые депозиты за сегодня: {summary["today_firstdeps"]}',
+			f'├ Первые депозиты за вчера: {summary["yesterday_firstdeps"]}',
+			f'├ Первые депозиты за неделю: {summary["last_week_firstdeps"]}',
+			f'└ Первые депозиты за месяц: {summary["last_month_firstdeps"]}\n',
+			f'Доход за сегодня: {summary["today_income"]}',
+			f'├ Доход за вчера: {summary["yesterday_income"]}',
+			f'├ Доход за неделю: {summary["last_week_income"]}',
+			f'└ Доход за месяц: {summary["last_month_income"]}',
 		]
 	else:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-
-		if not partner['approved']:
-			await call.answer('Вы заблокированы')
-			return
-
 		opts = {'game': 'Mines', 'referal_parent': partner['partner_hash']}
 
 		data = await collect_stats(opts)
 
-		api_count = result['api_count'].get(partner['partner_hash'], 0)
-
-		today_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		yesterday_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_week_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		today_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['today']['dep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		yesterday_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['dep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_week_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['dep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['dep']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		today_income = sum(
-			[
-				dep['x']
-				for dep in stats['today']['income']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		yesterday_income = sum(
-			[
-				dep['x']
-				for dep in stats['yesterday']['income']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_week_income = sum(
-			[
-				dep['x']
-				for dep in stats['last_week']['income']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_income = sum(
-			[
-				dep['x']
-				for dep in stats['last_month']['income']
-				if dep['game'] == 'Mines'
-				and dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-		other_dates_firstdep = [
-			info for name, info in stats.items() if name == 'firstdep'
-		]
-		others_firstdep = len(
-			[
-				dep['x']
-				for dep in other_dates_firstdep
-				if dep['partner_hash'] == partner['partner_hash']
-				and dep['game'] == 'Mines'
-			]
-		)
-
-		alltime_firstdeps = (
-			others_firstdep
-			+ today_firstdeps
-			+ yesterday_firstdeps
-			+ last_week_firstdeps
-			+ last_month_firstdeps
-		)
-		alltime_income = (
-			today_income + yesterday_income + last_week_income + last_month_income
-		)
-
-		signals_gens = sum(
-			[info[partner['partner_hash']] for _, info in result['signals'].items()]
-		)
+		summary = snapshot.summary(partner['partner_hash'], 'Mines')
 
 		messages = [
 			'<b>💣️ СТАТИСТИКА ПО MINES</b>',
 			'<code>Пользователи которые запустили бота по вашим ссылкам</code>\n',
 			f'💰️ Баланс: {partner["balance"]} RUB\n',
 			f'Всего пользователей: {data["users_count"]}',
-			f'Депозиты за все время: {alltime_deps}',
-			f'Доход за все время: {alltime_income}',
-			f'Первые депозиты за все время: {alltime_firstdeps}',
-			f'API за все время: {api_count}',
-			f'Сгенерировано сигналов: {signals_gens}\n',
+			f'Депозиты за все время: {summary["alltime_deps"]}',
+			f'Доход за все время: {summary["alltime_income"]}',
+			f'Первые депозиты за все время: {summary["alltime_firstdeps"]}',
+			f'API за все время: {summary["api_count"]}',
+			f'Сгенерировано сигналов: {summary["signals_gens"]}\n',
 			f'Пользователей на этапе регистрации: {data["users_notreg_count"]}',
 			f'Пользователей на этапе пополнения: {data["users_nottopup_count"]}',
 			f'Пользователей на этапе игры: {data["users_gamed_count"]}\n',
@@ -991,18 +482,18 @@ async def statistics_mines_callback(call: CallbackQuery):
 			f'├ Пользователей за вчера: {data["users_yesterday"]}',
 			f'├ Пользователей за неделю: {data["users_lastweek"]}',
 			f'└ Пользователей за месяц: {data["users_month"]}\n',
-			f'Сумма депозитов за сегодня: {today_deps}',
-			f'├ Сумма депозитов за вчера: {yesterday_deps}',
-			f'├ Сумма депозитов за неделю: {last_week_deps}',
-			f'└ Сумма депозитов за месяц: {last_month_deps}\n',
-			f'Первые депозиты за сегодня: {today_firstdeps}',
-			f'├ Первые депозиты за вчера: {yesterday_firstdeps}',
-			f'├ Первые депозиты за неделю: {last_week_firstdeps}',
-			f'└ Первые депозиты за месяц: {last_month_firstdeps}\n',
-			f'Доход за сегодня: {today_income}',
-			f'├ Доход за вчера: {yesterday_income}',
-			f'├ Доход за неделю: {last_week_income}',
-			f'└ Доход за месяц: {last_month_income}',
+			f'Сумма депозитов за сегодня: {summary["today_deps"]}',
+			f'├ Сумма депозитов за вчера: {summary["yesterday_deps"]}',
+			f'├ Сумма депозитов за неделю: {summary["last_week_deps"]}',
+			f'└ Сумма депозитов за месяц: {summary["last_month_deps"]}\n',
+			f'Первые депозиты за сегодня: {summary["today_firstdeps"]}',
+			f'├ Первые депозиты за вчера: {summary["yesterday_firstdeps"]}',
+			f'├ Первые депозиты за неделю: {summary["last_week_firstdeps"]}',
+			f'└ Первые депозиты за месяц: {summary["last_month_firstdeps"]}\n',
+			f'Доход за сегодня: {summary["today_income"]}',
+			f'├ Доход за вчера: {summary["yesterday_income"]}',
+			f'├ Доход за неделю: {summary["last_week_income"]}',
+			f'└ Доход за месяц: {summary["last_month_income"]}',
 		]
 
 	await call.message.edit_text(
@@ -1013,7 +504,7 @@ async def statistics_mines_callback(call: CallbackQuery):
 
 
 @default_router.callback_query(F.data.startswith('referal'), IsConfirmed())
-async def referal_callback(call: CallbackQuery):
+async def referal_callback(call: CallbackQuery, partner: Optional[Partner]):
 	if call.from_user.id in config.secrets.ADMINS_IDS:
 		messages = [
 			'Помогите своим друзьям стать частью нашей команды и начните зарабатывать вместе!\n',
@@ -1025,15 +516,6 @@ async def referal_callback(call: CallbackQuery):
 			'Ваша реферальная ссылка: <code>https://t.me/SinWin_work_bot?start={hash}</code>',
 		]
 	else:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-
-		if not partner['approved']:
-			await call.answer('Вы заблокированы')
-			return
-
 		messages = [
 			'Помогите своим друзьям стать частью нашей команды и начните зарабатывать вместе!\n',
 			'Мы ищем только мотивированных профессионалов, предпочтительно с опытом в арбитраже.\n\n<code>💰️ Условия реферальной программы могут меняться</code>\n',
@@ -1052,22 +534,13 @@ async def referal_callback(call: CallbackQuery):
 
 
 @default_router.callback_query(F.data.startswith('about_us'), IsConfirmed())
-async def about_uscallback(call: CallbackQuery):
+async def about_uscallback(call: CallbackQuery, partner: Optional[Partner]):
 	messages = [
 		'Следите за нашими новостями и обновлениями на <a href="https://t.me/+W8_28FXJWXIxZTgy">канале SinWin</a>. Там вы найдете свежие новости и важные объявления для нашей команды.\n',
 		'Ваше мнение важно для нас! Мы всегда стремимся к совершенству, поэтому будем рады ваши вопросам, предложениям и отзывам.\n',
 		'Спасибо, что выбрали SinWin!',
 	]
 
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
-		return
-
 	await call.message.edit_text(
 		'\n'.join(messages),
 		parse_mode=ParseMode.HTML,
@@ -1076,18 +549,11 @@ async def about_uscallback(call: CallbackQuery):
 
 
 @default_router.callback_query(F.data.startswith('my_referals'), IsConfirmed())
-async def referal_answer_callback(call: CallbackQuery):
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	try:
-		partner = partners[0]['partners'][-1]
-	except Exception:
+async def referal_answer_callback(call: CallbackQuery, partner: Optional[Partner]):
+	if partner is None:
 		return
 
-	cpartners = await APIRequest.post(
-		'/partner/find', {'opts': {'referrer_hash': partner['partner_hash']}}
-	)
+	cpartners = await find_referals(partner['partner_hash'])
 	cpartner = cpartners[0]['partners']
 
 	# if rpartner:
@@ -1266,39 +732,22 @@ def check_achievements_for_reload(
 
 
 @default_router.callback_query(F.data.startswith('reload_achievs'), IsConfirmed())
-async def reload_achievs_callback(call: CallbackQuery):
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners']
-
-	if last_update_time.get(call.from_user.id) is not None:
-		time_difference = datetime.now() - last_update_time.get(call.from_user.id)
-
-		if time_difference.total_seconds() < 60:
-			await call.answer('Слишком часто, обновите через минуту')
-			return
+async def reload_achievs_callback(call: CallbackQuery, partner: Optional[Partner]):
+	if await last_update_time.get(call.from_user.id) is not None:
+		await call.answer('Слишком часто, обновите через минуту')
+		return
 
-	last_update_time[call.from_user.id] = datetime.now()
+	await last_update_time.set(call.from_user.id, datetime.now().isoformat())
 
-	if partner:
-		partner = partner[-1]
-	else:
+	if partner is None:
 		await call.answer('Вы еще не зарегистрированы в системе')
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
 		return
 
-	result, code = await APIRequest.get(
-		f'/base/achstats?partnerhash={partner["partner_hash"]}'
-	)
+	result, code = await achievement_stats(partner['partner_hash'])
 
 	api_count = result['api_count']
 
-	cpartners = await APIRequest.post(
-		'/partner/find', {'opts': {'referrer_hash': partner['partner_hash']}}
-	)
+	cpartners = await find_referals(partner['partner_hash'])
 	cpartners = cpartners[0]['partners']
 
 	opts = {'game': 'Mines', 'referal_parent': partner['partner_hash']}
@@ -1317,13 +766,13 @@ async def reload_achievs_callback(call: CallbackQuery):
 	count = achievements['count']
 	thresholds = achievements['thresholds']
 
-	loaded_achievs = loaded_achievements.get(call.from_user.id, {})
+	loaded_achievs = await loaded_achievements.get(call.from_user.id, {})
 
 	loaded_count = loaded_achievs.get('count')
 
 	if count > loaded_count:
 		loaded_thresholds = loaded_achievs['thresholds']
-		loaded_achievements[call.from_user.id] = achievements
+		await loaded_achievements.set(call.from_user.id, achievements)
 
 		users_count = list(
 			set(thresholds['users_count']) - set(loaded_thresholds['users_count'])
@@ -1421,38 +870,24 @@ async def reload_achievs_callback(call: CallbackQuery):
 			api_count,
 		)
 
-		data = user_achievements.get(call.from_user.id, {})
+		data = await user_achievements.get(call.from_user.id, {})
 		data['achievements'] = {}
-		user_achievements[call.from_user.id] = data
+		await user_achievements.set(call.from_user.id, data)
 	else:
 		await call.answer('Вы не выполнили ни одного достижения')
 
 
 @default_router.callback_query(F.data.startswith('my_achievs'), IsConfirmed())
-async def my_achievs_callback(call: CallbackQuery):
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners']
-
+async def my_achievs_callback(call: CallbackQuery, partner: Optional[Partner]):
 	messages = []
 
-	if partner:
-		partner = partner[-1]
-	else:
+	if partner is None:
 		await call.answer('Вы еще не зарегистрированы в системе')
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
 		return
 
-	result, code = await APIRequest.get(
-		f'/base/achstats?partnerhash={partner["partner_hash"]}'
-	)
+	result, code = await achievement_stats(partner['partner_hash'])
 
-	cpartners = await APIRequest.post(
-		'/partner/find', {'opts': {'referrer_hash': partner['partner_hash']}}
-	)
+	cpartners = await find_referals(partner['partner_hash'])
 	cpartners = cpartners[0]['partners']
 
 	api_count = result['api_count']
@@ -1549,49 +984,30 @@ def check_achievements_var2(
 
 
 @default_router.callback_query(F.data.startswith('achievements'), IsConfirmed())
-async def achievements_callback(call: CallbackQuery):
+async def achievements_callback(call: CallbackQuery, partner: Optional[Partner]):
 	if call.data == 'achievements_false':
-		data = user_achievements.get(call.from_user.id, {})
+		data = await user_achievements.get(call.from_user.id, {})
 		data['alerts'] = False
-		user_achievements[call.from_user.id] = data
+		await user_achievements.set(call.from_user.id, data)
 	elif call.data == 'achievements_true':
-		data = user_achievements.get(call.from_user.id, {})
+		data = await user_achievements.get(call.from_user.id, {})
 		data['alerts'] = True
-		user_achievements[call.from_user.id] = data
-
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners']
+		await user_achievements.set(call.from_user.id, data)
 
 	messages = []
 
-	if partner:
-		partner = partner[-1]
-	else:
-		if not partner['approved']:
-			await call.answer('Вы заблокированы')
-			return
-		else:
-			await call.answer('Вы еще не зарегистрированы в системе')
-			return
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
+	if partner is None:
+		await call.answer('Вы еще не зарегистрированы в системе')
 		return
 
-	if user_achievements.get(call.from_user.id, {}).get('achievements', {}):
-		achievements = user_achievements.get(call.from_user.id, {})
+	if (await user_achievements.get(call.from_user.id, {})).get('achievements', {}):
+		achievements = await user_achievements.get(call.from_user.id, {})
 
 		messages += achievements['achievements']
 	else:
-		result, code = await APIRequest.get(
-			f'/base/achstats?partnerhash={partner["partner_hash"]}'
-		)
+		result, code = await achievement_stats(partner['partner_hash'])
 
-		cpartners = await APIRequest.post(
-			'/partner/find', {'opts': {'referrer_hash': partner['partner_hash']}}
-		)
+		cpartners = await find_referals(partner['partner_hash'])
 		cpartners = cpartners[0]['partners']
 
 		logger.error(len(cpartners))
@@ -1611,26 +1027,29 @@ async def achievements_callback(call: CallbackQuery):
 			api_count,
 		)
 
-		loaded_achievements[call.from_user.id] = check_achievements_for_reload(
-			data['users_count'],
-			result['income'],
-			result['deposits_sum'],
-			result['first_deposits_count'],
-			len(cpartners),
-			result['signals_count'],
-			api_count,
+		await loaded_achievements.set(
+			call.from_user.id,
+			check_achievements_for_reload(
+				data['users_count'],
+				result['income'],
+				result['deposits_sum'],
+				result['first_deposits_count'],
+				len(cpartners),
+				result['signals_count'],
+				api_count,
+			),
 		)
 
 		messages += achievements
 
-		data = user_achievements.get(call.from_user.id, {})
+		data = await user_achievements.get(call.from_user.id, {})
 		data['achievements'] = achievements
-		user_achievements[call.from_user.id] = data
+		await user_achievements.set(call.from_user.id, data)
 
 	messages += [
 		(
 			'\n✅ Уведомления включены\n'
-			if user_achievements.get(call.from_user.id, {}).get('alerts', True)
+			if (await user_achievements.get(call.from_user.id, {})).get('alerts', True)
 			else '\n❌ Уведомления выключены\n'
 		),
 		'Продолжайте в том же духе и достигайте новых высот! 🌟',
@@ -1640,7 +1059,7 @@ async def achievements_callback(call: CallbackQuery):
 		'\n'.join(messages),
 		parse_mode=ParseMode.HTML,
 		reply_markup=inline.create_achievements_markup(
-			user_achievements.get(call.from_user.id, {}).get('alerts', True)
+			(await user_achievements.get(call.from_user.id, {})).get('alerts', True)
 		),
 	)
 
@@ -1666,17 +1085,8 @@ async def record_creo_callback(call: CallbackQuery):
 
 
 @default_router.callback_query(F.data == 'work', IsConfirmed())
-async def work_callback(call: CallbackQuery):
-	try:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-
-		if not partner['approved']:
-			await call.answer('Вы заблокированы')
-			return
-	except Exception:
+async def work_callback(call: CallbackQuery, partner: Optional[Partner]):
+	if partner is None:
 		messages = [
 			'💻️ WORK\n\n<b>ССЫЛКИ НА БОТОВ</b>\nMines - <code>https://t.me/IziMin_test_Bot</code>',
 			'Lucky Jet - <code>https://t.me/CashJetBot</code>',
@@ -1754,9 +1164,9 @@ async def adminpanel_callback(call: CallbackQuery):
 		)
 
 
-def get_top_workers_place_description(place: str):
-	# Get top workers place description based on sinwin_data
-	top_workers = sinwin_data.get('topworkers', False)
+async def get_top_workers_place_description(place: str):
+	# Get top workers place description based on data.json registries
+	top_workers = await get_topworkers()
 
 	if top_workers:
 		place_data = top_workers.get(place, {})
@@ -1780,9 +1190,10 @@ def get_top_workers_place_description(place: str):
 
 
 @default_router.callback_query(F.data == 'top_workers', IsConfirmed())
-async def top_workers_callback(call: CallbackQuery):
+async def top_workers_callback(call: CallbackQuery, partner: Optional[Partner]):
 	# 🥇🥈🥉🏅
-	result, code = await APIRequest.get('/base/stats?exclude=1')
+	result, code = await StatsCache.get('/base/stats?exclude=1')
+	note = stale_note(result)
 
 	stats = result['data']
 	income = (
@@ -1799,24 +1210,12 @@ async def top_workers_callback(call: CallbackQuery):
 	partners = {}
 
 	if call.from_user.id not in config.secrets.ADMINS_IDS:
-		result = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-		)
-		user = result[0]['partners']
-
-		if user:
-			user = user[-1]
-			userp = user['partner_hash']
-
-			if not user['approved']:
-				users[call.from_user.id] = users.get(call.from_user.id, {})
-				users[call.from_user.id]['final'] = False
-				await call.answer('Вы заблокированы')
-				return
-		else:
+		if partner is None:
 			await call.answer('Вы заблокированы')
 			return
 
+		userp = partner['partner_hash']
+
 	for partner in income:
 		partner_hash = partner['partner_hash']
 		if userp == partner_hash:
@@ -1852,9 +1251,9 @@ async def top_workers_callback(call: CallbackQuery):
 	else:
 		messages.append('')
 
-	first_place_desc = get_top_workers_place_description('first_place')
-	second_place_desc = get_top_workers_place_description('second_place')
-	third_place_desc = get_top_workers_place_description('third_place')
+	first_place_desc = await get_top_workers_place_description('first_place')
+	second_place_desc = await get_top_workers_place_description('second_place')
+	third_place_desc = await get_top_workers_place_description('third_place')
 
 	messages += [
 		'📅 Статистика обнуляется 1 числа каждого месяца.\n',
@@ -1862,6 +1261,7 @@ async def top_workers_callback(call: CallbackQuery):
 		f'<code>💵 {second_place_desc}</code>',
 		f'<code>💵 {third_place_desc}</code>\n\n🚀 Удачи в достижении новых высот!',
 	]
+	messages += note
 
 	await call.message.edit_text(
 		'\n'.join(messages),
@@ -1871,19 +1271,12 @@ async def top_workers_callback(call: CallbackQuery):
 
 
 @default_router.callback_query(F.data == 'withdraws_history', IsConfirmed())
-async def withdraws_history_callback(call: CallbackQuery):
+async def withdraws_history_callback(call: CallbackQuery, partner: Optional[Partner]):
 	# 🟢🟡⚪️
-	result = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	user = result[0]['partners']
-
-	if not user:
+	if partner is None:
 		await call.answer('Вы заблокированы')
 		return
 
-	user = user[-1]
-
 	# data = withdraws_history.get(partner_hash, {})
 	# data[transaction_id] = {
 	# 	'status': '⚪️ Вывод на обработке',
@@ -1893,17 +1286,17 @@ async def withdraws_history_callback(call: CallbackQuery):
 	# }
 	# withdraws_history[partner_hash] = data
 
-	if not withdraws_history.get(user['partner_hash'], False):
+	if not await withdraws_history.get(partner['partner_hash'], False):
 		messages = ['🤖 История выводов: 0']
 	else:
-		withdraws = withdraws_history.get(user['partner_hash'])
+		withdraws = await withdraws_history.get(partner['partner_hash'])
 		messages = [f'🤖 История выводов: {len(withdraws)}']
 
 		withdraws = dict(reversed(withdraws.items()))
 
 		for _, data in withdraws.items():
 			messages.append(
-				f'{data["status"]}\n├ {data["date"].strftime("%H:%M %d-%m-%Y")}: {data["sum"]}: {data["type"]}'
+				f'{data["status"]}\n├ {datetime.fromisoformat(data["date"]).strftime("%H:%M %d-%m-%Y")}: {data["sum"]}: {data["type"]}'
 			)
 
 	await call.message.edit_text(
@@ -1969,134 +1362,45 @@ def get_status_conditions(
 
 
 @default_router.callback_query(F.data == 'status_levels', IsConfirmed())
-async def status_levels_callback(call: CallbackQuery):
+async def status_levels_callback(call: CallbackQuery, partner: Optional[Partner]):
 	if call.from_user.id in config.secrets.ADMINS_IDS:
 		await call.answer('Для просмотра условий перехода обратитесь к админпанели')
 		return
 
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
-
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners']
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
-	if partner:
-		partner = partner[-1]
-	else:
+	if partner is None:
 		await call.answer('Доступ запрещен')
 		return
 
-	today_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['today']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	today_income = sum(
-		[
-			dep['x']
-			for dep in stats['today']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_income = sum(
-		[
-			dep['x']
-			for dep in stats['yesterday']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_week']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_month']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	other_dates_income = [info for name, info in stats.items() if name == 'income']
-	others_income = sum(
-		[
-			dep['x']
-			for dep in other_dates_income
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	other_dates_firstdep = [info for name, info in stats.items() if name == 'firstdep']
-	others_firstdep = len(
-		[
-			dep['x']
-			for dep in other_dates_firstdep
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	alltime_firstdeps = (
-		others_firstdep
-		+ today_firstdeps
-		+ yesterday_firstdeps
-		+ last_week_firstdeps
-		+ last_month_firstdeps
-	)
-	alltime_income = (
-		today_income
-		+ yesterday_income
-		+ last_week_income
-		+ last_month_income
-		+ others_income
-	)
-
-	last_month_income = (
-		today_income + yesterday_income + last_week_income + last_month_income
-	)
+	summary = snapshot.summary(partner['partner_hash'])
 
 	statuses1, _ = get_status_conditions(
-		'новичок', last_month_income, alltime_income, alltime_firstdeps
+		'новичок',
+		summary['month_income'],
+		summary['alltime_income'],
+		summary['alltime_firstdeps'],
 	)
 
 	statuses2, _ = get_status_conditions(
-		'специалист', last_month_income, alltime_income, alltime_firstdeps
+		'специалист',
+		summary['month_income'],
+		summary['alltime_income'],
+		summary['alltime_firstdeps'],
 	)
 
 	statuses3, _ = get_status_conditions(
-		'профессионал', last_month_income, alltime_income, alltime_firstdeps
+		'профессионал',
+		summary['month_income'],
+		summary['alltime_income'],
+		summary['alltime_firstdeps'],
 	)
 
 	statuses4, _ = get_status_conditions(
-		'мастер', last_month_income, alltime_income, alltime_firstdeps
+		'мастер',
+		summary['month_income'],
+		summary['alltime_income'],
+		summary['alltime_firstdeps'],
 	)
 
 	messages = [
@@ -2129,11 +1433,9 @@ async def status_levels_callback(call: CallbackQuery):
 
 
 @default_router.callback_query(F.data == 'status', IsConfirmed())
-async def status_callback(call: CallbackQuery):
+async def status_callback(call: CallbackQuery, partner: Optional[Partner]):
 	# ❌✅🏆️📊🎯💼💰️
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
 	if call.from_user.id in config.secrets.ADMINS_IDS:
 		await call.answer(
@@ -2141,18 +1443,7 @@ async def status_callback(call: CallbackQuery):
 		)
 		return
 	else:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-		)
-		partner = partners[0]['partners']
-
-		if partner:
-			partner = partner[-1]
-
-			if not partner['approved']:
-				await call.answer('Вы заблокированы')
-				return
-		else:
+		if partner is None:
 			await call.answer('Доступ запрещен')
 			return
 
@@ -2164,191 +1455,16 @@ async def status_callback(call: CallbackQuery):
 
 		data = await collect_stats(opts)
 
-		api_count = result['api_count'].get(partner['partner_hash'], 0)
-
-		today_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		yesterday_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_week_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_firstdeps = len(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		today_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['today']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['today']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		yesterday_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['yesterday']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		last_week_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_week']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		last_month_deps = sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['dep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		) + sum(
-			[
-				dep['amount']
-				for dep in stats['last_month']['firstdep']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		today_income = sum(
-			[
-				dep['x']
-				for dep in stats['today']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		yesterday_income = sum(
-			[
-				dep['x']
-				for dep in stats['yesterday']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_week_income = sum(
-			[
-				dep['x']
-				for dep in stats['last_week']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		last_month_income = sum(
-			[
-				dep['x']
-				for dep in stats['last_month']['income']
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		other_dates_income = [info for name, info in stats.items() if name == 'income']
-		others_income = sum(
-			[
-				dep['x']
-				for dep in other_dates_income
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-		other_dates_dep = [info for name, info in stats.items() if name == 'dep']
-		others_dep = sum(
-			[
-				dep['x']
-				for dep in other_dates_dep
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		other_dates_firstdep = [
-			info for name, info in stats.items() if name == 'firstdep'
-		]
-		others_firstdep = len(
-			[
-				dep['x']
-				for dep in other_dates_firstdep
-				if dep['partner_hash'] == partner['partner_hash']
-			]
-		)
-
-		alltime_firstdeps = (
-			others_firstdep
-			+ today_firstdeps
-			+ yesterday_firstdeps
-			+ last_week_firstdeps
-			+ last_month_firstdeps
-		)
-
-		last_month_firstdeps = (
-			last_month_firstdeps
-			+ last_week_firstdeps
-			+ yesterday_firstdeps
-			+ today_firstdeps
-		)
-
-		alltime_deps = (
-			today_deps + yesterday_deps + last_week_deps + last_month_deps + others_dep
-		)
-		alltime_income = (
-			today_income
-			+ yesterday_income
-			+ last_week_income
-			+ last_month_income
-			+ others_income
-		)
-
-		signals_gens = sum(
-			[
-				info.get(partner['partner_hash'], 0)
-				for _, info in result['signals'].items()
-			]
-		)
-
-		last_month_income = (
-			today_income + yesterday_income + last_week_income + last_month_income
-		)
+		summary = snapshot.summary(partner['partner_hash'])
 
-		last_month_income_str = '{:,}'.format(last_month_income).replace(',', ' ')
-		alltime_income_str = '{:,}'.format(alltime_income).replace(',', ' ')
+		last_month_income_str = '{:,}'.format(summary['month_income']).replace(',', ' ')
+		alltime_income_str = '{:,}'.format(summary['alltime_income']).replace(',', ' ')
 
 		statuses, may_up = get_status_conditions(
-			partner['status'], last_month_income, alltime_income, last_month_firstdeps
+			partner['status'],
+			summary['month_income'],
+			summary['alltime_income'],
+			summary['month_firstdeps'],
 		)
 
 		statuses_conditions = {
@@ -2386,7 +1502,7 @@ async def status_callback(call: CallbackQuery):
 			f'🎯 Вы получаете: {showed_percent}%\n',
 			f'📊 Ваш доход за последний месяц: {last_month_income_str} RUB',
 			f'💼 Общий доход: {alltime_income_str} RUB',
-			f'💰️ Первые депозиты за последний месяц: {last_month_firstdeps}\n',
+			f'💰️ Первые депозиты за последний месяц: {summary["month_firstdeps"]}\n',
 			'Условия для перехода:',
 			f'{statuses["income"]} Доход за последний месяц: не менее {statuses_conditions[partner["status"]]["last_month_income"]} рублей',
 			f'{statuses["total_income"]} Общий доход за все время: не менее {statuses_conditions[partner["status"]]["alltime_income"]} рублей',
@@ -2400,7 +1516,9 @@ async def status_callback(call: CallbackQuery):
 
 		if partner['status'] == 'специалист' and partner['is_referal'] and may_up:
 			crpartners = await APIRequest.post(
-				'/partner/find', {'opts': {'partner_hash': partner['referrer_hash']}}
+				'/partner/find',
+				{'opts': {'partner_hash': partner['referrer_hash']}},
+				cache=False,
 			)
 			logger.debug(f'partner: {partner} result: {crpartners}')
 			crpartner = crpartners[0]['partners']
@@ -2416,15 +1534,16 @@ async def status_callback(call: CallbackQuery):
 
 			await APIRequest.post('/partner/update', {**crpartner})
 
-			await bot.send_message(
+			await sender.send_message(
 				chat_id=crpartner['tg_id'],
 				text=f'Ваш реферал #{call.from_user.id} перешел на статус “Профессионал 45%”\nВам зачислено на баланс 15 000 рублей',
 			)
 
 			for admin in config.secrets.ADMINS_IDS:
-				await bot.send_message(
+				await sender.send_message(
 					chat_id=admin,
 					text=f'Пользователь {call.from_user.username if call.from_user.username is not None else call.from_user.id} перешел со статуса “Специалист 40 %” на статус “Профессионал 45 %”\nПользователь {crpartner["partner_hash"]} получил 15 000 рублей',
+					priority=SendQueue.BULK,
 				)
 
 		if may_up and partner['status'] == 'профессионал':
@@ -2438,7 +1557,7 @@ async def status_callback(call: CallbackQuery):
 			)
 			for admin in config.secrets.ADMINS_IDS:
 				try:
-					await bot.send_message(
+					await sender.send_message(
 						chat_id=admin,
 						text=f"""
 Tg id: {call.from_user.id}
@@ -2453,11 +1572,11 @@ Tg id: {call.from_user.id}
 
 💰️ Баланс: {partner['balance']} RUB
 
-Депозиты за все время: {alltime_deps}
-Доход за все время: {alltime_income}
-Первые депозиты за все время: {alltime_firstdeps}
-API за все время: {api_count}
-Сгенерировано сигналов: {signals_gens}
+Депозиты за все время: {summary['alltime_deps']}
+Доход за все время: {summary['alltime_income']}
+Первые депозиты за все время: {summary['alltime_firstdeps']}
+API за все время: {summary['api_count']}
+Сгенерировано сигналов: {summary['signals_gens']}
 
 Пользователей на этапе регистрации: {data['users_notreg_count']}
 Пользователей на этапе пополнения: {data['users_nottopup_count']}
@@ -2468,28 +1587,29 @@ API за все время: {api_count}
 ├ Пользователей за неделю: {data['users_lastweek']}
 └ Пользователей за месяц: {data['users_month']}
 
-Сумма депозитов за сегодня: {today_deps}
-├ Сумма депозитов за вчера: {yesterday_deps}
-├ Сумма депозитов за неделю: {last_week_deps}
-└ Сумма депозитов за месяц: {last_month_deps}
+Сумма депозитов за сегодня: {summary['today_deps']}
+├ Сумма депозитов за вчера: {summary['yesterday_deps']}
+├ Сумма депозитов за неделю: {summary['last_week_deps']}
+└ Сумма депозитов за месяц: {summary['last_month_deps']}
 
-Первые депозиты за сегодня: {today_firstdeps}
-├ Первые депозиты за вчера: {yesterday_firstdeps}
-├ Первые депозиты за неделю: {last_week_firstdeps}
-└ Первые депозиты за месяц: {last_month_firstdeps}
+Первые депозиты за сегодня: {summary['today_firstdeps']}
+├ Первые депозиты за вчера: {summary['yesterday_firstdeps']}
+├ Первые депозиты за неделю: {summary['last_week_firstdeps']}
+└ Первые депозиты за месяц: {summary['month_firstdeps']}
 
-Доход за сегодня: {today_income}
-├ Доход за вчера: {yesterday_income}
-├ Доход за неделю: {last_week_income}
-└ Доход за месяц: {last_month_income}
+Доход за сегодня: {summary['today_income']}
+├ Доход за вчера: {summary['yesterday_income']}
+├ Доход за неделю: {summary['last_week_income']}
+└ Доход за месяц: {summary['month_income']}
 """,
 						reply_markup=inline.create_confirm_status_change(
 							call.from_user.id
 						),
 						parse_mode=ParseMode.HTML,
+						priority=SendQueue.BULK,
 					)
 				except Exception:
-					await bot.send_message(
+					await sender.send_message(
 						chat_id=admin,
 						text=f"""
 Tg id: {call.from_user.id}
@@ -2504,11 +1624,11 @@ Tg id: {call.from_user.id}
 
 💰️ Баланс: {partner['balance']} RUB
 
-Депозиты за все время: {alltime_deps}
-Доход за все время: {alltime_income}
-Первые депозиты за все время: {alltime_firstdeps}
-API за все время: {api_count}
-Сгенерировано сигналов: {signals_gens}
+Депозиты за все время: {summary['alltime_deps']}
+Доход за все время: {summary['alltime_income']}
+Первые депозиты за все время: {summary['alltime_firstdeps']}
+API за все время: {summary['api_count']}
+Сгенерировано сигналов: {summary['signals_gens']}
 
 Пользователей на этапе регистрации: {data['users_notreg_count']}
 Пользователей на этапе пополнения: {data['users_nottopup_count']}
@@ -2519,20 +1639,20 @@ API за все время: {api_count}
 ├ Пользователей за неделю: {data['users_lastweek']}
 └ Пользователей за месяц: {data['users_month']}
 
-Сумма депозитов за сегодня: {today_deps}
-├ Сумма депозитов за вчера: {yesterday_deps}
-├ Сумма депозитов за неделю: {last_week_deps}
-└ Сумма депозитов за месяц: {last_month_deps}
+Сумма депозитов за сегодня: {summary['today_deps']}
+├ Сумма депозитов за вчера: {summary['yesterday_deps']}
+├ Сумма депозитов за неделю: {summary['last_week_deps']}
+└ Сумма депозитов за месяц: {summary['last_month_deps']}
 
-Первые депозиты за сегодня: {today_firstdeps}
-├ Первые депозиты за вчера: {yesterday_firstdeps}
-├ Первые депозиты за неделю: {last_week_firstdeps}
-└ Первые депозиты за месяц: {last_month_firstdeps}
+Первые депозиты за сегодня: {summary['today_firstdeps']}
+├ Первые депозиты за вчера: {summary['yesterday_firstdeps']}
+├ Первые депозиты за неделю: {summary['last_week_firstdeps']}
+└ Первые депозиты за месяц: {summary['month_firstdeps']}
 
-Доход за сегодня: {today_income}
-├ Доход за вчера: {yesterday_income}
-├ Доход за неделю: {last_week_income}
-└ Доход за месяц: {last_month_income}
+Доход за сегодня: {summary['today_income']}
+├ Доход за вчера: {summary['yesterday_income']}
+├ Доход за неделю: {summary['last_week_income']}
+└ Доход за месяц: {summary['month_income']}
 """,
 						reply_markup=inline.create_confirm_status_change(
 							call.from_user.id, withwrite=False
@@ -2545,6 +1665,12 @@ API за все время: {api_count}
 			and partner['status'] != 'мастер'
 			and partner['status'] != 'легенда'
 		):
+			partner = await fresh_partner(partner)
+
+			if partner is None:
+				await call.answer('⚠️ Сервер недоступен, попробуйте позже')
+				return
+
 			showed_percent = (
 				partner['showed_percent']
 				if partner['showed_percent'] != 'default'
@@ -2579,10 +1705,12 @@ async def send_message_about_status_change(status: str, userid: int):
 	scheduler.remove_job(f'{status}status_{userid}')
 
 	if status == 'confirm':
-		partner = await APIRequest.post('/partner/find', {'opts': {'tg_id': userid}})
+		partner = await APIRequest.post(
+			'/partner/find', {'opts': {'tg_id': userid}}, cache=False
+		)
 		partner = partner[0]['partners'][-1]
 		# showed_percent = partner["showed_percent"] if partner["showed_percent"] != "default" else get_percent_by_status(partner["status"]) + partner["additional_percent"] * 100
-		await bot.send_message(
+		await sender.send_message(
 			chat_id=userid,
 			text=f"""
 ✅ Вы соответствуете условиям для перехода на следующий уровень!
@@ -2597,7 +1725,7 @@ async def send_message_about_status_change(status: str, userid: int):
 
 		await APIRequest.post('/partner/update', {**partner})
 	else:
-		await bot.send_message(
+		await sender.send_message(
 			chat_id=userid,
 			text="""
 ❌ Ваш запрос на переход на статус “Мастер” отклонен.
@@ -2638,7 +1766,7 @@ async def confirm_status_change_user(call: CallbackQuery, scheduler=scheduler):
 	)
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_message(
+		await sender.send_message(
 			chat_id=admin,
 			text=f"""
 Ник: {partner['username']}
@@ -2648,6 +1776,7 @@ async def confirm_status_change_user(call: CallbackQuery, scheduler=scheduler):
 ✅ Пользователь перешел со статуса со статуса “Профессионал 45%” на статус “Мастер 50%”		
 """,
 			reply_markup=inline.change_status_moving(userid),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -2681,7 +1810,7 @@ async def reject_status_change_user(call: CallbackQuery, scheduler=scheduler):
 	)
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_message(
+		await sender.send_message(
 			chat_id=admin,
 			text=f"""
 Ник: {partner['username']}
@@ -2691,6 +1820,7 @@ async def reject_status_change_user(call: CallbackQuery, scheduler=scheduler):
 ❌ Пользователь  не перешел со статуса со статуса “Профессионал 45%” на статус “Мастер 50%”	
 """,
 			reply_markup=inline.change_status_moving(userid),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -2698,186 +1828,26 @@ async def reject_status_change_user(call: CallbackQuery, scheduler=scheduler):
 async def change_status_moving_callback(call: CallbackQuery):
 	userid = int(call.data.replace('change_status_moving_', ''))
 
-	result, code = await APIRequest.get('/base/stats')
-
-	stats = result['data']
+	snapshot, result = await StatsCache.get_snapshot('/base/stats')
 
 	partners = await APIRequest.post('/partner/find', {'opts': {'tg_id': userid}})
 	partner = partners[0]['partners']
 
-	opts = {'referal_parent': partner['partner_hash']}
-
-	data = await collect_stats(opts)
-
-	api_count = len(
-		[
-			apinum
-			for partnerhash, apinum in result['api_count'].items()
-			if partnerhash == partner['partner_hash']
-		]
-	)
-
-	today_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['today']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_firstdeps = len(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	today_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['today']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['today']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['yesterday']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_week']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['last_week']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_deps = sum(
-		[
-			dep['amount']
-			for dep in stats['last_month']['firstdep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	) + sum(
-		[
-			dep['amount']
-			for dep in stats['last_month']['dep']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	today_income = sum(
-		[
-			dep['x']
-			for dep in stats['today']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	yesterday_income = sum(
-		[
-			dep['x']
-			for dep in stats['yesterday']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_week_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_week']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	last_month_income = sum(
-		[
-			dep['x']
-			for dep in stats['last_month']['income']
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-	other_dates_income = [info for name, info in stats.items() if name == 'income']
-	others_income = sum(
-		[
-			dep['x']
-			for dep in other_dates_income
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	alltime_deps = today_deps + yesterday_deps + last_week_deps + last_month_deps
-	other_dates_firstdep = [info for name, info in stats.items() if name == 'firstdep']
-	others_firstdep = len(
-		[
-			dep['x']
-			for dep in other_dates_firstdep
-			if dep['partner_hash'] == partner['partner_hash']
-		]
-	)
-
-	alltime_firstdeps = (
-		others_firstdep
-		+ today_firstdeps
-		+ yesterday_firstdeps
-		+ last_week_firstdeps
-		+ last_month_firstdeps
-	)
-	alltime_income = (
-		today_income
-		+ yesterday_income
-		+ last_week_income
-		+ last_month_income
-		+ others_income
-	)
-
-	signals_gens = sum(
-		[info[partner['partner_hash']] for _, info in result['signals'].items()]
-	)
-
-	statuses, may_up = get_status_conditions(
-		partner['status'], last_month_income, alltime_income, last_month_firstdeps
-	)
-
 	if partner:
 		partner = partner[-1]
 	else:
 		await call.answer('Невозможно найти партнера')
 		return
 
+	opts = {'referal_parent': partner['partner_hash']}
+
+	data = await collect_stats(opts)
+
+	summary = snapshot.summary(partner['partner_hash'])
+
 	for admin in config.secrets.ADMINS_IDS:
 		try:
-			await bot.send_message(
+			await sender.send_message(
 				chat_id=admin,
 				text=f"""
 Tg id: {userid}
@@ -2892,11 +1862,11 @@ Tg id: {userid}
 
 💰️ Баланс: {partner['balance']} RUB
 
-Депозиты за все время: {alltime_deps}
-Доход за все время: {alltime_income}
-Первые депозиты за все время: {alltime_firstdeps}
-API за все время: {api_count}
-Сгенерировано сигналов: {signals_gens}
+Депозиты за все время: {summary['alltime_deps']}
+Доход за все время: {summary['alltime_income']}
+Первые депозиты за все время: {summary['alltime_firstdeps']}
+API за все время: {summary['api_count']}
+Сгенерировано сигналов: {summary['signals_gens']}
 
 Пользователей на этапе регистрации: {data['users_notreg_count']}
 Пользователей на этапе пополнения: {data['users_nottopup_count']}
@@ -2907,26 +1877,27 @@ API за все время: {api_count}
 ├ Пользователей за неделю: {data['users_lastweek']}
 └ Пользователей за месяц: {data['users_month']}
 
-Сумма депозитов за сегодня: {today_deps}
-├ Сумма депозитов за вчера: {yesterday_deps}
-├ Сумма депозитов за неделю: {last_week_deps}
-└ Сумма депозитов за месяц: {last_month_deps}
+Сумма депозитов за сегодня: {summary['today_deps']}
+├ Сумма депозитов за вчера: {summary['yesterday_deps']}
+├ Сумма депозитов за неделю: {summary['last_week_deps']}
+└ Сумма депозитов за месяц: {summary['last_month_deps']}
 
-Первые депозиты за сегодня: {today_firstdeps}
-├ Первые депозиты за вчера: {yesterday_firstdeps}
-├ Первые депозиты за неделю: {last_week_firstdeps}
-└ Первые депозиты за месяц: {last_month_firstdeps}
+Первые депозиты за сегодня: {summary['today_firstdeps']}
+├ Первые депозиты за вчера: {summary['yesterday_firstdeps']}
+├ Первые депозиты за неделю: {summary['last_week_firstdeps']}
+└ Первые депозиты за месяц: {summary['last_month_firstdeps']}
 
-Доход за сегодня: {today_income}
-├ Доход за вчера: {yesterday_income}
-├ Доход за неделю: {last_week_income}
-└ Доход за месяц: {last_month_income}
+Доход за сегодня: {summary['today_income']}
+├ Доход за вчера: {summary['yesterday_income']}
+├ Доход за неделю: {summary['last_week_income']}
+└ Доход за месяц: {summary['last_month_income']}
 """,
 				reply_markup=inline.create_confirm_status_change(call.from_user.id),
 				parse_mode=ParseMode.HTML,
+				priority=SendQueue.BULK,
 			)
 		except Exception:
-			await bot.send_message(
+			await sender.send_message(
 				chat_id=admin,
 				text=f"""
 Tg id: {userid}
@@ -2941,11 +1912,11 @@ Tg id: {userid}
 
 💰️ Баланс: {partner['balance']} RUB
 
-Депозиты за все время: {alltime_deps}
-Доход за все время: {alltime_income}
-Первые депозиты за все время: {alltime_firstdeps}
-API за все время: {api_count}
-Сгенерировано сигналов: {signals_gens}
+Депозиты за все время: {summary['alltime_deps']}
+Доход за все время: {summary['alltime_income']}
+Первые депозиты за все время: {summary['alltime_firstdeps']}
+API за все время: {summary['api_count']}
+Сгенерировано сигналов: {summary['signals_gens']}
 
 Пользователей на этапе регистрации: {data['users_notreg_count']}
 Пользователей на этапе пополнения: {data['users_nottopup_count']}
@@ -2956,20 +1927,20 @@ API за все время: {api_count}
 ├ Пользователей за неделю: {data['users_lastweek']}
 └ Пользователей за месяц: {data['users_month']}
 
-Сумма депозитов за сегодня: {today_deps}
-├ Сумма депозитов за вчера: {yesterday_deps}
-├ Сумма депозитов за неделю: {last_week_deps}
-└ Сумма депозитов за месяц: {last_month_deps}
+Сумма депозитов за сегодня: {summary['today_deps']}
+├ Сумма депозитов за вчера: {summary['yesterday_deps']}
+├ Сумма депозитов за неделю: {summary['last_week_deps']}
+└ Сумма депозитов за месяц: {summary['last_month_deps']}
 
-Первые депозиты за сегодня: {today_firstdeps}
-├ Первые депозиты за вчера: {yesterday_firstdeps}
-├ Первые депозиты за неделю: {last_week_firstdeps}
-└ Первые депозиты за месяц: {last_month_firstdeps}
+Первые депозиты за сегодня: {summary['today_firstdeps']}
+├ Первые депозиты за вчера: {summary['yesterday_firstdeps']}
+├ Первые депозиты за неделю: {summary['last_week_firstdeps']}
+└ Первые депозиты за месяц: {summary['last_month_firstdeps']}
 
-Доход за сегодня: {today_income}
-├ Доход за вчера: {yesterday_income}
-├ Доход за неделю: {last_week_income}
-└ Доход за месяц: {last_month_income}
+Доход за сегодня: {summary['today_income']}
+├ Доход за вчера: {summary['yesterday_income']}
+├ Доход за неделю: {summary['last_week_income']}
+└ Доход за месяц: {summary['last_month_income']}
 """,
 				reply_markup=inline.create_confirm_status_change(
 					call.from_user.id, withwrite=False
@@ -2979,7 +1950,9 @@ API за все время: {api_count}
 
 
 @default_router.callback_query(F.data == 'profile', IsConfirmed())
-async def profile_callback(call: CallbackQuery):
+async def profile_callback(
+	call: CallbackQuery, partner: Optional[Partner], partner_as_of: Optional[str]
+):
 	if call.from_user.id in config.secrets.ADMINS_IDS:
 		balance, status_code = await APIRequest.get('/base/admin_balance')
 		messages = [
@@ -2989,6 +1962,7 @@ async def profile_callback(call: CallbackQuery):
 			'⚖️ Статус: Админ',
 			'🏗️ Количество рефералов: 0',
 		]
+		messages += stale_note(balance)
 
 		await call.message.edit_text(
 			'\n'.join(messages),
@@ -2997,15 +1971,6 @@ async def profile_callback(call: CallbackQuery):
 		)
 		return
 
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
-		return
-
 	partner_hash = partner.get('partner_hash', 'Недоступно')
 	status = partner.get('status', 'новичок')
 
@@ -3014,10 +1979,8 @@ async def profile_callback(call: CallbackQuery):
 	difference = cur_date - reg_date
 	days_difference = max(difference.days, 1)
 
-	cpartners = await APIRequest.post(
-		'/partner/find', {'opts': {'referrer_hash': partner['partner_hash']}}
-	)
-	cpartners = cpartners[0]['partners']
+	cpartners_result, status_code = await find_referals(partner['partner_hash'])
+	cpartners = cpartners_result['partners']
 
 	showed_percent = (
 		partner['showed_percent']
@@ -3036,6 +1999,7 @@ async def profile_callback(call: CallbackQuery):
 		f'☯️ Количество дней с нами: {days_difference}',
 		# f'Ваша реферальная ссылка на @IziMin_test_Bot: https://t.me/IziMin_test_Bot?start='
 	]
+	messages += stale_note(cpartners_result, as_of=partner_as_of)
 
 	await call.message.edit_text(
 		'\n'.join(messages),
@@ -3045,15 +2009,8 @@ async def profile_callback(call: CallbackQuery):
 
 
 @default_router.callback_query(F.data == 'withdraw', IsConfirmed())
-async def withdraw_callback(call: CallbackQuery):
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners']
-
-	if partner:
-		partner = partner[-1]
-	else:
+async def withdraw_callback(call: CallbackQuery, partner: Optional[Partner]):
+	if partner is None:
 		await call.answer('Недоступно получение партнера')
 		return
 
@@ -3159,25 +2116,21 @@ async def withdraw_crypto_callback(call: CallbackQuery, state: FSMContext):
 	CryptoWithdrawGroup.withdraw_card,
 	IsConfirmed,
 )
-async def crypto_set_withdraw_type(call: CallbackQuery, state: FSMContext):
+async def crypto_set_withdraw_type(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	crypto_type = call.data.replace('crypto_set_withdraw_', '').lower()
 	limit = LIMITS.get(crypto_type, (1500.0, 665070.0))
 
 	await state.update_data(withdraw_card=crypto_type, limit=limit)
 
-	users[call.message.chat.id] = {
-		'final': True,
-		'withdraw_card': True,
-	}
-
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
+	await users.set(
+		call.message.chat.id,
+		{
+			'final': True,
+			'withdraw_card': True,
+		},
 	)
-	partner = partners[0]['partners'][-1]
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
-		return
 
 	message = f'💰️ Баланс: {partner["balance"]} RUB\nВывод на криптовалюту {crypto_type.upper()}\n\nВведите адрес вашего криптокошелька: '
 
@@ -3202,16 +2155,9 @@ async def crypto_set_withdraw_type(call: CallbackQuery, state: FSMContext):
 
 
 @default_router.message(F.text, CryptoWithdrawGroup.address, IsConfirmed())
-async def withdraw_crypto_address(message: Message, state: FSMContext):
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': message.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
-
-	if not partner['approved']:
-		await message.answer('Вы заблокированы')
-		return
-
+async def withdraw_crypto_address(
+	message: Message, state: FSMContext, partner: Optional[Partner]
+):
 	data = await state.get_data()
 	crypto_type = data.get('withdraw_card').lower()
 	limit = LIMITS.get(crypto_type, (1500.0, 665070.0))
@@ -3221,10 +2167,11 @@ async def withdraw_crypto_address(message: Message, state: FSMContext):
 	await state.update_data(address=message.text)
 	await state.update_data(withdraw_card=f'{crypto_type.upper()} {message.text}')
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/crupto.jpg')
+	image = f'{config.SINWIN_DATA}/main/crupto.jpg'
 
-	await message.answer_photo(
-		photo=image,
+	await send_cached_photo(
+		message.answer_photo,
+		image,
 		caption=messages,
 		parse_mode=ParseMode.HTML,
 		reply_markup=inline.create_back_markup('withdraw'),
@@ -3234,17 +2181,14 @@ async def withdraw_crypto_address(message: Message, state: FSMContext):
 
 
 @default_router.message(F.text, CryptoWithdrawGroup.withdraw_sum, IsConfirmed)
-async def withdraw_crypto_message(message: Message, state: FSMContext):
-	user = users.get(message.chat.id, {})
+async def withdraw_crypto_message(
+	message: Message, state: FSMContext, partner: Optional[Partner]
+):
+	user = await users.get(message.chat.id, {})
 
-	try:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': message.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-	except Exception as ex:
+	if partner is None:
 		await message.answer(
-			f'Произошла ошибка: {ex}',
+			'Вы еще не зарегистрированы в системе',
 			reply_markup=inline.create_back_markup('profile'),
 		)
 		return
@@ -3294,14 +2238,13 @@ async def withdraw_crypto_message(message: Message, state: FSMContext):
 	CryptoWithdrawGroup.approved,
 	IsConfirmed,
 )
-async def user_approve_crypto_withdraw(call: CallbackQuery, state: FSMContext):
+async def user_approve_crypto_withdraw(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	data = await state.get_data()
-	user = users.get(call.message.chat.id, {})
+	user = await users.get(call.message.chat.id, {})
 	user['withdraw_card'] = False
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
+	await users.set(call.message.chat.id, user)
 	await state.clear()
 
 	partner_hash = partner.get('partner_hash', 'Недоступно')
@@ -3337,23 +2280,27 @@ async def user_approve_crypto_withdraw(call: CallbackQuery, state: FSMContext):
 		reply_markup=inline.create_back_markup('profile'),
 	)
 
-	tdata = withdraws_history.get(partner_hash, {})
-	tdata[transac['preview_id']] = {
-		'status': '⚪️ Вывод на обработке',
-		'type': '👑 Крипта',
-		'sum': data['withdraw_sum'],
-		'date': datetime.now(),
-	}
-	withdraws_history[partner_hash] = tdata
+	await withdraws_history.update(
+		partner_hash,
+		**{
+			str(transac['preview_id']): {
+				'status': '⚪️ Вывод на обработке',
+				'type': '👑 Крипта',
+				'sum': data['withdraw_sum'],
+				'date': datetime.now().isoformat(),
+			}
+		},
+	)
 
-	transactions_dict[transaction_id] = data
+	await transactions_dict.set(transaction_id, data)
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/crupto.jpg')
+	image = f'{config.SINWIN_DATA}/main/crupto.jpg'
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_photo(
+		await send_cached_photo(
+			sender.send_photo,
+			image,
 			chat_id=admin,
-			photo=image,
 			caption=f"""Tg id: {call.from_user.id}
 Ник: {call.from_user.username}
 Реферал: {partner['is_referal']}
@@ -3367,33 +2314,32 @@ Id Вывода: {transac['preview_id']}
 			reply_markup=inline.create_admin_transaction_menu(
 				transaction_id, admin, 'crypto'
 			),
+			priority=SendQueue.BULK,
 		)
 
 
 @default_router.callback_query(F.data == 'withdraw_card', IsConfirmed())
-async def withdraw_card_callback(call: CallbackQuery, state: FSMContext):
+async def withdraw_card_callback(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	await state.clear()
 
-	users[call.message.chat.id] = {
-		'final': True,
-		'withdraw_card': True,
-	}
-
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
+	await users.set(
+		call.message.chat.id,
+		{
+			'final': True,
+			'withdraw_card': True,
+		},
 	)
-	partner = partners[0]['partners'][-1]
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
-		return
 
 	message = f'💰️ Баланс: {partner["balance"]} RUB\n💳️ Visa или MasterCard\nЛимит одного вывода: 2 000 ₽ - 50 000 ₽\n\n<code>Вывод средств на карты банков РФ может происходить с задержкой. Чтобы совершать выводы максимально быстро, рекомендуем использовать карту Сбера.</code>\n\n✍️ Введите сумму которую Вы хотите вывести.'
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/card.jpg')
+	image = f'{config.SINWIN_DATA}/main/card.jpg'
 
-	await call.message.edit_media(
-		InputMediaPhoto(media=image, caption=message, parse_mode=ParseMode.HTML),
+	await edit_cached_photo(
+		call.message,
+		image,
+		caption=message,
 		parse_mode=ParseMode.HTML,
 		reply_markup=inline.create_back_markup('withdraw'),
 	)
@@ -3402,17 +2348,14 @@ async def withdraw_card_callback(call: CallbackQuery, state: FSMContext):
 
 
 @default_router.message(F.text, CardWithdrawGroup.withdraw_sum, IsConfirmed())
-async def withdraw_card_message(message: Message, state: FSMContext):
-	user = users.get(message.chat.id, {})
+async def withdraw_card_message(
+	message: Message, state: FSMContext, partner: Optional[Partner]
+):
+	user = await users.get(message.chat.id, {})
 
-	try:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': message.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-	except Exception as ex:
+	if partner is None:
 		await message.answer(
-			f'Произошла ошибка: {ex}',
+			'Вы еще не зарегистрированы в системе',
 			reply_markup=inline.create_back_markup('profile'),
 		)
 		return
@@ -3458,12 +2401,13 @@ async def withdraw_card_message(message: Message, state: FSMContext):
 @default_router.message(F.text, CardWithdrawGroup.withdraw_card, IsConfirmed())
 async def withdraw_withdraw_card_message(message: Message, state: FSMContext):
 	text = message.text
-	user = users.get(message.chat.id, {})
+	user = await users.get(message.chat.id, {})
 	status = is_valid_card(text)
 
 	if status is None:
 		# await state.clear()
 		user['withdraw_card'] = False
+		await users.set(message.chat.id, user)
 		await message.answer(
 			'Ошибка: некорректный номер карты\n\nПожалуйста, введите корректный номер банковской карты, состоящий из 16 цифр, без пробелов.',
 			reply_markup=inline.create_back_markup('withdraw_card'),
@@ -3471,6 +2415,7 @@ async def withdraw_withdraw_card_message(message: Message, state: FSMContext):
 	elif not status:
 		# await state.clear()
 		user['withdraw_card'] = False
+		await users.set(message.chat.id, user)
 		await message.answer(
 			'Ошибка: некорректный номер карты\n\nВведенный номер карты не прошел проверку. Пожалуйста, проверьте номер и введите корректный номер банковской карты, состоящий из 16 цифр, без пробелов.',
 			reply_markup=inline.create_back_markup('withdraw_card'),
@@ -3490,14 +2435,13 @@ async def withdraw_withdraw_card_message(message: Message, state: FSMContext):
 	CardWithdrawGroup.approved,
 	IsConfirmed,
 )
-async def user_approve_card_withdraw(call: CallbackQuery, state: FSMContext):
+async def user_approve_card_withdraw(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	data = await state.get_data()
-	user = users.get(call.message.chat.id, {})
+	user = await users.get(call.message.chat.id, {})
 	user['withdraw_card'] = False
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
+	await users.set(call.message.chat.id, user)
 	await state.clear()
 
 	partner_hash = partner.get('partner_hash', 'Недоступно')
@@ -3533,23 +2477,27 @@ async def user_approve_card_withdraw(call: CallbackQuery, state: FSMContext):
 		reply_markup=inline.create_back_markup('profile'),
 	)
 
-	tdata = withdraws_history.get(partner_hash, {})
-	tdata[transac['preview_id']] = {
-		'status': '⚪️ Вывод на обработке',
-		'type': '💳 Карта',
-		'sum': data['withdraw_sum'],
-		'date': datetime.now(),
-	}
-	withdraws_history[partner_hash] = tdata
+	await withdraws_history.update(
+		partner_hash,
+		**{
+			str(transac['preview_id']): {
+				'status': '⚪️ Вывод на обработке',
+				'type': '💳 Карта',
+				'sum': data['withdraw_sum'],
+				'date': datetime.now().isoformat(),
+			}
+		},
+	)
 
-	transactions_dict[transaction_id] = data
+	await transactions_dict.set(transaction_id, data)
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/card.jpg')
+	image = f'{config.SINWIN_DATA}/main/card.jpg'
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_photo(
+		await send_cached_photo(
+			sender.send_photo,
+			image,
 			chat_id=admin,
-			photo=image,
 			caption=f"""Tg id: {call.from_user.id}
 Ник: {call.from_user.username}
 Реферал: {partner['is_referal']}
@@ -3563,6 +2511,7 @@ Id Вывода: {transac['preview_id']}
 			reply_markup=inline.create_admin_transaction_menu(
 				transaction_id, admin, 'card'
 			),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -3574,7 +2523,7 @@ async def send_message_about_transaction_to_user(
 	transactype: str = '💳 Карта',
 ):
 	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'partner_hash': partner_hash}}
+		'/partner/find', {'opts': {'partner_hash': partner_hash}}, cache=False
 	)
 	partner = partners[0]['partners'][-1]
 
@@ -3585,8 +2534,12 @@ async def send_message_about_transaction_to_user(
 
 	scheduler.remove_job(f'sendtransac_{transaction_id}')
 
+	# jobs of other workers may finalize the same transaction
+	if not await transactions_schedulded.claim(transaction_id):
+		return
+
 	if partner['balance'] - int(sum_to_withdraw.replace(' ', '')) < 0.0:
-		await bot.send_message(
+		await sender.send_message(
 			chat_id=partner['tg_id'],
 			text=f'❌ Ваш вывод был отклонен системой по причине: недостаточно средств на балансе.\n\n🛡 Ваш хэш: {partner_hash}\n🆔 ID Вывода: {transac["preview_id"]}\n\nСумма вывода: {sum_to_withdraw}₽',
 			reply_markup=inline.create_back_markup('profile'),
@@ -3595,20 +2548,21 @@ async def send_message_about_transaction_to_user(
 
 	partner['balance'] -= int(sum_to_withdraw.replace(' ', ''))
 
-	transactions_schedulded[transaction_id] = False
-
-	tdata = withdraws_history.get(partner_hash, {})
-	tdata[transac['preview_id']] = {
-		'status': '🟢 Вывод произведен',
-		'type': transactype,
-		'sum': transac['amount'],
-		'date': datetime.now(),
-	}
-	withdraws_history[partner_hash] = tdata
+	await withdraws_history.update(
+		partner_hash,
+		**{
+			str(transac['preview_id']): {
+				'status': '🟢 Вывод произведен',
+				'type': transactype,
+				'sum': transac['amount'],
+				'date': datetime.now().isoformat(),
+			}
+		},
+	)
 
 	await APIRequest.post('/partner/update', {**partner})
 
-	await bot.send_message(
+	await sender.send_message(
 		chat_id=partner['tg_id'],
 		text=f'✅Ваш вывод средств успешно обработан и находиться на выплате. Средства должны прийти в течение 24 часов.\n\n🛡 Ваш хэш: {partner_hash}\n🆔 ID Вывода: {transac["preview_id"]}\n\nСпасибо за использование нашего сервиса! Если средства не поступят в течение 24 часов, пожалуйста, свяжитесь с поддержкой',
 		reply_markup=inline.create_back_markup('profile'),
@@ -3636,20 +2590,25 @@ async def send_message_about_ftransaction_to_user(
 
 	scheduler.remove_job(f'fsendtransac_{transaction_id}')
 
-	transactions_schedulded[transaction_id] = False
+	# jobs of other workers may finalize the same transaction
+	if not await transactions_schedulded.claim(transaction_id):
+		return
 
-	tdata = withdraws_history.get(partner_hash, {})
-	tdata[transac['preview_id']] = {
-		'status': '🟡 Вывод отклонен',
-		'type': transactype,
-		'sum': transac['amount'],
-		'date': datetime.now(),
-	}
-	withdraws_history[partner_hash] = tdata
+	await withdraws_history.update(
+		partner_hash,
+		**{
+			str(transac['preview_id']): {
+				'status': '🟡 Вывод отклонен',
+				'type': transactype,
+				'sum': transac['amount'],
+				'date': datetime.now().isoformat(),
+			}
+		},
+	)
 
 	reason = f'Причина отказа: {reason}\n' if reason is not None else reason
 
-	await bot.send_message(
+	await sender.send_message(
 		chat_id=partner['tg_id'],
 		text=f"""
 ❌ Ваш запрос на вывод средств был отклонен.
@@ -3700,7 +2659,7 @@ async def admin_approve_transaction(call: CallbackQuery, scheduler=scheduler):
 	)
 	transaction = transactions[0]['transactions'][-1]
 
-	if transactions_schedulded.get(transaction['id'], False):
+	if await transactions_schedulded.get(transaction['id'], False, fresh=True):
 		await call.answer(
 			f'Транзакция {transaction["preview_id"]} уже обработана другим администратором'
 		)
@@ -3710,7 +2669,7 @@ async def admin_approve_transaction(call: CallbackQuery, scheduler=scheduler):
 
 	await APIRequest.post('/transaction/update', {**transaction})
 
-	data = transactions_dict.get(transaction_id, {})
+	data = await transactions_dict.get(transaction_id, {})
 	sum_to_withdraw = f'{data["withdraw_sum"]:,}'.replace(',', ' ')
 
 	try:
@@ -3737,7 +2696,7 @@ async def admin_approve_transaction(call: CallbackQuery, scheduler=scheduler):
 	)
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_message(
+		await sender.send_message(
 			chat_id=admin,
 			text=f"""✅Вывод средств успешно обработан
 
@@ -3750,6 +2709,7 @@ async def admin_approve_transaction(call: CallbackQuery, scheduler=scheduler):
 {names.get(method, 'Данные')}: <code>{data['withdraw_card']}</code>""",
 			parse_mode=ParseMode.HTML,
 			reply_markup=inline.admin_change_transaction(transaction_id),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -3765,7 +2725,7 @@ async def badmin_dispprove_transaction(call: CallbackQuery, state: FSMContext):
 	)
 	transaction = transactions[0]['transactions'][-1]
 
-	if transactions_schedulded.get(transaction['id'], False):
+	if await transactions_schedulded.get(transaction['id'], False, fresh=True):
 		await call.answer(
 			f'Транзакция {transaction["preview_id"]} уже обработана другим администратором'
 		)
@@ -3777,7 +2737,7 @@ async def badmin_dispprove_transaction(call: CallbackQuery, state: FSMContext):
 
 	await call.answer()
 
-	await bot.send_message(
+	await sender.send_message(
 		chat_id=admin_id,
 		text='Напишите причину отказа',
 		reply_markup=inline.create_cancel_reason_markup(transaction_id),
@@ -3809,7 +2769,7 @@ async def empty_cancel_reason(
 	await APIRequest.post('/transaction/update', {**transaction})
 	sum_to_withdraw = f'{transaction["amount"]:,}'.replace(',', ' ')
 
-	if transactions_schedulded.get(transaction['id'], False):
+	if await transactions_schedulded.get(transaction['id'], False, fresh=True):
 		await call.answer(
 			f'Транзакция {transaction["preview_id"]} уже обработана другим администратором'
 		)
@@ -3839,7 +2799,7 @@ async def empty_cancel_reason(
 	)
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_message(
+		await sender.send_message(
 			chat_id=admin,
 			text=f"""
 ❌ Вывод средств был отклонен
@@ -3854,6 +2814,7 @@ async def empty_cancel_reason(
 """,
 			parse_mode=ParseMode.HTML,
 			reply_markup=inline.admin_change_transaction(transaction['id']),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -3871,7 +2832,7 @@ async def empty_cancel_reaso_msgn(
 	)
 	transaction = transactions[0]['transactions'][-1]
 
-	if transactions_schedulded.get(transaction['id'], False):
+	if await transactions_schedulded.get(transaction['id'], False, fresh=True):
 		await message.answer(
 			f'Транзакция {transaction["preview_id"]} уже обработана другим администратором'
 		)
@@ -3906,7 +2867,7 @@ async def empty_cancel_reaso_msgn(
 	)
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_message(
+		await sender.send_message(
 			chat_id=admin,
 			text=f"""
 ❌ Вывод средств был отклонен
@@ -3922,6 +2883,7 @@ async def empty_cancel_reaso_msgn(
 """,
 			parse_mode=ParseMode.HTML,
 			reply_markup=inline.admin_change_transaction(transaction['id']),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -3934,7 +2896,7 @@ async def change_transaction_status(call: CallbackQuery):
 	)
 	transaction = transactions[0]['transactions'][-1]
 
-	if transactions_schedulded.get(transaction['id'], False):
+	if await transactions_schedulded.get(transaction['id'], False, fresh=True):
 		await call.answer(
 			f'Транзакция {transaction["preview_id"]} уже обработана другим администратором'
 		)
@@ -3946,7 +2908,7 @@ async def change_transaction_status(call: CallbackQuery):
 	partner = partners[0]['partners'][-1]
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_message(
+		await sender.send_message(
 			chat_id=admin,
 			text=f"""Tg id: {call.from_user.id}
 Ник: {call.from_user.username}
@@ -3961,6 +2923,7 @@ Id Вывода: {transaction['preview_id']}
 			reply_markup=inline.create_admin_transaction_menu(
 				transaction_id, admin, 'card'
 			),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -3968,29 +2931,27 @@ Id Вывода: {transaction['preview_id']}
 
 
 @default_router.callback_query(F.data == 'withdraw_steam', IsConfirmed())
-async def withdraw_steam_callback(call: CallbackQuery, state: FSMContext):
+async def withdraw_steam_callback(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	await state.clear()
 
-	users[call.message.chat.id] = {
-		'final': True,
-		'withdraw_card': True,
-	}
-
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
+	await users.set(
+		call.message.chat.id,
+		{
+			'final': True,
+			'withdraw_card': True,
+		},
 	)
-	partner = partners[0]['partners'][-1]
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
-		return
 
 	message = f'💰️ Баланс: {partner["balance"]} RUB\nВывод на аккаунт Steam\nЛимит одного вывода: от 2 000 ₽ до 12 000 ₽\n\n✍️ Введите сумму которую Вы хотите вывести.'
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/steam.jpg')
+	image = f'{config.SINWIN_DATA}/main/steam.jpg'
 
-	await call.message.edit_media(
-		InputMediaPhoto(media=image, caption=message, parse_mode=ParseMode.HTML),
+	await edit_cached_photo(
+		call.message,
+		image,
+		caption=message,
 		parse_mode=ParseMode.HTML,
 		reply_markup=inline.create_back_markup('withdraw'),
 	)
@@ -3999,17 +2960,14 @@ async def withdraw_steam_callback(call: CallbackQuery, state: FSMContext):
 
 
 @default_router.message(F.text, SteamWithdrawGroup.withdraw_sum, IsConfirmed())
-async def withdraw_steam_message(message: Message, state: FSMContext):
-	user = users.get(message.chat.id, {})
+async def withdraw_steam_message(
+	message: Message, state: FSMContext, partner: Optional[Partner]
+):
+	user = await users.get(message.chat.id, {})
 
-	try:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': message.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-	except Exception as ex:
+	if partner is None:
 		await message.answer(
-			f'Произошла ошибка: {ex}',
+			'Вы еще не зарегистрированы в системе',
 			reply_markup=inline.create_back_markup('profile'),
 		)
 		return
@@ -4071,14 +3029,13 @@ async def withdraw_withdraw_steam_message(message: Message, state: FSMContext):
 	SteamWithdrawGroup.approved,
 	IsConfirmed,
 )
-async def user_approve_steam_withdraw(call: CallbackQuery, state: FSMContext):
+async def user_approve_steam_withdraw(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	data = await state.get_data()
-	user = users.get(call.message.chat.id, {})
+	user = await users.get(call.message.chat.id, {})
 	user['withdraw_card'] = False
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
+	await users.set(call.message.chat.id, user)
 	await state.clear()
 
 	partner_hash = partner.get('partner_hash', 'Недоступно')
@@ -4114,23 +3071,27 @@ async def user_approve_steam_withdraw(call: CallbackQuery, state: FSMContext):
 		reply_markup=inline.create_back_markup('profile'),
 	)
 
-	tdata = withdraws_history.get(partner_hash, {})
-	tdata[transac['preview_id']] = {
-		'status': '⚪️ Вывод на обработке',
-		'type': '⚙️ Steam',
-		'sum': data['withdraw_sum'],
-		'date': datetime.now(),
-	}
-	withdraws_history[partner_hash] = tdata
+	await withdraws_history.update(
+		partner_hash,
+		**{
+			str(transac['preview_id']): {
+				'status': '⚪️ Вывод на обработке',
+				'type': '⚙️ Steam',
+				'sum': data['withdraw_sum'],
+				'date': datetime.now().isoformat(),
+			}
+		},
+	)
 
-	transactions_dict[transaction_id] = data
+	await transactions_dict.set(transaction_id, data)
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/steam.jpg')
+	image = f'{config.SINWIN_DATA}/main/steam.jpg'
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_photo(
+		await send_cached_photo(
+			sender.send_photo,
+			image,
 			chat_id=admin,
-			photo=image,
 			caption=f"""Tg id: {call.from_user.id}
 Ник: {call.from_user.username}
 Реферал: {partner['is_referal']}
@@ -4144,6 +3105,7 @@ Steam логин: <code>{data['withdraw_card']}</code>""",
 			reply_markup=inline.create_admin_transaction_menu(
 				transaction_id, admin, 'steam'
 			),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -4151,29 +3113,27 @@ Steam логин: <code>{data['withdraw_card']}</code>""",
 
 
 @default_router.callback_query(F.data == 'withdraw_phone', IsConfirmed())
-async def withdraw_phone_callback(call: CallbackQuery, state: FSMContext):
+async def withdraw_phone_callback(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	await state.clear()
 
-	users[call.message.chat.id] = {
-		'final': True,
-		'withdraw_card': True,
-	}
-
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
+	await users.set(
+		call.message.chat.id,
+		{
+			'final': True,
+			'withdraw_card': True,
+		},
 	)
-	partner = partners[0]['partners'][-1]
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
-		return
 
 	message = f'💰️ Баланс: {partner["balance"]} RUB\nВывод по номеру телефона\nЛимит одного вывода: от 5 000 ₽ до 100 000 ₽\n\n✍️ Введите сумму которую Вы хотите вывести.'
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/telefon.jpg')
+	image = f'{config.SINWIN_DATA}/main/telefon.jpg'
 
-	await call.message.edit_media(
-		InputMediaPhoto(media=image, caption=message, parse_mode=ParseMode.HTML),
+	await edit_cached_photo(
+		call.message,
+		image,
+		caption=message,
 		parse_mode=ParseMode.HTML,
 		reply_markup=inline.create_back_markup('withdraw'),
 	)
@@ -4182,17 +3142,14 @@ async def withdraw_phone_callback(call: CallbackQuery, state: FSMContext):
 
 
 @default_router.message(F.text, PhonenumberWithdrawGroup.withdraw_sum, IsConfirmed)
-async def withdraw_phone_message(message: Message, state: FSMContext):
-	user = users.get(message.chat.id, {})
+async def withdraw_phone_message(
+	message: Message, state: FSMContext, partner: Optional[Partner]
+):
+	user = await users.get(message.chat.id, {})
 
-	try:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': message.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-	except Exception as ex:
+	if partner is None:
 		await message.answer(
-			f'Произошла ошибка: {ex}',
+			'Вы еще не зарегистрированы в системе',
 			reply_markup=inline.create_back_markup('profile'),
 		)
 		return
@@ -4254,14 +3211,13 @@ async def withdraw_withdraw_phone_message(message: Message, state: FSMContext):
 	PhonenumberWithdrawGroup.approved,
 	IsConfirmed,
 )
-async def user_approve_phone_withdraw(call: CallbackQuery, state: FSMContext):
+async def user_approve_phone_withdraw(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	data = await state.get_data()
-	user = users.get(call.message.chat.id, {})
+	user = await users.get(call.message.chat.id, {})
 	user['withdraw_card'] = False
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
+	await users.set(call.message.chat.id, user)
 	await state.clear()
 
 	partner_hash = partner.get('partner_hash', 'Недоступно')
@@ -4297,23 +3253,27 @@ async def user_approve_phone_withdraw(call: CallbackQuery, state: FSMContext):
 		reply_markup=inline.create_back_markup('profile'),
 	)
 
-	tdata = withdraws_history.get(partner_hash, {})
-	tdata[transac['preview_id']] = {
-		'status': '⚪️ Вывод на обработке',
-		'type': '📱 Вывод по номеру',
-		'sum': data['withdraw_sum'],
-		'date': datetime.now(),
-	}
-	withdraws_history[partner_hash] = tdata
+	await withdraws_history.update(
+		partner_hash,
+		**{
+			str(transac['preview_id']): {
+				'status': '⚪️ Вывод на обработке',
+				'type': '📱 Вывод по номеру',
+				'sum': data['withdraw_sum'],
+				'date': datetime.now().isoformat(),
+			}
+		},
+	)
 
-	transactions_dict[transaction_id] = data
+	await transactions_dict.set(transaction_id, data)
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/telefon.jpg')
+	image = f'{config.SINWIN_DATA}/main/telefon.jpg'
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_photo(
+		await send_cached_photo(
+			sender.send_photo,
+			image,
 			chat_id=admin,
-			photo=image,
 			caption=f"""Tg id: {call.from_user.id}
 Ник: {call.from_user.username}
 Реферал: {partner['is_referal']}
@@ -4327,6 +3287,7 @@ Id Вывода: {transac['preview_id']}
 			reply_markup=inline.create_admin_transaction_menu(
 				transaction_id, admin, 'phone'
 			),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -4334,29 +3295,27 @@ Id Вывода: {transac['preview_id']}
 
 
 @default_router.callback_query(F.data == 'withdraw_fkwallet', IsConfirmed())
-async def withdraw_fkwallet_callback(call: CallbackQuery, state: FSMContext):
+async def withdraw_fkwallet_callback(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	await state.clear()
 
-	users[call.message.chat.id] = {
-		'final': True,
-		'withdraw_card': True,
-	}
-
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
+	await users.set(
+		call.message.chat.id,
+		{
+			'final': True,
+			'withdraw_card': True,
+		},
 	)
-	partner = partners[0]['partners'][-1]
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
-		return
 
 	message = f'💰️ Баланс: {partner["balance"]} RUB\nВывод на FK Wallet\nЛимит одного вывода: от 1 800 ₽ до 100 000 ₽\n\n✍️ Введите сумму которую Вы хотите вывести.'
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/FK.jpg')
+	image = f'{config.SINWIN_DATA}/main/FK.jpg'
 
-	await call.message.edit_media(
-		InputMediaPhoto(media=image, caption=message, parse_mode=ParseMode.HTML),
+	await edit_cached_photo(
+		call.message,
+		image,
+		caption=message,
 		parse_mode=ParseMode.HTML,
 		reply_markup=inline.create_back_markup('withdraw'),
 	)
@@ -4365,17 +3324,14 @@ async def withdraw_fkwallet_callback(call: CallbackQuery, state: FSMContext):
 
 
 @default_router.message(F.text, FKWalletWithdrawGroup.withdraw_sum, IsConfirmed)
-async def withdraw_fkwallet_message(message: Message, state: FSMContext):
-	user = users.get(message.chat.id, {})
+async def withdraw_fkwallet_message(
+	message: Message, state: FSMContext, partner: Optional[Partner]
+):
+	user = await users.get(message.chat.id, {})
 
-	try:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': message.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-	except Exception as ex:
+	if partner is None:
 		await message.answer(
-			f'Произошла ошибка: {ex}',
+			'Вы еще не зарегистрированы в системе',
 			reply_markup=inline.create_back_markup('profile'),
 		)
 		return
@@ -4437,14 +3393,13 @@ async def withdraw_withdraw_fkwallet_message(message: Message, state: FSMContext
 	FKWalletWithdrawGroup.approved,
 	IsConfirmed,
 )
-async def user_approve_fkwallet_withdraw(call: CallbackQuery, state: FSMContext):
+async def user_approve_fkwallet_withdraw(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	data = await state.get_data()
-	user = users.get(call.message.chat.id, {})
+	user = await users.get(call.message.chat.id, {})
 	user['withdraw_card'] = False
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
+	await users.set(call.message.chat.id, user)
 	await state.clear()
 
 	partner_hash = partner.get('partner_hash', 'Недоступно')
@@ -4480,23 +3435,27 @@ async def user_approve_fkwallet_withdraw(call: CallbackQuery, state: FSMContext)
 		reply_markup=inline.create_back_markup('profile'),
 	)
 
-	tdata = withdraws_history.get(partner_hash, {})
-	tdata[transac['preview_id']] = {
-		'status': '⚪️ Вывод на обработке',
-		'type': '👾 FK Wallet',
-		'sum': data['withdraw_sum'],
-		'date': datetime.now(),
-	}
-	withdraws_history[partner_hash] = tdata
+	await withdraws_history.update(
+		partner_hash,
+		**{
+			str(transac['preview_id']): {
+				'status': '⚪️ Вывод на обработке',
+				'type': '👾 FK Wallet',
+				'sum': data['withdraw_sum'],
+				'date': datetime.now().isoformat(),
+			}
+		},
+	)
 
-	transactions_dict[transaction_id] = data
+	await transactions_dict.set(transaction_id, data)
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/FK.jpg')
+	image = f'{config.SINWIN_DATA}/main/FK.jpg'
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_photo(
+		await send_cached_photo(
+			sender.send_photo,
+			image,
 			chat_id=admin,
-			photo=image,
 			caption=f"""Tg id: {call.from_user.id}
 Ник: {call.from_user.username}
 Реферал: {partner['is_referal']}
@@ -4510,6 +3469,7 @@ Id Вывода: {transac['preview_id']}
 			reply_markup=inline.create_admin_transaction_menu(
 				transaction_id, admin, 'fkwallet'
 			),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -4517,29 +3477,27 @@ Id Вывода: {transac['preview_id']}
 
 
 @default_router.callback_query(F.data == 'withdraw_piastrix', IsConfirmed())
-async def withdraw_piastrix_callback(call: CallbackQuery, state: FSMContext):
+async def withdraw_piastrix_callback(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	await state.clear()
 
-	users[call.message.chat.id] = {
-		'final': True,
-		'withdraw_card': True,
-	}
-
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
+	await users.set(
+		call.message.chat.id,
+		{
+			'final': True,
+			'withdraw_card': True,
+		},
 	)
-	partner = partners[0]['partners'][-1]
-
-	if not partner['approved']:
-		await call.answer('Вы заблокированы')
-		return
 
 	message = f'💰️ Баланс: {partner["balance"]} RUB\nВывод на Piastrix\nЛимит одного вывода: от 1 800 ₽ до 100 000 ₽\n\n✍️ Введите сумму которую Вы хотите вывести.'
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/piastrix.jpg')
+	image = f'{config.SINWIN_DATA}/main/piastrix.jpg'
 
-	await call.message.edit_media(
-		InputMediaPhoto(media=image, caption=message, parse_mode=ParseMode.HTML),
+	await edit_cached_photo(
+		call.message,
+		image,
+		caption=message,
 		parse_mode=ParseMode.HTML,
 		reply_markup=inline.create_back_markup('withdraw'),
 	)
@@ -4548,17 +3506,14 @@ async def withdraw_piastrix_callback(call: CallbackQuery, state: FSMContext):
 
 
 @default_router.message(F.text, PiastrixWithdrawGroup.withdraw_sum, IsConfirmed)
-async def withdraw_piastrix_message(message: Message, state: FSMContext):
-	user = users.get(message.chat.id, {})
+async def withdraw_piastrix_message(
+	message: Message, state: FSMContext, partner: Optional[Partner]
+):
+	user = await users.get(message.chat.id, {})
 
-	try:
-		partners = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': message.from_user.id}}
-		)
-		partner = partners[0]['partners'][-1]
-	except Exception as ex:
+	if partner is None:
 		await message.answer(
-			f'Произошла ошибка: {ex}',
+			'Вы еще не зарегистрированы в системе',
 			reply_markup=inline.create_back_markup('profile'),
 		)
 		return
@@ -4620,14 +3575,13 @@ async def withdraw_withdraw_piastrix_message(message: Message, state: FSMContext
 	PiastrixWithdrawGroup.approved,
 	IsConfirmed,
 )
-async def user_approve_piastrix_withdraw(call: CallbackQuery, state: FSMContext):
+async def user_approve_piastrix_withdraw(
+	call: CallbackQuery, state: FSMContext, partner: Optional[Partner]
+):
 	data = await state.get_data()
-	user = users.get(call.message.chat.id, {})
+	user = await users.get(call.message.chat.id, {})
 	user['withdraw_card'] = False
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': call.from_user.id}}
-	)
-	partner = partners[0]['partners'][-1]
+	await users.set(call.message.chat.id, user)
 	await state.clear()
 
 	partner_hash = partner.get('partner_hash', 'Недоступно')
@@ -4663,23 +3617,27 @@ async def user_approve_piastrix_withdraw(call: CallbackQuery, state: FSMContext)
 		reply_markup=inline.create_back_markup('profile'),
 	)
 
-	tdata = withdraws_history.get(partner_hash, {})
-	tdata[transac['preview_id']] = {
-		'status': '⚪️ Вывод на обработке',
-		'type': '🌸 Piastrix',
-		'sum': data['withdraw_sum'],
-		'date': datetime.now(),
-	}
-	withdraws_history[partner_hash] = tdata
+	await withdraws_history.update(
+		partner_hash,
+		**{
+			str(transac['preview_id']): {
+				'status': '⚪️ Вывод на обработке',
+				'type': '🌸 Piastrix',
+				'sum': data['withdraw_sum'],
+				'date': datetime.now().isoformat(),
+			}
+		},
+	)
 
-	transactions_dict[transaction_id] = data
+	await transactions_dict.set(transaction_id, data)
 
-	image = FSInputFile(path=f'{config.SINWIN_DATA}/main/piastrix.jpg')
+	image = f'{config.SINWIN_DATA}/main/piastrix.jpg'
 
 	for admin in config.secrets.ADMINS_IDS:
-		await bot.send_photo(
+		await send_cached_photo(
+			sender.send_photo,
+			image,
 			chat_id=admin,
-			photo=image,
 			caption=f"""Tg id: {call.from_user.id}
 Ник: {call.from_user.username}
 Реферал: {partner['is_referal']}
@@ -4693,6 +3651,7 @@ Id Вывода: {transac['preview_id']}
 			reply_markup=inline.create_admin_transaction_menu(
 				transaction_id, admin, 'piastrix'
 			),
+			priority=SendQueue.BULK,
 		)
 
 
@@ -4701,19 +3660,12 @@ Id Вывода: {transac['preview_id']}
 ############################################
 
 
-@default_router.message(F.text)
-async def text_handler(message: Message):
-	user = users.get(message.chat.id, {})
+@default_router.message(F.text, flags={'allow_blocked': True})
+async def text_handler(message: Message, partner: Optional[Partner]):
+	user = await users.get(message.chat.id, {})
 	await message.delete()
 
-	partners = await APIRequest.post(
-		'/partner/find', {'opts': {'tg_id': message.from_user.id}}
-	)
-	partner = partners[0]['partners']
-
-	if partner:
-		partner = partner[-1]
-
+	if partner is not None:
 		if not partner['approved']:
 			if not user.get('final', False):
 				return
@@ -14,13 +14,16 @@ import app.keyboards.inline as inline
 import app.keyboards.menu_inline as inlinem
 import app.keyboards.reply as reply
 from app.api import APIRequest
+from app.database.shared import SharedDict
 from app.database.test import users
 from app.loader import bot, config
 
-register_router = Router()
+register_router = Router(name='register')
 
-forms = {}
-referals = {}
+# registration form and start link referrer of user until registration
+# request is reviewed
+forms = SharedDict('forms', ttl=7 * 24 * 60 * 60)
+referals = SharedDict('referals', ttl=7 * 24 * 60 * 60)
 
 
 class RegUserGroup(StatesGroup):
@@ -71,13 +74,16 @@ async def cmd_start(message: Message):
 	referrer_id = str(start_command[7:]).strip()
 	is_referal = True if len(referrer_id) > 6 else False
 
-	referals[message.from_user.id] = {
-		'is_referal': is_referal,
-		'referrer_hash': referrer_id,
-	}
+	await referals.set(
+		message.from_user.id,
+		{
+			'is_referal': is_referal,
+			'referrer_hash': referrer_id,
+		},
+	)
 
-	if users.get(message.from_user.id, None) is None:
-		users[message.from_user.id] = {'final': False, 'count': 0}
+	if (await users.get(message.from_user.id, None)) is None:
+		await users.set(message.from_user.id, {'final': False, 'count': 0})
 
 	try:
 		partner = (
@@ -88,10 +94,10 @@ async def cmd_start(message: Message):
 		partner = None
 
 	if partner:
-		users[message.from_user.id] = {'final': False, 'count': 0}
+		await users.set(message.from_user.id, {'final': False, 'count': 0})
 
 		if partner['approved']:
-			users[message.from_user.id] = {'final': True, 'count': 0}
+			await users.set(message.from_user.id, {'final': True, 'count': 0})
 			await message.answer(
 				'🏠️ <b>Приветствуем!</b>\n\nСпасибо, что выбрали SinWin!',
 				parse_mode=ParseMode.HTML,
@@ -108,16 +114,16 @@ async def cmd_start(message: Message):
 			return
 
 	if (
-		users.get(message.from_user.id) is not None
+		(await users.get(message.from_user.id)) is not None
 		or partner is not None
 		or message.from_user.id in config.secrets.ADMINS_IDS
 	):
 		if (
-			users.get(message.from_user.id, {}).get('final', False)
+			(await users.get(message.from_user.id, {})).get('final', False)
 			and partner is not None
 			or message.from_user.id in config.secrets.ADMINS_IDS
 		):
-			users[message.from_user.id] = {'final': True, 'count': 0}
+			await users.set(message.from_user.id, {'final': True, 'count': 0})
 			await message.answer(
 				'🏠️ <b>Приветствуем!</b>\n\nСпасибо, что выбрали SinWin!',
 				parse_mode=ParseMode.HTML,
@@ -134,8 +140,8 @@ async def cmd_start(message: Message):
 
 @register_router.callback_query(F.data == 'submit_reg_request')
 async def accept_submitted_reg_request_callback(call: CallbackQuery, state: FSMContext):
-	count = users.get(call.from_user.id, {}).get('count', 1)
-	users[call.from_user.id]['count'] = 1 + count
+	count = (await users.get(call.from_user.id, {})).get('count', 1)
+	await users.update(call.from_user.id, count=1 + count)
 
 	await call.message.edit_text(
 		'Напишите Ваше имя и возраст в формате "Имя Возраст" (пример: Иван 22):'
@@ -346,11 +352,14 @@ async def handle_contact(message: Message, state: FSMContext):
 
 	await message.answer(messages, reply_markup=inline.create_final_req())
 
-	users[message.from_user.id] = {
-		'final': False,
-		'data': data,
-		'count': users[message.from_user.id].get('count', 1),
-	}
+	await users.set(
+		message.from_user.id,
+		{
+			'final': False,
+			'data': data,
+			'count': (await users.get(message.from_user.id, {})).get('count', 1),
+		},
+	)
 
 	await state.clear()
 
@@ -360,23 +369,22 @@ async def approve_user(call: CallbackQuery):
 	await call.answer()
 	tid = int(call.data.replace('approve_', ''))
 	try:
-		if users.get(tid, {}).get('final', False):
+		if (await users.get(tid, {})).get('final', False):
 			return
 
-		users_data = users.get(tid, {})
+		users_data = await users.get(tid, {})
 		data = users_data.get('data', {})
+		referal = await referals.get(tid, {})
 
 		data_creation = {
 			'number_phone': str(data.get('number_phone')),
 			'fullname': ' '.join(data.get('name').split(' ')[:-1]),
 			'username': str(data.get('username')),
-			'is_referal': referals[tid]['is_referal'],
+			'is_referal': referal['is_referal'],
 			'referrer_hash': (
-				referals[tid]['referrer_hash']
-				if referals[tid]['referrer_hash']
-				else None
+				referal['referrer_hash'] if referal['referrer_hash'] else None
 			),
-			'status': 'специалист' if referals[tid]['is_referal'] else 'новичок',
+			'status': 'специалист' if referal['is_referal'] else 'новичок',
 			'approved': True,
 			'balance': 100000.0,  # TODO: REMOVE THIS IN PROD
 			'arbitration_experience': 1 if data.get('experience_status') == 'Да' else 0,
@@ -390,13 +398,15 @@ async def approve_user(call: CallbackQuery):
 			'showed_percent': 'default',
 		}
 
-		partners = await APIRequest.post('/partner/find', {'opts': {'tg_id': str(tid)}})
+		partners = await APIRequest.post(
+			'/partner/find', {'opts': {'tg_id': str(tid)}}, cache=False
+		)
 		partner = partners[0]['partners']
 
 		if partner:
 			partner = partner[-1]
 
-			users[tid]['final'] = True
+			await users.update(tid, final=True)
 			partner['approved'] = True
 			partner['number_phone'] = str(data.get('number_phone'))
 			partner['fullname'] = str(data.get('fullname'))
@@ -422,25 +432,26 @@ async def approve_user(call: CallbackQuery):
 		result, status_code = await APIRequest.post('/partner/create', data_creation)
 
 		thispartner, status = await APIRequest.post(
-			'/partner/find', {'opts': {'tg_id': tid}}
+			'/partner/find', {'opts': {'tg_id': tid}}, cache=False
 		)
 		thispartner = thispartner['partners'][-1]
 
-		if referals[tid]['is_referal']:
+		if referal['is_referal']:
 			rpartners = await APIRequest.post(
 				'/partner/find',
-				{'opts': {'partner_hash': referals[tid]['referrer_hash']}},
+				{'opts': {'partner_hash': referal['referrer_hash']}},
 			)
 			rpartner = rpartners[0]['partners']
 
 			cpartners = await APIRequest.post(
 				'/partner/find',
-				{'opts': {'referrer_hash': referals[tid]['referrer_hash']}},
+				{'opts': {'referrer_hash': referal['referrer_hash']}},
+				cache=False,
 			)
 			cpartners = cpartners[0]['partners']
 			cpartner = cpartners[-1]
 
-			if cpartner['partner_hash'] == referals[tid]['referrer_hash']:
+			if cpartner['partner_hash'] == referal['referrer_hash']:
 				cpartner['is_referal'] = False
 				await APIRequest.post('/partner/update', {**cpartner})
 				return
@@ -467,7 +478,7 @@ async def approve_user(call: CallbackQuery):
 Реферал: Да""",
 					)
 
-		users[tid]['final'] = True
+		await users.update(tid, final=True)
 
 		if not result or status_code != 200:
 			logger.error(
@@ -507,7 +518,7 @@ async def resend_form_user(call: CallbackQuery):
 	await call.answer()
 	tid = int(call.data.replace('resend_form_', ''))
 
-	form = forms.get(tid, [])
+	form = await forms.get(tid, [])
 
 	await call.message.answer(
 		text='\n'.join(form),
@@ -521,19 +532,19 @@ async def disapprove_user(call: CallbackQuery):
 	tid = int(call.data.replace('disapprove_', ''))
 	await call.answer()
 
-	partners = await APIRequest.post('/partner/find', {'opts': {'tg_id': str(tid)}})
+	partners = await APIRequest.post(
+		'/partner/find', {'opts': {'tg_id': str(tid)}}, cache=False
+	)
 	partner = partners[0]['partners']
 
 	if partner:
-		users[tid] = users.get(tid, {})
-		users[tid]['final'] = False
+		await users.update(tid, final=False)
 		partner['approved'] = False
 
 		await APIRequest.post('/partner/update', {**partner})
 
 	try:
-		users[tid] = users.get(tid, {})
-		users[tid]['final'] = False
+		await users.update(tid, final=False)
 
 		await bot.send_message(
 			chat_id=tid,
@@ -559,8 +570,9 @@ async def disapprove_user(call: CallbackQuery):
 
 @register_router.callback_query(F.data == 'send_request')
 async def send_request_callback(call: CallbackQuery):
-	users_data = users.get(call.from_user.id, {})
+	users_data = await users.get(call.from_user.id, {})
 	data = users_data.get('data', {})
+	referal = await referals.get(call.from_user.id, {})
 
 	await call.answer()
 
@@ -572,7 +584,7 @@ async def send_request_callback(call: CallbackQuery):
 
 	rpartners = await APIRequest.post(
 		'/partner/find',
-		{'opts': {'partner_hash': referals[call.from_user.id]['referrer_hash']}},
+		{'opts': {'partner_hash': referal['referrer_hash']}},
 	)
 	rpartner = rpartners[0]['partners']
 
@@ -622,7 +634,7 @@ async def send_request_callback(call: CallbackQuery):
 		f'\n{datetime.now().strftime("%H:%M %d.%m.%Y")}',
 	]
 
-	forms[call.from_user.id] = form
+	await forms.set(call.from_user.id, form)
 
 	for admin_id in config.secrets.ADMINS_IDS:
 		await bot.send_message(
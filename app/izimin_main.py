@@ -10,7 +10,8 @@ from app import handlers, utils
 from app.api import APIRequest
 from app.keyboards.inline import create_registration_markup, create_single_signal_markup
 from app.loader import alerts, alerts_en, bot, config, dp, scheduleded_users, users_db
-from app.utils.fileloader import get_file
+from app.utils.fileloader import get_localized_image, send_cached_photo
+from app.utils.webhook import run_webhook
 
 
 class SchedulerMiddleware(BaseMiddleware):
@@ -23,14 +24,15 @@ class SchedulerMiddleware(BaseMiddleware):
 
 
 async def send_register_process_message(user_id, data):
-	photo = get_file('reg.jpg', users_db.get_user_language(user_id))
+	photo = get_localized_image('reg.jpg')
 	try:
 		await data['message'].delete()
 	except Exception:
 		pass
-	await bot.send_photo(
+	await send_cached_photo(
+		bot.send_photo,
+		photo,
 		chat_id=user_id,
-		photo=photo,
 		caption=(
 			alerts['reg']
 			if users_db.get_user_language(user_id) == 'RU_RU'
@@ -41,10 +43,11 @@ async def send_register_process_message(user_id, data):
 
 
 async def send_topup_process_message(user_id, data):
-	photo2 = get_file('dep.jpg', users_db.get_user_language(user_id))
-	await bot.send_photo(
+	photo2 = get_localized_image('dep.jpg')
+	await send_cached_photo(
+		bot.send_photo,
+		photo2,
 		chat_id=user_id,
-		photo=photo2,
 		caption=(
 			alerts['topup']
 			if users_db.get_user_language(user_id) == 'RU_RU'
@@ -57,14 +60,15 @@ async def send_topup_process_message(user_id, data):
 
 
 async def send_signal_message(user_id, data, alert: str = 'newsignal'):
-	photo = get_file('gen.jpg', users_db.get_user_language(user_id))
+	photo = get_localized_image('gen.jpg')
 	try:
 		await data['message'].delete()
 	except Exception:
 		pass
-	await bot.send_photo(
+	await send_cached_photo(
+		bot.send_photo,
+		photo,
 		chat_id=user_id,
-		photo=photo,
 		caption=(
 			alerts[alert]
 			if users_db.get_user_language(user_id) == 'RU_RU'
@@ -130,14 +134,15 @@ async def total_messaging():
 		time_difference = datetime.now() - data['date']
 
 		if time_difference >= timedelta(hours=23):
-			photo = get_file('gen.jpg', users_db.get_user_language(user_id))
+			photo = get_localized_image('gen.jpg')
 			try:
 				await data['message'].delete()
 			except Exception:
 				pass
-			await bot.send_photo(
+			await send_cached_photo(
+				bot.send_photo,
+				photo,
 				chat_id=user_id,
-				photo=photo,
 				caption=alerts['inactive24'],
 				reply_markup=create_registration_markup(
 					user_id, 'change_life', 'homeprofile'
@@ -176,14 +181,21 @@ async def main():
 	dp.include_routers(handlers.commands_router)
 	dp.include_routers(handlers.admin_router)
 
+	dp.startup.register(APIRequest.open_session)
 	dp.startup.register(on_startup)
+	dp.shutdown.register(APIRequest.close_session)
 
 	try:
-		logger.info('Start polling...')
-		await bot.delete_webhook(drop_pending_updates=True)
-		await dp.start_polling(bot, on_startup=on_startup)
+		if config.webhook.MODE == 'webhook':
+			logger.info('Start webhook...')
+			await run_webhook(dp, bot, config.metrics.HOST, config.metrics.PORT)
+		else:
+			logger.info('Start polling...')
+			await bot.delete_webhook(drop_pending_updates=True)
+			await dp.start_polling(bot, on_startup=on_startup)
 	finally:
 		logger.info('Close bot session...')
+		await APIRequest.close_session()
 		await bot.session.close()
 
 
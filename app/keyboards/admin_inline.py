@@ -703,6 +703,37 @@ def admin_send_partners_excel():
 	return builder.as_markup()
 
 
+def admin_all_partners_markup(offset: int, limit: int, has_next: bool):
+	builder = InlineKeyboardBuilder()
+
+	pages = []
+
+	if offset > 0:
+		pages.append(
+			InlineKeyboardButton(
+				text='⬅️ Назад',
+				callback_data=f'admin_all_partners_1win_{max(offset - limit, 0)}',
+			)
+		)
+	if has_next:
+		pages.append(
+			InlineKeyboardButton(
+				text='Вперед ➡️',
+				callback_data=f'admin_all_partners_1win_{offset + limit}',
+			)
+		)
+
+	if pages:
+		builder.row(*pages)
+
+	builder.row(
+		InlineKeyboardButton(text='Прислать отчет', callback_data='send_partners_excel')
+	)
+	builder.row(InlineKeyboardButton(text='🔙 Назад', callback_data='adminpanel'))
+
+	return builder.as_markup()
+
+
 def back_markup(callback: str = 'adminpanel'):
 	builder = InlineKeyboardBuilder()
 
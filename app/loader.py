@@ -1,16 +1,21 @@
+import os
+import tempfile
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict
 
 import orjson as json
 from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.fsm.storage.redis import DefaultKeyBuilder, RedisStorage
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from hermes_langlib.locales import LocaleManager
 from hermes_langlib.storage import load_config as i18n_load_config
 
 from app.config import get_config, load_config
 from app.database._debug import UsersDebug
+from app.utils.jsonlib import dumps, loads
 
 DEFAULT_DATA = {
 	'topworkers': {
@@ -103,14 +108,13 @@ def load_data():
 	return data
 
 
-sinwin_data = load_data()
+def write_data(data: dict):
+	# written to temporary file and renamed, so processes saving at once
+	# never leave half-written data.json
+	with tempfile.NamedTemporaryFile('wb', dir='.', delete=False) as file:
+		file.write(json.dumps(data))
 
-
-def save_data():
-	global sinwin_data
-
-	with open('data.json', 'wb') as file:
-		file.write(json.dumps(sinwin_data))
+	os.replace(file.name, 'data.json')
 
 
 ACHIEVEMENTS = {
@@ -394,9 +398,35 @@ locale_manager = LocaleManager(i18n_config, locales=['default.json'])
 
 users_db = UsersDebug()
 
-bot = Bot(token=config.secrets.TOKEN)
+bot = Bot(
+	token=config.secrets.TOKEN,
+	session=AiohttpSession(json_loads=loads, json_dumps=dumps),
+)
+
+
+def create_fsm_storage() -> BaseStorage:
+	"""
+	Create FSM storage by STORAGE.BACKEND: with redis unfinished flows
+	(registration, withdrawals, admin edits) survive restarts and are
+	shared by bot processes.
+
+	:returns:	FSM storage
+	:rtype:		BaseStorage
+	"""
+	if config.storage.BACKEND != 'redis':
+		return MemoryStorage()
+
+	# imported here: app.database.redis reads config of this module
+	from app.database.redis import get_redis
+
+	return RedisStorage(
+		get_redis(),
+		key_builder=DefaultKeyBuilder(prefix=f'{config.storage.PREFIX}:fsm'),
+		state_ttl=config.storage.FSM_STATE_TTL,
+		data_ttl=config.storage.FSM_DATA_TTL,
+		json_loads=loads,
+		json_dumps=dumps,
+	)
 
-dp = Dispatcher(storage=MemoryStorage())
 
-loaded_achievements: Dict[int, Dict[Any, Any]] = {}
-user_achievements: Dict[int, Any] = {}
+dp = Dispatcher(storage=create_fsm_storage())
@@ -0,0 +1,148 @@
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Message, TelegramObject, Update
+
+from app.api import STALE_STATUS, APIRequest, api_deadline, data_as_of
+from app.database.partners import Partner
+from app.loader import config
+from app.utils.metrics import registry
+
+
+class APIDeadlineMiddleware(BaseMiddleware):
+	"""
+	This class describes shared deadline of backend API calls of one update.
+	"""
+
+	def __init__(self, budget: Optional[float] = None):
+		"""
+		Constructs a new instance.
+
+		:param		budget:	 The seconds all API calls of update may take
+		:type		budget:	 Optional[float]
+		"""
+		self.budget = budget if budget is not None else config.api.UPDATE_DEADLINE
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: Dict[str, Any],
+	) -> Any:
+		token = api_deadline.set(time.monotonic() + self.budget)
+
+		try:
+			return await handler(event, data)
+		finally:
+			api_deadline.reset(token)
+
+
+class MetricsMiddleware(BaseMiddleware):
+	"""
+	This class describes collector of update and handler metrics.
+
+	Registered as outer middleware of dp.update it records throughput,
+	latency and errors by update type. Registered as middleware of event
+	observers (dp.message, dp.callback_query) it records latency and errors
+	by router and handler.
+	"""
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: Dict[str, Any],
+	) -> Any:
+		handler_object = data.get('handler')
+
+		if handler_object is not None:
+			router = data.get('event_router')
+			labels = {
+				'router': router.name if router is not None else '',
+				'handler': getattr(handler_object.callback, '__name__', 'unknown'),
+			}
+			histogram, errors = 'sinwin_handler_seconds', 'sinwin_handler_errors_total'
+		else:
+			update_type = event.event_type if isinstance(event, Update) else 'unknown'
+			labels = {'type': update_type}
+			histogram, errors = 'sinwin_update_seconds', 'sinwin_update_errors_total'
+			registry.inc('sinwin_updates_total', **labels)
+
+		started_at = time.monotonic()
+
+		try:
+			return await handler(event, data)
+		except Exception as ex:
+			registry.inc(errors, error=type(ex).__name__, **labels)
+			raise
+		finally:
+			registry.observe(histogram, time.monotonic() - started_at, **labels)
+
+
+class PartnerMiddleware(BaseMiddleware):
+	"""
+	This class describes resolver of partner who sent update.
+
+	Partner is looked up once per update (/partner/find by tg_id, repeated
+	lookups are served by PartnerCache) and is passed to handler as
+	`partner`, None if user is not registered, and `partner_as_of`, time of
+	stale record served while API is unavailable. Blocked partners are
+	answered here and handler is not called, unless handler has
+	`allow_blocked` flag. Admins are never blocked.
+	"""
+
+	@staticmethod
+	async def find(tg_id: int) -> Tuple[Optional[Partner], Optional[str], int]:
+		"""
+		Find partner by telegram id
+
+		:param		tg_id:	The telegram id
+		:type		tg_id:	int
+
+		:returns:	last partner record (None if there is no one), time of
+					stale record and status
+		:rtype:		Tuple[Optional[Partner], Optional[str], int]
+		"""
+		result, status = await APIRequest.post(
+			'/partner/find', {'opts': {'tg_id': tg_id}}
+		)
+
+		if not result or status not in (200, STALE_STATUS):
+			return None, None, status
+
+		partners = result['partners']
+
+		return (partners[-1] if partners else None), data_as_of(result), status
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: Dict[str, Any],
+	) -> Any:
+		user = data.get('event_from_user')
+
+		if user is None:
+			data['partner'] = data['partner_as_of'] = None
+			return await handler(event, data)
+
+		partner, as_of, status = await PartnerMiddleware.find(user.id)
+		data['partner'] = partner
+		data['partner_as_of'] = as_of
+
+		if user.id in config.secrets.ADMINS_IDS or get_flag(data, 'allow_blocked'):
+			return await handler(event, data)
+
+		if status not in (200, STALE_STATUS):
+			text = '⚠️ Сервер недоступен, попробуйте позже'
+		elif partner is not None and not partner['approved']:
+			text = 'Вы заблокированы'
+		else:
+			return await handler(event, data)
+
+		if isinstance(event, CallbackQuery):
+			await event.answer(text)
+		elif isinstance(event, Message):
+			await event.answer(text)
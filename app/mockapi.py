@@ -0,0 +1,575 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+from aiohttp import web
+from loguru import logger
+
+from app.utils.jsonlib import dumps, loads
+
+SUCCESS = {'success': True}
+
+GAMES = ('Mines', 'LuckyJet', 'Crash')
+PERIODS = ('today', 'yesterday', 'last_week', 'last_month')
+METRICS = ('firstdep', 'dep', 'income')
+STATUSES = ('новичок', 'специалист', 'профессионал', 'мастер', 'легенда')
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+def find_records(
+	records: List[Dict[str, Any]], opts: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+	"""
+	Find records matching all opts
+
+	:param		records:  The records
+	:type		records:  List[Dict[str, Any]]
+	:param		opts:	  The opts
+	:type		opts:	  Dict[str, Any]
+
+	:returns:	matching records
+	:rtype:		List[Dict[str, Any]]
+	"""
+	return [
+		record
+		for record in records
+		if all(str(record.get(name)) == str(value) for name, value in opts.items())
+	]
+
+
+def make_dataset(
+	partners: int = 1000,
+	users: int = 10000,
+	transactions: int = 1000,
+	stats_rows: int = 20000,
+	seed: int = 0,
+) -> Dict[str, Any]:
+	"""
+	Make synthetic backend dataset
+
+	:param		partners:	   The partners count
+	:type		partners:	   int
+	:param		users:		   The users count
+	:type		users:		   int
+	:param		transactions:  The transactions count
+	:type		transactions:  int
+	:param		stats_rows:	   The alltime rows count per stats metric
+	:type		stats_rows:	   int
+	:param		seed:		   The random seed
+	:type		seed:		   int
+
+	:returns:	dataset with partners, users, transactions and stats
+	:rtype:		Dict[str, Any]
+	"""
+	rng = random.Random(seed)
+	now = datetime.now()
+
+	def some_date(days: int) -> str:
+		return (now - timedelta(seconds=rng.uniform(0, days * 86400))).isoformat()
+
+	hashes = [f'{rng.getrandbits(48):012x}' for _ in range(partners)]
+	dataset: Dict[str, Any] = {'partners': [], 'users': [], 'transactions': []}
+
+	for index, partner_hash in enumerate(hashes):
+		referrer_hash = (
+			rng.choice(hashes[:index]) if index and rng.random() < 0.3 else None
+		)
+
+		dataset['partners'].append(
+			{
+				'id': index + 1,
+				'tg_id': str(1000000 + index),
+				'partner_hash': partner_hash,
+				'referrer_hash': referrer_hash,
+				'is_referal': referrer_hash is not None,
+				'username': f'partner{index}',
+				'fullname': f'Partner {index}',
+				'number_phone': f'+7900{index:07d}',
+				'age': rng.randint(18, 60),
+				'arbitration_experience': rng.randint(0, 1),
+				'experience_time': 'Отстутствует',
+				'status': rng.choice(STATUSES),
+				'approved': rng.random() > 0.05,
+				'is_freezed': False,
+				'balance': round(rng.uniform(0, 50000), 2),
+				'total_income': round(rng.uniform(0, 500000), 2),
+				'ref_income': round(rng.uniform(0, 5000), 2),
+				'referals_count': 0,
+				'additional_percent': 0.0,
+				'showed_percent': 'default',
+				'register_date': some_date(365),
+				'last_withdraw_date': some_date(30),
+				'time_to_withdraw': None,
+			}
+		)
+
+	by_hash = {partner['partner_hash']: partner for partner in dataset['partners']}
+
+	for partner in dataset['partners']:
+		if partner['referrer_hash'] is not None:
+			by_hash[partner['referrer_hash']]['referals_count'] += 1
+
+	for index in range(users):
+		dataset['users'].append(
+			{
+				'id': index + 1,
+				'tg_id': str(5000000 + index),
+				'referal_parent': rng.choice(hashes) if hashes else None,
+				'game': rng.choice(GAMES),
+				'register_date': some_date(60),
+				'approved': rng.random() > 0.5,
+				'balance': round(rng.uniform(0, 10000), 2),
+				'income': round(rng.uniform(0, 3000), 2),
+			}
+		)
+
+	for index in range(transactions):
+		dataset['transactions'].append(
+			{
+				'id': index + 1,
+				'partner_hash': rng.choice(hashes) if hashes else None,
+				'username': f'partner{index}',
+				'amount': rng.randint(1000, 50000),
+				'transaction_type': rng.choice(('Карта', 'Криптовалюта')),
+				'withdraw_card': f'2200{rng.randrange(10**12):012d}',
+				'approved': rng.random() > 0.5,
+				'preview_id': int(f'{index:08d}{rng.randint(1000, 9999)}'),
+			}
+		)
+
+	def row() -> Dict[str, Any]:
+		return {
+			'partner_hash': rng.choice(hashes) if hashes else None,
+			'game': rng.choice(GAMES),
+			'amount': round(rng.uniform(100, 50000), 2),
+			'income': round(rng.uniform(0, 5000), 2),
+			'x': round(rng.uniform(0, 2500), 2),
+			'date': some_date(30),
+		}
+
+	dataset['stats'] = {
+		'data': {
+			period: {
+				metric: [row() for _ in range(stats_rows // 10)] for metric in METRICS
+			}
+			for period in PERIODS
+		}
+		| {metric: [row() for _ in range(stats_rows)] for metric in METRICS},
+		'api_count': {partner_hash: rng.randint(0, 5000) for partner_hash in hashes},
+		'signals': {
+			game: {partner_hash: rng.randint(0, 1000) for partner_hash in hashes}
+			for game in GAMES
+		},
+	}
+	dataset['balance'] = 1000000.0
+	dataset['revshare'] = 50.0
+
+	return dataset
+
+
+def request_key(method: str, path_qs: str, body: bytes) -> str:
+	"""
+	Get fixture key of request: method, path with query and hash of body
+
+	:param		method:	  The method
+	:type		method:	  str
+	:param		path_qs:  The path with query string
+	:type		path_qs:  str
+	:param		body:	  The body
+	:type		body:	  bytes
+
+	:returns:	fixture key
+	:rtype:		str
+	"""
+	if body:
+		try:
+			# same JSON with other key order is the same request
+			body = json.dumps(loads(body), sort_keys=True).encode()
+		except ValueError:
+			pass
+
+	return f'{method} {path_qs} {hashlib.sha1(body).hexdigest()[:16]}'
+
+
+def load_fixtures(path: str) -> Dict[str, Tuple[int, str]]:
+	"""
+	Load recorded responses (JSON lines, the last record of key wins)
+
+	:param		path:  The fixtures file path
+	:type		path:  str
+
+	:returns:	status and body by fixture key
+	:rtype:		Dict[str, Tuple[int, str]]
+	"""
+	fixtures = {}
+
+	if not os.path.exists(path):
+		return fixtures
+
+	with open(path, encoding='utf-8') as file:
+		for line in file:
+			if line.strip():
+				record = loads(line)
+				fixtures[record['key']] = (record['status'], record['body'])
+
+	return fixtures
+
+
+def save_fixture(path: str, key: str, status: int, body: str):
+	"""
+	Append recorded response to fixtures file
+
+	:param		path:	 The fixtures file path
+	:type		path:	 str
+	:param		key:	 The fixture key
+	:type		key:	 str
+	:param		status:	 The status code
+	:type		status:	 int
+	:param		body:	 The response body
+	:type		body:	 str
+	"""
+	with open(path, 'a', encoding='utf-8') as file:
+		file.write(dumps({'key': key, 'status': status, 'body': body}) + '\n')
+
+
+def create_app(
+	partners: Optional[List[Dict[str, Any]]] = None,
+	dataset: Optional[Dict[str, Any]] = None,
+	latency: float = 0.0,
+	jitter: float = 0.0,
+	error_rate: float = 0.0,
+	record: Optional[str] = None,
+	upstream: Optional[str] = None,
+	replay: Optional[str] = None,
+	seed: int = 0,
+) -> web.Application:
+	"""
+	Create stand-in backend serving API endpoints from memory
+
+	:param		partners:	 The partners (replace partners of dataset)
+	:type		partners:	 Optional[List[Dict[str, Any]]]
+	:param		dataset:	 The dataset, see make_dataset
+	:type		dataset:	 Optional[Dict[str, Any]]
+	:param		latency:	 The latency added to every response in seconds
+	:type		latency:	 float
+	:param		jitter:		 The maximal random extra latency in seconds
+	:type		jitter:		 float
+	:param		error_rate:	 The share of requests answered with 500
+	:type		error_rate:	 float
+	:param		record:		 The fixtures file to record upstream responses to
+	:type		record:		 Optional[str]
+	:param		upstream:	 The real backend url requests are proxied to
+	:type		upstream:	 Optional[str]
+	:param		replay:		 The fixtures file to replay responses from
+	:type		replay:		 Optional[str]
+	:param		seed:		 The random seed of injected faults
+	:type		seed:		 int
+
+	:returns:	aiohttp application
+	:rtype:		web.Application
+	"""
+	if dataset is None:
+		dataset = make_dataset(partners=0 if partners is not None else 1000)
+
+	if partners is not None:
+		dataset['partners'] = partners
+
+	if record is not None and upstream is None:
+		raise ValueError('record mode needs upstream url')
+
+	app = web.Application()
+	app['data'] = dataset
+	app['partners'] = dataset['partners']
+	app['requests'] = []
+	app['fixtures'] = load_fixtures(replay) if replay is not None else {}
+
+	rng = random.Random(seed)
+
+	def respond(data: Dict[str, Any]) -> web.Response:
+		return web.json_response({'status': SUCCESS, **data}, dumps=dumps)
+
+	async def body_of(request: web.Request, path: str) -> Dict[str, Any]:
+		data = loads(await request.read())
+		request.app['requests'].append((path, data))
+
+		return data
+
+	@web.middleware
+	async def faults(request: web.Request, handler: Handler) -> web.StreamResponse:
+		delay = latency + rng.uniform(0, jitter)
+
+		if delay > 0:
+			await asyncio.sleep(delay)
+
+		if error_rate and rng.random() < error_rate:
+			return web.json_response(
+				{'status': {'success': False, 'error': 'injected'}}, status=500
+			)
+
+		return await handler(request)
+
+	@web.middleware
+	async def fixtures(request: web.Request, handler: Handler) -> web.StreamResponse:
+		body = await request.read()
+		key = request_key(request.method, request.path_qs, body)
+
+		if record is not None:
+			async with request.app['upstream'].request(
+				request.method,
+				f'{upstream}{request.path_qs}',
+				data=body or None,
+				headers={'Content-Type': 'application/json'} if body else None,
+			) as response:
+				text = await response.text()
+				status = response.status
+
+			await asyncio.to_thread(save_fixture, record, key, status, text)
+
+			request.app['fixtures'][key] = (status, text)
+		elif key in request.app['fixtures']:
+			status, text = request.app['fixtures'][key]
+		else:
+			if replay is not None:
+				logger.warning(f'[mockapi] no fixture for {key}, serve synthetic')
+
+			return await handler(request)
+
+		return web.Response(text=text, status=status, content_type='application/json')
+
+	async def base_info(request: web.Request) -> web.Response:
+		return respond({'name': 'mockapi', 'started_at': datetime.now().isoformat()})
+
+	async def base_stats(request: web.Request) -> web.Response:
+		return respond(request.app['data']['stats'])
+
+	async def base_achstats(request: web.Request) -> web.Response:
+		partner_hash = request.query.get('partnerhash')
+		stats = request.app['data']['stats']
+		income = deposits = 0.0
+		first_deposits = 0
+
+		for metric in METRICS:
+			for row in stats['data'][metric]:
+				if row['partner_hash'] != partner_hash:
+					continue
+
+				if metric == 'income':
+					income += row['income']
+				elif metric == 'dep':
+					deposits += row['amount']
+				else:
+					first_deposits += 1
+
+		return respond(
+			{
+				'api_count': stats['api_count'].get(partner_hash, 0),
+				'income': round(income, 2),
+				'deposits_sum': round(deposits, 2),
+				'first_deposits_count': first_deposits,
+				'signals_count': sum(
+					info.get(partner_hash, 0) for info in stats['signals'].values()
+				),
+			}
+		)
+
+	async def base_admin_balance(request: web.Request) -> web.Response:
+		return respond({'balance': request.app['data']['balance']})
+
+	async def base_admin_balance_and_revshare(request: web.Request) -> web.Response:
+		data = request.app['data']
+
+		return respond({'balance': data['balance'], 'revshare': data['revshare']})
+
+	async def base_set_admin_balance(request: web.Request) -> web.Response:
+		request.app['data']['balance'] = float(request.query['balance_set'])
+
+		return respond({})
+
+	async def base_set_revshare(request: web.Request) -> web.Response:
+		request.app['data']['revshare'] = float(request.query['revshare_perc'])
+
+		return respond({})
+
+	async def partner_find(request: web.Request) -> web.Response:
+		data = await body_of(request, '/partner/find')
+
+		return respond(
+			{'partners': find_records(request.app['partners'], data['opts'])}
+		)
+
+	async def partner_find_many(request: web.Request) -> web.Response:
+		data = await body_of(request, '/partner/find_many')
+
+		return respond(
+			{
+				'results': [
+					{'partners': find_records(request.app['partners'], opts)}
+					for opts in data['opts']
+				]
+			}
+		)
+
+	async def partner_get(request: web.Request) -> web.Response:
+		data = await body_of(request, '/partner/get')
+		offset = data.get('offset') or 0
+		limit = data.get('limit')
+		partners = request.app['partners'][offset:]
+
+		return respond({'partners': partners[:limit] if limit else partners})
+
+	async def partner_create(request: web.Request) -> web.Response:
+		data = await body_of(request, '/partner/create')
+		partners = request.app['partners']
+		partner = {'id': len(partners) + 1, **data}
+		partner.setdefault('partner_hash', f'{rng.getrandbits(48):012x}')
+		partners.append(partner)
+
+		return respond({'partner_id': partner['id']})
+
+	async def partner_update(request: web.Request) -> web.Response:
+		data = await body_of(request, '/partner/update')
+
+		for partner in find_records(
+			request.app['partners'], {'partner_hash': data['partner_hash']}
+		):
+			partner.update(data)
+
+		return respond({})
+
+	async def user_find(request: web.Request) -> web.Response:
+		data = await body_of(request, '/user/find')
+
+		return respond(
+			{'users': find_records(request.app['data']['users'], data['opts'])}
+		)
+
+	async def transaction_find(request: web.Request) -> web.Response:
+		data = await body_of(request, '/transaction/find')
+
+		return respond(
+			{
+				'transactions': find_records(
+					request.app['data']['transactions'], data['opts']
+				)
+			}
+		)
+
+	async def transaction_create(request: web.Request) -> web.Response:
+		data = await body_of(request, '/transaction/create')
+		transactions = request.app['data']['transactions']
+		transaction = {'id': len(transactions) + 1, **data}
+		transactions.append(transaction)
+
+		return respond({'transaction_id': transaction['id']})
+
+	async def transaction_update(request: web.Request) -> web.Response:
+		data = await body_of(request, '/transaction/update')
+
+		for transaction in find_records(
+			request.app['data']['transactions'], {'id': data['id']}
+		):
+			transaction.update(data)
+
+		return respond({})
+
+	async def open_upstream(app: web.Application):
+		app['upstream'] = aiohttp.ClientSession()
+
+	async def close_upstream(app: web.Application):
+		await app['upstream'].close()
+
+	if record is not None:
+		app.on_startup.append(open_upstream)
+		app.on_cleanup.append(close_upstream)
+
+	app.middlewares.extend([faults, fixtures])
+
+	app.router.add_get('/base/info', base_info)
+	app.router.add_get('/base/stats', base_stats)
+	app.router.add_get('/base/achstats', base_achstats)
+	app.router.add_get('/base/admin_balance', base_admin_balance)
+	app.router.add_get(
+		'/base/admin_balance_and_revshare', base_admin_balance_and_revshare
+	)
+	app.router.add_get('/base/set_admin_balance', base_set_admin_balance)
+	app.router.add_get('/base/set_revshare', base_set_revshare)
+	app.router.add_post('/partner/find', partner_find)
+	app.router.add_post('/partner/find_many', partner_find_many)
+	app.router.add_post('/partner/get', partner_get)
+	app.router.add_post('/partner/create', partner_create)
+	app.router.add_post('/partner/update', partner_update)
+	app.router.add_post('/user/find', user_find)
+	app.router.add_post('/transaction/find', transaction_find)
+	app.router.add_post('/transaction/create', transaction_create)
+	app.router.add_post('/transaction/update', transaction_update)
+
+	return app
+
+
+def main():
+	"""
+	Run stand-in backend: python -m app.mockapi --help
+
+	Point config.ini [SECRETS] URL to http://localhost:8000 to run the bot
+	against it.
+	"""
+	parser = argparse.ArgumentParser(
+		prog='python -m app.mockapi', description='Stand-in backend API server'
+	)
+	parser.add_argument('--host', default='127.0.0.1')
+	parser.add_argument('--port', type=int, default=8000)
+	parser.add_argument('--partners', type=int, default=1000)
+	parser.add_argument('--users', type=int, default=10000)
+	parser.add_argument('--transactions', type=int, default=1000)
+	parser.add_argument(
+		'--stats-rows', type=int, default=20000, help='alltime rows per metric'
+	)
+	parser.add_argument('--seed', type=int, default=0)
+	parser.add_argument('--latency', type=float, default=0.0, help='added latency, ms')
+	parser.add_argument(
+		'--jitter', type=float, default=0.0, help='random extra latency, ms'
+	)
+	parser.add_argument(
+		'--error-rate', type=float, default=0.0, help='share of 500 responses'
+	)
+	parser.add_argument('--record', help='record upstream responses to file')
+	parser.add_argument('--upstream', help='real backend url for --record')
+	parser.add_argument('--replay', help='replay responses from file')
+	args = parser.parse_args()
+
+	if args.record is not None and args.upstream is None:
+		parser.error('--record needs --upstream')
+
+	dataset = make_dataset(
+		partners=args.partners,
+		users=args.users,
+		transactions=args.transactions,
+		stats_rows=args.stats_rows,
+		seed=args.seed,
+	)
+
+	web.run_app(
+		create_app(
+			dataset=dataset,
+			latency=args.latency / 1000,
+			jitter=args.jitter / 1000,
+			error_rate=args.error_rate,
+			record=args.record,
+			upstream=args.upstream,
+			replay=args.replay,
+			seed=args.seed,
+		),
+		host=args.host,
+		port=args.port,
+	)
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,247 @@
+import asyncio
+import contextvars
+import functools
+import json
+import math
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+from app.database.redis import (
+	cache_key,
+	codec,
+	get_redis,
+	pause_redis,
+	redis_paused,
+)
+from app.loader import config
+from app.utils.metrics import registry
+
+registry.describe(
+	'sinwin_cached_calls_total', 'counter', 'Calls of cached functions by result'
+)
+registry.describe('sinwin_cached_hit_ratio', 'gauge', 'Hit ratio of cached functions')
+
+counters: Dict[str, Dict[str, int]] = {}
+inflight: Dict[str, asyncio.Task] = {}
+# entries kept in process while redis is paused, least recently used are
+# dropped over LOCAL_SIZE
+local: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+LOCAL_SIZE = 256
+
+
+def default_key(*args: Any, **kwargs: Any) -> str:
+	"""
+	Build cache key from call arguments
+
+	:param		args:	 The arguments
+	:type		args:	 list
+	:param		kwargs:	 The keyword arguments
+	:type		kwargs:	 dict
+
+	:returns:	key
+	:rtype:		str
+	"""
+	return json.dumps(
+		[args, kwargs],
+		sort_keys=True,
+		ensure_ascii=False,
+		separators=(',', ':'),
+		default=str,
+	)
+
+
+def _load_local(name: str) -> Optional[Dict[str, Any]]:
+	entry = local.get(name)
+
+	if entry is None:
+		return None
+
+	if entry['expires_at'] <= time.time():
+		del local[name]
+		return None
+
+	local.move_to_end(name)
+
+	return entry
+
+
+async def _load(name: str) -> Optional[Dict[str, Any]]:
+	if redis_paused():
+		return _load_local(name)
+
+	try:
+		raw = await get_redis().get(name)
+	except Exception as ex:
+		pause_redis(f'cached get ({name})', ex)
+		return None
+
+	return None if raw is None else codec.decode(raw)
+
+
+async def _store(name: str, entry: Dict[str, Any], ttl: float):
+	if not redis_paused():
+		try:
+			await get_redis().set(name, codec.encode(entry), px=max(int(ttl * 1000), 1))
+			return
+		except Exception as ex:
+			pause_redis(f'cached set ({name})', ex)
+
+	local[name] = entry
+	local.move_to_end(name)
+
+	while len(local) > LOCAL_SIZE:
+		local.popitem(last=False)
+
+
+def cached(
+	ttl: float,
+	key: Optional[Callable[..., str]] = None,
+	namespace: str = 'cached',
+	negative_ttl: Optional[float] = None,
+	is_negative: Optional[Callable[[Any], bool]] = None,
+) -> Callable[[Callable[..., Awaitable[Any]]], Callable[..., Awaitable[Any]]]:
+	"""
+	Cache results of async function in Redis
+
+	TTL of every result gets up to CACHE.JITTER random share added, so
+	results cached at once do not expire at once. Before expiration the
+	result is refreshed in background with probability growing to expiry
+	(the slower the function, the earlier), while callers still get the
+	cached result. Concurrent misses of one key in process share one call.
+	While redis is paused results are kept in small in-process LRU, so
+	calls don't miss every time.
+
+	Results for which is_negative is true (by default None) are cached for
+	negative_ttl seconds or not cached if it is not set. Hits and misses
+	are counted per function, see cached_metrics.
+
+	:param		ttl:		   The seconds result is kept
+	:type		ttl:		   float
+	:param		key:		   The key builder, called with function arguments
+	:type		key:		   Optional[Callable[..., str]]
+	:param		namespace:	   The namespace of keys
+	:type		namespace:	   str
+	:param		negative_ttl:  The seconds negative result is kept
+	:type		negative_ttl:  Optional[float]
+	:param		is_negative:   The check result is negative
+	:type		is_negative:   Optional[Callable[[Any], bool]]
+
+	:returns:	decorator
+	:rtype:		Callable
+	"""
+	key = key or default_key
+	is_negative = is_negative or (lambda result: result is None)
+
+	def decorator(func: Callable[..., Awaitable[Any]]) -> Callable[..., Awaitable[Any]]:
+		function = f'{func.__module__}.{func.__qualname__}'
+		stats = counters.setdefault(
+			function,
+			{'hits': 0, 'negative_hits': 0, 'misses': 0, 'early_refreshes': 0},
+		)
+
+		def count(result: str):
+			stats[result] += 1
+			registry.inc('sinwin_cached_calls_total', function=function, result=result)
+
+		async def compute(name: str, args: tuple, kwargs: dict) -> Any:
+			started_at = time.monotonic()
+			result = await func(*args, **kwargs)
+			delta = time.monotonic() - started_at
+
+			negative = is_negative(result)
+			result_ttl = negative_ttl if negative else ttl
+
+			if result_ttl:
+				result_ttl *= 1 + random.uniform(0, config.cache.JITTER)
+				entry = {
+					'value': result,
+					'negative': negative,
+					'delta': delta,
+					'expires_at': time.time() + result_ttl,
+				}
+				await _store(name, entry, result_ttl)
+
+			return result
+
+		def done(name: str, task: asyncio.Task):
+			inflight.pop(name, None)
+
+			if not task.cancelled() and task.exception() is not None:
+				logger.warning(f'[cached] {function} error: {task.exception()}')
+
+		def call(
+			name: str,
+			args: tuple,
+			kwargs: dict,
+			context: Optional[contextvars.Context] = None,
+		) -> asyncio.Task:
+			task = inflight.get(name)
+
+			if task is None:
+				task = asyncio.create_task(compute(name, args, kwargs), context=context)
+				inflight[name] = task
+				task.add_done_callback(functools.partial(done, name))
+
+			return task
+
+		@functools.wraps(func)
+		async def wrapper(*args: Any, **kwargs: Any) -> Any:
+			name = cache_key(f'{function}:{key(*args, **kwargs)}', namespace)
+			entry = await _load(name)
+
+			if entry is None:
+				count('misses')
+				return await asyncio.shield(call(name, args, kwargs))
+
+			count('negative_hits' if entry['negative'] else 'hits')
+
+			# probabilistic early refresh: -log(u) is exponential, mean 1
+			early = entry['delta'] * config.cache.BETA * -math.log(1 - random.random())
+
+			if time.time() + early >= entry['expires_at'] and name not in inflight:
+				count('early_refreshes')
+				# clean context: background refresh must not inherit the
+				# deadline (or other state) of update which triggered it
+				call(name, args, kwargs, contextvars.Context())
+
+			return entry['value']
+
+		async def invalidate(*args: Any, **kwargs: Any):
+			name = cache_key(f'{function}:{key(*args, **kwargs)}', namespace)
+
+			local.pop(name, None)
+
+			if redis_paused():
+				return
+
+			try:
+				await get_redis().delete(name)
+			except Exception as ex:
+				pause_redis(f'cached delete ({name})', ex)
+
+		wrapper.invalidate = invalidate
+
+		return wrapper
+
+	return decorator
+
+
+def cached_metrics() -> Dict[str, Dict[str, Any]]:
+	"""
+	Get counters of cached functions
+
+	:returns:	hits, misses, early refreshes and hit ratio by function
+	:rtype:		Dict[str, Dict[str, Any]]
+	"""
+	metrics = {}
+
+	for function, stats in counters.items():
+		hits = stats['hits'] + stats['negative_hits']
+		total = hits + stats['misses']
+		metrics[function] = {**stats, 'hit_ratio': hits / total if total else 0.0}
+
+	return metrics
@@ -0,0 +1,200 @@
+import random
+import timeit
+import zlib
+from typing import Any, Callable, Dict, List, Tuple
+
+from app.utils.jsonlib import dumps_bytes, loads, make_stats_body
+
+try:
+	import msgpack
+except ImportError:
+	msgpack = None
+
+try:
+	import lz4.frame as lz4
+except ImportError:
+	lz4 = None
+
+# first byte of encoded value; legacy plain JSON values never start with it
+FORMAT_VERSION = 1
+
+Encoder = Callable[[Any], bytes]
+Decoder = Callable[[bytes], Any]
+
+SERIALIZERS: Dict[str, Tuple[int, Encoder, Decoder]] = {
+	'json': (0, dumps_bytes, loads),
+}
+
+if msgpack is not None:
+	SERIALIZERS['msgpack'] = (
+		1,
+		lambda obj: msgpack.packb(obj, use_bin_type=True),
+		lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+	)
+
+COMPRESSIONS: Dict[str, Tuple[int, Encoder, Decoder]] = {
+	'none': (0, lambda data: data, lambda data: data),
+	'zlib': (1, lambda data: zlib.compress(data, 1), zlib.decompress),
+}
+
+if lz4 is not None:
+	COMPRESSIONS['lz4'] = (2, lz4.compress, lz4.decompress)
+
+
+class Codec:
+	"""
+	This class describes serializer of cache values to compact bytes.
+
+	Encoded value is version byte, flags byte (serializer id in low nibble,
+	compression id in high nibble) and body. Body is compressed only when
+	serialized value is at least min_size bytes. Any supported format is
+	decoded regardless of codec settings, bytes without version byte are
+	decoded as plain JSON (values written before).
+	"""
+
+	def __init__(
+		self, serializer: str = 'json', compression: str = 'zlib', min_size: int = 1024
+	):
+		"""
+		Constructs a new instance.
+
+		:param		serializer:	  The serializer: json (orjson) or msgpack
+		:type		serializer:	  str
+		:param		compression:  The compression: none, zlib or lz4
+		:type		compression:  str
+		:param		min_size:	  The minimal size in bytes to compress
+		:type		min_size:	  int
+
+		:raises		ValueError:	  serializer or compression is unknown or its
+									  package is not installed
+		"""
+		if serializer not in SERIALIZERS:
+			raise ValueError(f'Serializer {serializer} is not available')
+
+		if compression not in COMPRESSIONS:
+			raise ValueError(f'Compression {compression} is not available')
+
+		self.serializer = serializer
+		self.compression = compression
+		self.min_size = min_size
+
+	def encode(self, obj: Any) -> bytes:
+		"""
+		Encode value
+
+		:param		obj:  The value
+		:type		obj:  Any
+
+		:returns:	encoded value
+		:rtype:		bytes
+		"""
+		serializer_id, serialize, _ = SERIALIZERS[self.serializer]
+		body = serialize(obj)
+		compression_id = 0
+
+		if self.compression != 'none' and len(body) >= self.min_size:
+			compression_id, compress, _ = COMPRESSIONS[self.compression]
+			body = compress(body)
+
+		return bytes((FORMAT_VERSION, serializer_id | compression_id << 4)) + body
+
+	@staticmethod
+	def decode(data: bytes) -> Any:
+		"""
+		Decode value
+
+		:param		data:  The encoded value
+		:type		data:  bytes
+
+		:returns:	value
+		:rtype:		Any
+
+		:raises		ValueError:	 format of value is not supported
+		"""
+		if not data or data[0] != FORMAT_VERSION:
+			return loads(data)
+
+		flags = data[1]
+		body = data[2:]
+
+		for compression_id, _, decompress in COMPRESSIONS.values():
+			if compression_id == flags >> 4:
+				body = decompress(body)
+				break
+		else:
+			raise ValueError(f'Unsupported cache value compression: {flags >> 4}')
+
+		for serializer_id, _, deserialize in SERIALIZERS.values():
+			if serializer_id == flags & 0x0F:
+				return deserialize(body)
+
+		raise ValueError(f'Unsupported cache value serializer: {flags & 0x0F}')
+
+
+def make_partners_list(count: int = 5000) -> List[Dict[str, Any]]:
+	"""
+	Make synthetic partners list for benchmark
+
+	:param		count:	The partners count
+	:type		count:	int
+
+	:returns:	/partner/all like list
+	:rtype:		List[Dict[str, Any]]
+	"""
+	rng = random.Random(0)
+
+	return [
+		{
+			'id': index,
+			'tg_id': str(rng.randint(10**8, 10**10)),
+			'partner_hash': f'{rng.getrandbits(48):012x}',
+			'referrer_hash': None,
+			'is_referal': rng.random() < 0.3,
+			'username': f'user{index}',
+			'fullname': f'Partner {index}',
+			'status': rng.choice(('новичок', 'специалист', 'профессионал')),
+			'approved': True,
+			'is_freezed': False,
+			'balance': round(rng.uniform(0, 100000), 2),
+			'total_income': round(rng.uniform(0, 1000000), 2),
+			'referals_count': rng.randint(0, 50),
+			'register_date': '2024-10-01T12:00:00',
+		}
+		for index in range(count)
+	]
+
+
+def benchmark(number: int = 5):
+	"""
+	Print size and encode/decode timings of available serializers and
+	compressions on /base/stats snapshot and partners list
+	(python -m app.utils.codec)
+
+	:param		number:	 The repeats count
+	:type		number:	 int
+	"""
+	payloads = {
+		'/base/stats': make_stats_body(),
+		'partners': make_partners_list(),
+	}
+
+	for name, payload in payloads.items():
+		print(f'{name}, {number} runs')
+		print(f'{"codec":<14} {"size KiB":>9} {"encode ms":>10} {"decode ms":>10}')
+
+		for serializer in SERIALIZERS:
+			for compression in COMPRESSIONS:
+				codec = Codec(serializer, compression, min_size=0)
+				data = codec.encode(payload)
+				encode = timeit.timeit(lambda: codec.encode(payload), number=number)
+				decode = timeit.timeit(lambda: Codec.decode(data), number=number)
+				print(
+					f'{serializer + "+" + compression:<14} {len(data) / 1024:9.1f} '
+					f'{encode / number * 1000:10.2f} {decode / number * 1000:10.2f}'
+				)
+
+		print()
+
+
+if __name__ == '__main__':
+	benchmark()
@@ -0,0 +1,137 @@
+import asyncio
+import time
+from typing import (
+	Any,
+	AsyncIterator,
+	Awaitable,
+	Callable,
+	Dict,
+	Iterable,
+	Iterator,
+	Optional,
+)
+
+import xlsxwriter
+
+# column widths of partners sheet, other columns have default width
+COLUMN_WIDTHS = {
+	'B': 30,
+	**{column: 15 for column in 'CDEFGHIJKLMNOPQRSTUVWXYZ'},
+	**{f'A{column}': 20 for column in 'ABCDEFGHI'},
+}
+
+
+def write_excel_file(
+	file_name: str,
+	rows: Iterable[Dict[str, Any]],
+	sheet_name: str = 'Partners',
+	progress: Optional[Callable[[int], None]] = None,
+) -> str:
+	"""
+	Write rows to xlsx file one by one in constant memory mode
+
+	:param		file_name:	 The file name
+	:type		file_name:	 str
+	:param		rows:		 The rows, the first row keys are the header
+	:type		rows:		 Iterable[Dict[str, Any]]
+	:param		sheet_name:	 The sheet name
+	:type		sheet_name:	 str
+	:param		progress:	 The callback called with count of written rows
+	:type		progress:	 Optional[Callable[[int], None]]
+
+	:returns:	file name
+	:rtype:		str
+	"""
+	workbook = xlsxwriter.Workbook(file_name, {'constant_memory': True})
+	worksheet = workbook.add_worksheet(sheet_name)
+	bold = workbook.add_format({'bold': True})
+
+	for column, width in COLUMN_WIDTHS.items():
+		worksheet.set_column(f'{column}:{column}', width)
+
+	header = None
+
+	for count, row in enumerate(rows, start=1):
+		if header is None:
+			header = list(row.keys())
+			worksheet.write_row(0, 0, header, bold)
+
+		worksheet.write_row(count, 0, [row.get(name) for name in header])
+
+		if progress is not None:
+			progress(count)
+
+	workbook.close()
+
+	return file_name
+
+
+def iterate_in_thread(
+	iterator: AsyncIterator[Any], loop: Optional[asyncio.AbstractEventLoop] = None
+) -> Iterator[Any]:
+	"""
+	Iterate over async iterator from worker thread, pulling items lazily
+	from event loop
+
+	:param		iterator:  The async iterator
+	:type		iterator:  AsyncIterator[Any]
+	:param		loop:	   The event loop, running loop by default
+	:type		loop:	   Optional[asyncio.AbstractEventLoop]
+
+	:returns:	sync iterator (must be consumed outside of event loop thread)
+	:rtype:		Iterator[Any]
+	"""
+	# loop is taken here, generator body runs later in worker thread
+	loop = loop or asyncio.get_running_loop()
+
+	def iterate() -> Iterator[Any]:
+		while True:
+			try:
+				yield asyncio.run_coroutine_threadsafe(
+					iterator.__anext__(), loop
+				).result()
+			except StopAsyncIteration:
+				return
+
+	return iterate()
+
+
+async def export_excel_file(
+	file_name: str,
+	rows: Iterable[Dict[str, Any]],
+	total: Optional[int] = None,
+	report: Optional[Callable[[int, Optional[int]], Awaitable[Any]]] = None,
+	interval: float = 2.0,
+) -> str:
+	"""
+	Write xlsx file in worker thread, reporting progress in event loop
+
+	:param		file_name:	The file name
+	:type		file_name:	str
+	:param		rows:		The rows (iterated in worker thread)
+	:type		rows:		Iterable[Dict[str, Any]]
+	:param		total:		The total count of rows if known
+	:type		total:		Optional[int]
+	:param		report:		The coroutine called with written and total rows
+	:type		report:		Optional[Callable[[int, Optional[int]], Awaitable[Any]]]
+	:param		interval:	The minimal interval between reports in seconds
+	:type		interval:	float
+
+	:returns:	file name
+	:rtype:		str
+	"""
+	loop = asyncio.get_running_loop()
+	reported = {'at': time.monotonic()}
+
+	def progress(count: int):
+		now = time.monotonic()
+
+		if report is None or now - reported['at'] < interval:
+			return
+
+		reported['at'] = now
+		asyncio.run_coroutine_threadsafe(report(count, total), loop)
+
+	return await asyncio.to_thread(
+		write_excel_file, file_name, rows, 'Partners', progress
+	)
@@ -1,9 +1,18 @@
 import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
 
-from aiogram.types import FSInputFile
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, InputMediaPhoto, Message
+from loguru import logger
 
+from app.database.redis import get_cache, set_cache
 from app.loader import config
 
+MEDIA_NAMESPACE = 'media'
+
+# uploaded media file_id by media key (path and mtime)
+media_ids: Dict[str, str] = {}
+
 
 def get_file(filename: str) -> FSInputFile:
 	"""
@@ -36,3 +45,157 @@ def get_localized_image(filename: str) -> str:
 	"""
 
 	return os.path.join(config.SINWIN_DATA, filename)
+
+
+def media_key(path: str) -> str:
+	"""
+	Get media key, changed file gets new key and is uploaded again
+
+	:param		path:  The path
+	:type		path:  str
+
+	:returns:	media key
+	:rtype:		str
+	"""
+	return f'{os.path.abspath(path)}:{int(os.stat(path).st_mtime)}'
+
+
+async def get_media(path: str) -> Union[str, FSInputFile]:
+	"""
+	Get uploaded file_id of media or file to upload
+
+	:param		path:  The path
+	:type		path:  str
+
+	:returns:	file_id if media was uploaded before, else FSInputFile
+	:rtype:		Union[str, FSInputFile]
+	"""
+	key = media_key(path)
+	file_id = media_ids.get(key)
+
+	if file_id is None:
+		file_id = await get_cache(key, namespace=MEDIA_NAMESPACE)
+
+		if not file_id:
+			return FSInputFile(path=path)
+
+		media_ids[key] = file_id
+
+	return file_id
+
+
+async def remember_media(path: str, message: Any):
+	"""
+	Save file_id of uploaded media from sent message
+
+	:param		path:	  The path
+	:type		path:	  str
+	:param		message:  The sent message
+	:type		message:  Any
+	"""
+	if not isinstance(message, Message):
+		return
+
+	if message.photo:
+		file_id = message.photo[-1].file_id
+	elif message.document:
+		file_id = message.document.file_id
+	elif message.video:
+		file_id = message.video.file_id
+	elif message.animation:
+		file_id = message.animation.file_id
+	else:
+		return
+
+	key = media_key(path)
+	media_ids[key] = file_id
+
+	try:
+		await set_cache(file_id, key, namespace=MEDIA_NAMESPACE)
+	except Exception as ex:
+		logger.error(f'Error when save media file_id ({key}): {ex}')
+
+
+async def forget_media(path: str):
+	"""
+	Forget file_id of media, so it is uploaded again
+
+	:param		path:  The path
+	:type		path:  str
+	"""
+	key = media_key(path)
+	media_ids.pop(key, None)
+
+	try:
+		await set_cache(None, key, namespace=MEDIA_NAMESPACE)
+	except Exception as ex:
+		logger.error(f'Error when forget media file_id ({key}): {ex}')
+
+
+async def send_cached_photo(
+	send: Callable[..., Awaitable[Any]], path: str, **kwargs
+) -> Any:
+	"""
+	Send photo with send method, uploading it only once
+
+	:param		send:	 The send method (message.answer_photo, sender.send_photo...)
+	:type		send:	 Callable[..., Awaitable[Any]]
+	:param		path:	 The photo path
+	:type		path:	 str
+	:param		kwargs:	 The send method arguments
+	:type		kwargs:	 dict
+
+	:returns:	sent message
+	:rtype:		Any
+	"""
+	photo = await get_media(path)
+
+	try:
+		message = await send(photo=photo, **kwargs)
+	except TelegramBadRequest:
+		if not isinstance(photo, str):
+			raise
+
+		# file_id is not valid anymore (e.g. other bot token), upload again
+		await forget_media(path)
+		photo = FSInputFile(path=path)
+		message = await send(photo=photo, **kwargs)
+
+	if not isinstance(photo, str):
+		await remember_media(path, message)
+
+	return message
+
+
+async def edit_cached_photo(
+	message: Message,
+	path: str,
+	caption: Optional[str] = None,
+	parse_mode: Optional[str] = None,
+	**kwargs,
+) -> Any:
+	"""
+	Edit message media with photo, uploading it only once
+
+	:param		message:	 The message
+	:type		message:	 Message
+	:param		path:		 The photo path
+	:type		path:		 str
+	:param		caption:	 The caption
+	:type		caption:	 Optional[str]
+	:param		parse_mode:	 The parse mode
+	:type		parse_mode:	 Optional[str]
+	:param		kwargs:		 The Message.edit_media arguments
+	:type		kwargs:		 dict
+
+	:returns:	edited message
+	:rtype:		Any
+	"""
+
+	async def edit(photo: Union[str, FSInputFile]) -> Any:
+		return await message.edit_media(
+			InputMediaPhoto(media=photo, caption=caption, parse_mode=parse_mode),
+			**kwargs,
+		)
+
+	return await send_cached_photo(edit, path)
@@ -0,0 +1,127 @@
+import json
+import random
+import timeit
+from typing import Any, Dict, Union
+
+try:
+	import orjson
+except ImportError:
+	orjson = None
+
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+
+def dumps(obj: Any) -> str:
+	"""
+	Encode object to JSON string
+
+	:param		obj:  The object
+	:type		obj:  Any
+
+	:returns:	JSON string
+	:rtype:		str
+	"""
+	if orjson is not None:
+		return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+	return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def dumps_bytes(obj: Any) -> bytes:
+	"""
+	Encode object to JSON bytes (request body)
+
+	:param		obj:  The object
+	:type		obj:  Any
+
+	:returns:	JSON bytes
+	:rtype:		bytes
+	"""
+	if orjson is not None:
+		return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+	return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def loads(data: Union[str, bytes]) -> Any:
+	"""
+	Decode JSON string or bytes
+
+	:param		data:  The data
+	:type		data:  Union[str, bytes]
+
+	:returns:	decoded object
+	:rtype:		Any
+	"""
+	if orjson is not None:
+		return orjson.loads(data)
+
+	return json.loads(data)
+
+
+def make_stats_body(rows: int = 20000) -> Dict[str, Any]:
+	"""
+	Make synthetic /base/stats response for benchmark
+
+	:param		rows:  The rows count per period and metric
+	:type		rows:  int
+
+	:returns:	/base/stats like response
+	:rtype:		Dict[str, Any]
+	"""
+	rng = random.Random(0)
+
+	def row() -> Dict[str, Any]:
+		return {
+			'partner_hash': f'{rng.getrandbits(48):012x}',
+			'game': rng.choice(('Mines', 'LuckyJet', 'Crash')),
+			'amount': round(rng.uniform(100, 50000), 2),
+			'income': round(rng.uniform(0, 5000), 2),
+			'x': round(rng.uniform(0, 2500), 2),
+			'date': '2024-10-01T12:00:00',
+		}
+
+	periods = ('today', 'yesterday', 'last_week', 'last_month')
+	metrics = ('firstdep', 'dep', 'income')
+
+	return {
+		'status': {'success': True},
+		'data': {
+			period: {metric: [row() for _ in range(rows // 10)] for metric in metrics}
+			for period in periods
+		}
+		| {metric: [row() for _ in range(rows)] for metric in metrics},
+		'api_count': {f'{index:012x}': index for index in range(1000)},
+		'signals': {'Mines': {f'{index:012x}': index for index in range(1000)}},
+	}
+
+
+def benchmark(number: int = 10):
+	"""
+	Print encode/decode timings of stdlib json and orjson on synthetic
+	/base/stats body (python -m app.utils.jsonlib)
+
+	:param		number:	 The repeats count
+	:type		number:	 int
+	"""
+	body = make_stats_body()
+	raw = json.dumps(body).encode()
+
+	print(f'/base/stats body: {len(raw) / 1024 / 1024:.1f} MiB, {number} runs')
+
+	results = {
+		'json loads': lambda: json.loads(raw),
+		'json dumps': lambda: json.dumps(body).encode(),
+	}
+
+	if orjson is not None:
+		results['orjson loads'] = lambda: orjson.loads(raw)
+		results['orjson dumps'] = lambda: orjson.dumps(body)
+
+	for name, func in results.items():
+		seconds = timeit.timeit(func, number=number) / number
+		print(f'{name:<14} {seconds * 1000:8.2f} ms')
+
+
+if __name__ == '__main__':
+	benchmark()
@@ -0,0 +1,491 @@
+import bisect
+import re
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+from apscheduler.events import (
+	EVENT_JOB_ERROR,
+	EVENT_JOB_EXECUTED,
+	EVENT_JOB_SUBMITTED,
+	JobEvent,
+	JobExecutionEvent,
+)
+from apscheduler.schedulers.base import BaseScheduler
+from loguru import logger
+
+# latency buckets in seconds
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# payload size buckets in bytes (1 KiB .. 64 MiB)
+SIZE_BUCKETS = tuple(1024 * 4**power for power in range(9))
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def normalize_endpoint(url: str) -> str:
+	"""
+	Normalize API url to endpoint label: query values and numeric path
+	segments are dropped, so label count stays bounded
+
+	/base/stats?exclude=1 -> /base/stats?exclude
+	/user/123/info -> /user/{id}/info
+
+	:param		url:  The url (path with query string)
+	:type		url:  str
+
+	:returns:	endpoint label
+	:rtype:		str
+	"""
+	path, _, query = url.partition('?')
+	path = re.sub(r'/\d+(?=/|$)', '/{id}', path)
+
+	if not query:
+		return path
+
+	names = sorted({item.split('=')[0] for item in query.split('&') if item})
+
+	return f'{path}?{"&".join(names)}'
+
+
+class Histogram:
+	"""
+	This class describes a histogram with fixed buckets.
+	"""
+
+	def __init__(self, buckets: Sequence[float]):
+		"""
+		Constructs a new instance.
+
+		:param		buckets:  The upper bounds of buckets (sorted)
+		:type		buckets:  Sequence[float]
+		"""
+		self.buckets = tuple(buckets)
+		self.counts = [0] * (len(self.buckets) + 1)
+		self.sum = 0.0
+		self.count = 0
+		self.max = 0.0
+
+	def observe(self, value: float):
+		"""
+		Add value to histogram
+
+		:param		value:	The value
+		:type		value:	float
+		"""
+		self.counts[bisect.bisect_left(self.buckets, value)] += 1
+		self.sum += value
+		self.count += 1
+		self.max = max(self.max, value)
+
+	def quantile(self, q: float) -> float:
+		"""
+		Estimate quantile as upper bound of bucket containing it
+
+		:param		q:	The quantile (0..1)
+		:type		q:	float
+
+		:returns:	quantile estimate, max value for the last bucket
+		:rtype:		float
+		"""
+		if not self.count:
+			return 0.0
+
+		rank = q * self.count
+		cumulative = 0
+
+		for index, count in enumerate(self.counts):
+			cumulative += count
+
+			if cumulative >= rank:
+				if index < len(self.buckets):
+					return min(self.buckets[index], self.max)
+
+				break
+
+		return self.max
+
+
+class MetricsRegistry:
+	"""
+	This class describes in-process registry of counters, gauges and
+	histograms, rendered in Prometheus text format.
+
+	Constant labels are added to every series (worker index in worker
+	process). Remotes return rendered metrics of other processes (workers),
+	render_all merges them with metrics of this process.
+	"""
+
+	def __init__(self):
+		"""
+		Constructs a new instance.
+		"""
+		self.help: Dict[str, Tuple[str, str]] = {}
+		self.counters: Dict[str, Dict[Labels, float]] = defaultdict(
+			lambda: defaultdict(float)
+		)
+		self.gauges: Dict[str, Dict[Labels, float]] = defaultdict(
+			lambda: defaultdict(float)
+		)
+		self.histograms: Dict[str, Dict[Labels, Histogram]] = defaultdict(dict)
+		self.buckets: Dict[str, Sequence[float]] = {}
+		self.collectors: List[Callable[[], None]] = []
+		self.labels: Dict[str, str] = {}
+		self.remotes: List[Callable[[], Awaitable[List[str]]]] = []
+
+	def describe(self, name: str, kind: str, text: str):
+		"""
+		Set type and help text of metric
+
+		:param		name:  The metric name
+		:type		name:  str
+		:param		kind:  The kind (counter, gauge or histogram)
+		:type		kind:  str
+		:param		text:  The help text
+		:type		text:  str
+		"""
+		self.help[name] = (kind, text)
+
+	def inc(self, name: str, value: float = 1, **labels: Any):
+		"""
+		Increment counter
+
+		:param		name:	 The metric name
+		:type		name:	 str
+		:param		value:	 The value
+		:type		value:	 float
+		:param		labels:	 The labels
+		:type		labels:	 dict
+		"""
+		self.counters[name][self._labels(labels)] += value
+
+	def add(self, name: str, value: float, **labels: Any):
+		"""
+		Add value to gauge (negative value decrements it)
+
+		:param		name:	 The metric name
+		:type		name:	 str
+		:param		value:	 The value
+		:type		value:	 float
+		:param		labels:	 The labels
+		:type		labels:	 dict
+		"""
+		self.gauges[name][self._labels(labels)] += value
+
+	def set(self, name: str, value: float, **labels: Any):
+		"""
+		Set value of gauge
+
+		:param		name:	 The metric name
+		:type		name:	 str
+		:param		value:	 The value
+		:type		value:	 float
+		:param		labels:	 The labels
+		:type		labels:	 dict
+		"""
+		self.gauges[name][self._labels(labels)] = value
+
+	def observe(self, name: str, value: float, **labels: Any):
+		"""
+		Observe value of histogram
+
+		:param		name:	 The metric name
+		:type		name:	 str
+		:param		value:	 The value
+		:type		value:	 float
+		:param		labels:	 The labels
+		:type		labels:	 dict
+		"""
+		key = self._labels(labels)
+		histogram = self.histograms[name].get(key)
+
+		if histogram is None:
+			histogram = Histogram(self.buckets.get(name, LATENCY_BUCKETS))
+			self.histograms[name][key] = histogram
+
+		histogram.observe(value)
+
+	@staticmethod
+	def _labels(labels: Dict[str, Any]) -> Labels:
+		return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+	def _format(self, labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+		items = list(self.labels.items()) + list(labels) + ([extra] if extra else [])
+
+		if not items:
+			return ''
+
+		values = ','.join(
+			'{}="{}"'.format(name, value.replace('\\', '\\\\').replace('"', '\\"'))
+			for name, value in items
+		)
+
+		return f'{{{values}}}'
+
+	def render(self) -> str:
+		"""
+		Render all metrics in Prometheus text exposition format
+
+		:returns:	metrics text
+		:rtype:		str
+		"""
+		for collector in self.collectors:
+			try:
+				collector()
+			except Exception as ex:
+				logger.error(f'[metrics] collector {collector.__name__} error: {ex}')
+
+		lines = []
+
+		def header(name: str, kind: str):
+			text = self.help.get(name, (kind, name))[1]
+			lines.append(f'# HELP {name} {text}')
+			lines.append(f'# TYPE {name} {kind}')
+
+		for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+			for name, series in sorted(metrics.items()):
+				header(name, kind)
+
+				for labels, value in sorted(series.items()):
+					lines.append(f'{name}{self._format(labels)} {value:g}')
+
+		for name, series in sorted(self.histograms.items()):
+			header(name, 'histogram')
+
+			for labels, histogram in sorted(series.items()):
+				cumulative = 0
+
+				for bound, count in zip(histogram.buckets, histogram.counts):
+					cumulative += count
+					le = self._format(labels, ('le', f'{bound:g}'))
+					lines.append(f'{name}_bucket{le} {cumulative}')
+
+				le = self._format(labels, ('le', '+Inf'))
+				lines.append(f'{name}_bucket{le} {histogram.count}')
+				lines.append(f'{name}_sum{self._format(labels)} {histogram.sum:g}')
+				lines.append(f'{name}_count{self._format(labels)} {histogram.count}')
+
+		return '\n'.join(lines) + '\n'
+
+	async def render_all(self) -> str:
+		"""
+		Render metrics of this process merged with metrics of remotes
+
+		:returns:	metrics text
+		:rtype:		str
+		"""
+		texts = [self.render()]
+
+		for remote in self.remotes:
+			try:
+				texts.extend(await remote())
+			except Exception as ex:
+				logger.error(f'[metrics] remote {remote.__name__} error: {ex}')
+
+		return merge_metrics(texts) if len(texts) > 1 else texts[0]
+
+
+def merge_metrics(texts: List[str]) -> str:
+	"""
+	Merge metrics texts of several processes: series of one metric are
+	put under one HELP and TYPE header (series must differ by labels)
+
+	:param		texts:	The metrics texts in Prometheus text format
+	:type		texts:	List[str]
+
+	:returns:	metrics text
+	:rtype:		str
+	"""
+	headers: Dict[str, List[str]] = {}
+	series: Dict[str, List[str]] = defaultdict(list)
+
+	for text in texts:
+		name = ''
+
+		for line in text.splitlines():
+			if line.startswith('# '):
+				name = line.split(' ', 3)[2]
+				lines = headers.setdefault(name, [])
+
+				if len(lines) < 2:
+					lines.append(line)
+			elif line:
+				series[name].append(line)
+
+	lines = []
+
+	for name, header in headers.items():
+		lines.extend(header)
+		lines.extend(series[name])
+
+	return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+registry.describe(
+	'sinwin_api_request_seconds', 'histogram', 'Backend API request latency'
+)
+registry.describe(
+	'sinwin_api_response_bytes', 'histogram', 'Backend API response body size'
+)
+registry.describe(
+	'sinwin_api_responses_total', 'counter', 'Backend API responses by status'
+)
+registry.describe('sinwin_api_in_flight', 'gauge', 'Backend API requests in progress')
+registry.describe('sinwin_updates_total', 'counter', 'Telegram updates by type')
+registry.describe('sinwin_update_seconds', 'histogram', 'Update processing latency')
+registry.describe(
+	'sinwin_update_errors_total', 'counter', 'Updates failed with exception'
+)
+registry.describe('sinwin_handler_seconds', 'histogram', 'Handler latency')
+registry.describe(
+	'sinwin_handler_errors_total', 'counter', 'Handlers failed with exception'
+)
+registry.describe('sinwin_job_seconds', 'histogram', 'Scheduler job duration')
+registry.describe('sinwin_job_errors_total', 'counter', 'Scheduler jobs failed')
+registry.buckets['sinwin_api_response_bytes'] = SIZE_BUCKETS
+registry.buckets['sinwin_job_seconds'] = LATENCY_BUCKETS + (60.0, 300.0, 1800.0)
+
+
+def api_summary(limit: int = 10) -> List[Dict[str, Any]]:
+	"""
+	Summarize backend API metrics per endpoint, the slowest in total first
+
+	:param		limit:	The maximum count of endpoints
+	:type		limit:	int
+
+	:returns:	rows with endpoint, count, errors, total, avg, p95 and max
+	            latency (seconds), avg and max size (bytes) and in-flight
+	:rtype:		List[Dict[str, Any]]
+	"""
+	latencies = registry.histograms.get('sinwin_api_request_seconds', {})
+	sizes = registry.histograms.get('sinwin_api_response_bytes', {})
+	responses = registry.counters.get('sinwin_api_responses_total', {})
+	in_flight = registry.gauges.get('sinwin_api_in_flight', {})
+
+	errors: Dict[str, float] = defaultdict(float)
+
+	for labels, value in responses.items():
+		label = dict(labels)
+
+		if not label['status'].startswith('2'):
+			errors[label['endpoint']] += value
+
+	rows = []
+
+	for labels, latency in latencies.items():
+		endpoint = dict(labels)['endpoint']
+		size = sizes.get(labels)
+
+		rows.append(
+			{
+				'endpoint': endpoint,
+				'count': latency.count,
+				'errors': int(errors[endpoint]),
+				'total': latency.sum,
+				'avg': latency.sum / latency.count if latency.count else 0.0,
+				'p95': latency.quantile(0.95),
+				'max': latency.max,
+				'avg_size': size.sum / size.count if size and size.count else 0.0,
+				'max_size': size.max if size else 0.0,
+				'in_flight': int(in_flight.get(labels, 0)),
+			}
+		)
+
+	rows.sort(key=lambda row: row['total'], reverse=True)
+
+	return rows[:limit]
+
+
+def job_label(job_id: str) -> str:
+	"""
+	Get job label: numbers in job id (sendtransac_123) are dropped
+
+	:param		job_id:	 The job id
+	:type		job_id:	 str
+
+	:returns:	job label
+	:rtype:		str
+	"""
+	return re.sub(r'\d+', '{id}', job_id)
+
+
+def watch_scheduler(scheduler: BaseScheduler):
+	"""
+	Record duration and errors of scheduler jobs
+
+	:param		scheduler:	The scheduler
+	:type		scheduler:	BaseScheduler
+	"""
+	started: Dict[Tuple[str, Any], Tuple[float, str]] = {}
+
+	def on_submitted(event: JobEvent):
+		job = scheduler.get_job(event.job_id, event.jobstore)
+		# jobs added without id get random one, name is the function
+		label = job.name if job is not None else job_label(event.job_id)
+
+		for run_time in event.scheduled_run_times:
+			started[(event.job_id, run_time)] = (time.monotonic(), label)
+
+	def on_finished(event: JobExecutionEvent):
+		item = started.pop((event.job_id, event.scheduled_run_time), None)
+
+		if item is None:
+			return
+
+		started_at, label = item
+		registry.observe('sinwin_job_seconds', time.monotonic() - started_at, job=label)
+
+		if event.exception is not None:
+			registry.inc('sinwin_job_errors_total', job=label)
+
+	scheduler.add_listener(on_submitted, EVENT_JOB_SUBMITTED)
+	scheduler.add_listener(on_finished, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+
+
+def create_metrics_app() -> web.Application:
+	"""
+	Create aiohttp application serving registry at /metrics
+
+	:returns:	aiohttp application
+	:rtype:		web.Application
+	"""
+
+	async def metrics(request: web.Request) -> web.Response:
+		return web.Response(
+			text=await registry.render_all(),
+			content_type='text/plain',
+			headers={'X-Content-Type-Options': 'nosniff'},
+		)
+
+	app = web.Application()
+	app.router.add_get('/metrics', metrics)
+
+	return app
+
+
+async def start_metrics_server(
+	host: str, port: int, app: Optional[web.Application] = None
+) -> web.AppRunner:
+	"""
+	Start /metrics http server next to polling
+
+	:param		host:  The host
+	:type		host:  str
+	:param		port:  The port
+	:type		port:  int
+	:param		app:   The metrics application with extra routes (webhook)
+	:type		app:   Optional[web.Application]
+
+	:returns:	runner (call cleanup() on shutdown)
+	:rtype:		web.AppRunner
+	"""
+	runner = web.AppRunner(app or create_metrics_app(), access_log=None)
+	await runner.setup()
+	await web.TCPSite(runner, host, port).start()
+
+	logger.info(f'Metrics are served on http://{host}:{port}/metrics')
+
+	return runner
@@ -0,0 +1,328 @@
+import asyncio
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from loguru import logger
+
+from app.loader import bot, config
+
+
+class TokenBucket:
+	"""
+	This class describes a token bucket rate limiter.
+	"""
+
+	def __init__(self, rate: float, capacity: Optional[float] = None):
+		"""
+		Constructs a new instance.
+
+		:param		rate:	   The tokens per second
+		:type		rate:	   float
+		:param		capacity:  The bucket capacity (burst), rate by default
+		:type		capacity:  Optional[float]
+		"""
+		self.rate = rate
+		self.capacity = capacity if capacity is not None else max(rate, 1.0)
+		self.tokens = self.capacity
+		self.updated = time.monotonic()
+
+	def _fill(self):
+		now = time.monotonic()
+		self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+		self.updated = now
+
+	def delay(self) -> float:
+		"""
+		Seconds to wait until the next token is available
+
+		:returns:	delay in seconds
+		:rtype:		float
+		"""
+		self._fill()
+
+		return 0.0 if self.tokens >= 1.0 else (1.0 - self.tokens) / self.rate
+
+	async def acquire(self):
+		"""
+		Wait for token and take it
+		"""
+		while True:
+			delay = self.delay()
+
+			if delay <= 0.0:
+				self.tokens -= 1.0
+				return
+
+			await asyncio.sleep(delay)
+
+	@property
+	def idle(self) -> bool:
+		"""
+		Whether bucket is full again, so it can be dropped
+
+		:returns:	True if bucket is full
+		:rtype:		bool
+		"""
+		self._fill()
+
+		return self.tokens >= self.capacity
+
+
+class SendQueue:
+	"""
+	This class describes an outbound Telegram requests queue.
+
+	Requests are sent by worker tasks in priority order, limited by global
+	and per-chat token buckets. TelegramRetryAfter is retried after the
+	requested delay instead of failing the caller.
+	"""
+
+	INTERACTIVE = 0
+	BULK = 10
+
+	def __init__(self, bot: Bot):
+		"""
+		Constructs a new instance.
+
+		:param		bot:  The bot
+		:type		bot:  Bot
+		"""
+		self.bot = bot
+		self.queue: Optional[asyncio.PriorityQueue] = None
+		self.workers: List[asyncio.Task] = []
+		self.global_bucket = TokenBucket(config.sender.GLOBAL_RATE)
+		self.chat_buckets: Dict[Any, TokenBucket] = {}
+		self.sequence = itertools.count()
+		self.depth: Dict[int, int] = {}
+		# requests of limited chats waiting to be put back to queue
+		self.delayed: Dict[int, Tuple[asyncio.TimerHandle, tuple]] = {}
+		self.counters = {'sent': 0, 'retried': 0, 'failed': 0}
+
+	def start(self):
+		"""
+		Start worker tasks (called lazily on first request)
+		"""
+		if self.queue is None:
+			self.queue = asyncio.PriorityQueue()
+
+		self.workers = [task for task in self.workers if not task.done()]
+
+		for _ in range(config.sender.WORKERS - len(self.workers)):
+			self.workers.append(asyncio.create_task(self._worker()))
+
+	async def stop(self):
+		"""
+		Cancel worker tasks, requests which were not sent fail with
+		RuntimeError
+		"""
+		for task in self.workers:
+			task.cancel()
+
+		await asyncio.gather(*self.workers, return_exceptions=True)
+
+		items = []
+
+		for handle, item in self.delayed.values():
+			handle.cancel()
+			items.append(item)
+
+		while self.queue is not None and not self.queue.empty():
+			items.append(self.queue.get_nowait())
+
+		for priority, _, _, _, future in items:
+			self.depth[priority] -= 1
+
+			if not future.done():
+				future.set_exception(RuntimeError('SendQueue is stopped'))
+
+		self.workers = []
+		self.delayed = {}
+		self.queue = None
+
+	def chat_bucket(self, chat_id: Any) -> TokenBucket:
+		"""
+		Get token bucket of chat, dropping idle buckets of other chats
+
+		:param		chat_id:  The chat identifier
+		:type		chat_id:  Any
+
+		:returns:	chat token bucket
+		:rtype:		TokenBucket
+		"""
+		bucket = self.chat_buckets.get(chat_id)
+
+		if bucket is None:
+			if len(self.chat_buckets) >= config.sender.MAX_CHATS:
+				for idle_chat in [
+					chat for chat, item in self.chat_buckets.items() if item.idle
+				]:
+					del self.chat_buckets[idle_chat]
+
+			bucket = TokenBucket(config.sender.CHAT_RATE, capacity=1.0)
+			self.chat_buckets[chat_id] = bucket
+
+		return bucket
+
+	async def call(
+		self,
+		chat_id: Any,
+		request: Callable[[], Awaitable[Any]],
+		priority: int = INTERACTIVE,
+	) -> Any:
+		"""
+		Put request to queue and wait for its result
+
+		:param		chat_id:   The chat identifier
+		:type		chat_id:   Any
+		:param		request:   The request factory (called on every attempt)
+		:type		request:   Callable[[], Awaitable[Any]]
+		:param		priority:  The priority, lower is sent first
+		:type		priority:  int
+
+		:returns:	request result
+		:rtype:		Any
+		"""
+		self.start()
+
+		future = asyncio.get_running_loop().create_future()
+		self.depth[priority] = self.depth.get(priority, 0) + 1
+		await self.queue.put((priority, next(self.sequence), chat_id, request, future))
+
+		return await future
+
+	async def _worker(self):
+		while True:
+			item = await self.queue.get()
+			priority, _, chat_id, request, future = item
+			self.depth[priority] -= 1
+
+			delay = self.chat_bucket(chat_id).delay()
+
+			if delay > 0.0:
+				# chat is limited: put request back later instead of blocking
+				# the worker, so other chats are not waiting behind it
+				self.depth[priority] += 1
+				handle = asyncio.get_running_loop().call_later(
+					delay, self._put_back, item
+				)
+				self.delayed[item[1]] = (handle, item)
+				self.queue.task_done()
+				continue
+
+			try:
+				if not future.done():
+					result = await self._send(chat_id, request)
+
+					if not future.done():
+						future.set_result(result)
+			except asyncio.CancelledError:
+				# worker is stopped while request is being sent
+				if not future.done():
+					future.set_exception(RuntimeError('SendQueue is stopped'))
+
+				raise
+			except Exception as ex:
+				self.counters['failed'] += 1
+
+				if not future.done():
+					future.set_exception(ex)
+			finally:
+				self.queue.task_done()
+
+	def _put_back(self, item: tuple):
+		del self.delayed[item[1]]
+		self.queue.put_nowait(item)
+
+	async def _send(self, chat_id: Any, request: Callable[[], Awaitable[Any]]) -> Any:
+		retries = 0
+
+		while True:
+			await self.chat_bucket(chat_id).acquire()
+			await self.global_bucket.acquire()
+
+			try:
+				result = await request()
+				self.counters['sent'] += 1
+				return result
+			except TelegramRetryAfter as ex:
+				if retries >= config.sender.MAX_RETRIES:
+					raise
+
+				retries += 1
+				self.counters['retried'] += 1
+				logger.warning(
+					f'[SendQueue] flood wait {ex.retry_after}s for {chat_id} ({retries})'
+				)
+				await asyncio.sleep(ex.retry_after)
+
+	def send_message(self, chat_id: Any, priority: int = INTERACTIVE, **kwargs):
+		"""
+		Queue Bot.send_message
+
+		:param		chat_id:   The chat identifier
+		:type		chat_id:   Any
+		:param		priority:  The priority
+		:type		priority:  int
+		:param		kwargs:	   The Bot.send_message arguments
+		:type		kwargs:	   dict
+		"""
+		return self.call(
+			chat_id,
+			lambda: self.bot.send_message(chat_id=chat_id, **kwargs),
+			priority,
+		)
+
+	def send_photo(self, chat_id: Any, priority: int = INTERACTIVE, **kwargs):
+		"""
+		Queue Bot.send_photo
+
+		:param		chat_id:   The chat identifier
+		:type		chat_id:   Any
+		:param		priority:  The priority
+		:type		priority:  int
+		:param		kwargs:	   The Bot.send_photo arguments
+		:type		kwargs:	   dict
+		"""
+		return self.call(
+			chat_id,
+			lambda: self.bot.send_photo(chat_id=chat_id, **kwargs),
+			priority,
+		)
+
+	def send_document(self, chat_id: Any, priority: int = INTERACTIVE, **kwargs):
+		"""
+		Queue Bot.send_document
+
+		:param		chat_id:   The chat identifier
+		:type		chat_id:   Any
+		:param		priority:  The priority
+		:type		priority:  int
+		:param		kwargs:	   The Bot.send_document arguments
+		:type		kwargs:	   dict
+		"""
+		return self.call(
+			chat_id,
+			lambda: self.bot.send_document(chat_id=chat_id, **kwargs),
+			priority,
+		)
+
+	def metrics(self) -> Dict[str, Any]:
+		"""
+		Get queue metrics
+
+		:returns:	queue depth by priority and sent/retried/failed counters
+		:rtype:		Dict[str, Any]
+		"""
+		return {
+			'depth': self.queue.qsize() if self.queue is not None else 0,
+			'depth_by_priority': dict(self.depth),
+			'workers': len([task for task in self.workers if not task.done()]),
+			'chats': len(self.chat_buckets),
+			**self.counters,
+		}
+
+
+sender = SendQueue(bot)
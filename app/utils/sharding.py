@@ -0,0 +1,376 @@
+import asyncio
+import struct
+import zlib
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject, Update
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.schedulers.base import BaseScheduler
+from loguru import logger
+
+from app.utils.jsonlib import dumps_bytes, loads
+from app.utils.metrics import registry
+
+# frames are length-prefixed JSON messages
+HEADER = struct.Struct('!I')
+
+# seconds front waits for metrics of workers
+METRICS_TIMEOUT = 2.0
+
+registry.describe(
+	'sinwin_shard_updates_total', 'counter', 'Updates forwarded to worker'
+)
+
+
+def write_frame(writer: asyncio.StreamWriter, message: Dict[str, Any]):
+	"""
+	Write message frame to stream
+
+	:param		writer:	  The writer
+	:type		writer:	  asyncio.StreamWriter
+	:param		message:  The message
+	:type		message:  Dict[str, Any]
+	"""
+	body = dumps_bytes(message)
+	writer.write(HEADER.pack(len(body)) + body)
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Optional[Dict[str, Any]]:
+	"""
+	Read message frame from stream
+
+	:param		reader:	 The reader
+	:type		reader:	 asyncio.StreamReader
+
+	:returns:	message, None if connection is closed
+	:rtype:		Optional[Dict[str, Any]]
+	"""
+	try:
+		(size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+		return loads(await reader.readexactly(size))
+	except (asyncio.IncompleteReadError, ConnectionError):
+		return None
+
+
+def shard_of(key: Any, count: int) -> int:
+	"""
+	Get shard index of key, stable between processes
+
+	:param		key:	The key (chat id)
+	:type		key:	Any
+	:param		count:	The shards count
+	:type		count:	int
+
+	:returns:	shard index
+	:rtype:		int
+	"""
+	return zlib.crc32(str(key).encode()) % count
+
+
+class ShardRouter:
+	"""
+	This class describes front side of IPC: it accepts worker connections
+	and sends each worker updates of its chats. Messages for worker which
+	is (re)starting are kept until it connects. Metrics of workers are
+	collected through it too, so front serves metrics of all processes.
+	"""
+
+	def __init__(self, count: int):
+		"""
+		Constructs a new instance.
+
+		:param		count:	The workers count
+		:type		count:	int
+		"""
+		self.count = count
+		self.writers: Dict[int, asyncio.StreamWriter] = {}
+		self.backlog: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+		self.ready = asyncio.Event()
+		self.server: Optional[asyncio.AbstractServer] = None
+		self.metrics: Dict[int, asyncio.Future] = {}
+
+	async def start(self, host: str = '127.0.0.1', port: int = 0) -> int:
+		"""
+		Start IPC server
+
+		:param		host:  The host
+		:type		host:  str
+		:param		port:  The port, 0 for any free port
+		:type		port:  int
+
+		:returns:	port of server
+		:rtype:		int
+		"""
+		self.server = await asyncio.start_server(self._serve_worker, host, port)
+
+		return self.server.sockets[0].getsockname()[1]
+
+	async def _serve_worker(
+		self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+	):
+		hello = await read_frame(reader)
+
+		if hello is None or hello.get('type') != 'hello':
+			writer.close()
+			return
+
+		index = hello['index']
+		self.writers[index] = writer
+		logger.info(f'[sharding] worker {index} connected')
+
+		for message in self.backlog.pop(index, []):
+			write_frame(writer, message)
+
+		if len(self.writers) == self.count:
+			self.ready.set()
+
+		while (message := await read_frame(reader)) is not None:
+			if message['type'] == 'broadcast':
+				# e.g. removal of scheduler job added by other worker
+				for other, other_writer in self.writers.items():
+					if other != index:
+						write_frame(other_writer, message['message'])
+			elif message['type'] == 'metrics':
+				future = self.metrics.pop(index, None)
+
+				if future is not None and not future.done():
+					future.set_result(message['text'])
+
+		if self.writers.get(index) is writer:
+			del self.writers[index]
+
+		future = self.metrics.pop(index, None)
+
+		if future is not None:
+			future.cancel()
+
+		logger.warning(f'[sharding] worker {index} disconnected')
+
+	def send(self, index: int, message: Dict[str, Any]):
+		"""
+		Send message to worker
+
+		:param		index:	  The worker index
+		:type		index:	  int
+		:param		message:  The message
+		:type		message:  Dict[str, Any]
+		"""
+		writer = self.writers.get(index)
+
+		if writer is None or writer.is_closing():
+			self.backlog[index].append(message)
+			return
+
+		write_frame(writer, message)
+
+	async def collect_metrics(self) -> List[str]:
+		"""
+		Collect metrics of connected workers, workers which do not answer in
+		METRICS_TIMEOUT seconds are skipped
+
+		:returns:	metrics texts of workers
+		:rtype:		List[str]
+		"""
+		loop = asyncio.get_running_loop()
+
+		for index, writer in self.writers.items():
+			# request of concurrent scrape is shared
+			if index not in self.metrics and not writer.is_closing():
+				self.metrics[index] = loop.create_future()
+				write_frame(writer, {'type': 'metrics'})
+
+		futures = list(self.metrics.values())
+
+		if not futures:
+			return []
+
+		await asyncio.wait(futures, timeout=METRICS_TIMEOUT)
+
+		return [
+			future.result()
+			for future in futures
+			if future.done() and not future.cancelled()
+		]
+
+	async def close(self):
+		"""
+		Ask workers to stop (they finish updates in progress) and stop server
+		"""
+		for writer in self.writers.values():
+			write_frame(writer, {'type': 'stop'})
+			await writer.drain()
+
+		if self.server is not None:
+			self.server.close()
+
+
+class ShardMiddleware(BaseMiddleware):
+	"""
+	This class describes front dispatcher middleware which forwards update
+	to worker by chat instead of handling it, so updates of one chat are
+	handled by one worker in order.
+	"""
+
+	def __init__(self, router: ShardRouter):
+		"""
+		Constructs a new instance.
+
+		:param		router:	 The router
+		:type		router:	 ShardRouter
+		"""
+		self.router = router
+
+	async def __call__(
+		self,
+		handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+		event: TelegramObject,
+		data: Dict[str, Any],
+	) -> Any:
+		chat = data.get('event_chat')
+		user = data.get('event_from_user')
+
+		if chat is not None:
+			key = chat.id
+		elif user is not None:
+			key = user.id
+		else:
+			key = event.update_id if isinstance(event, Update) else 0
+
+		index = shard_of(key, self.router.count)
+		self.router.send(
+			index,
+			{
+				'type': 'update',
+				'key': key,
+				'update': event.model_dump(mode='json', exclude_unset=True),
+			},
+		)
+		registry.inc('sinwin_shard_updates_total', shard=index)
+
+
+class ShardWorker:
+	"""
+	This class describes worker side of IPC: it handles updates sent by
+	front, updates of one chat one after another, and answers front with
+	its metrics. Messages broadcast by other workers are passed to handlers
+	by message type.
+	"""
+
+	def __init__(
+		self,
+		dispatcher: Dispatcher,
+		bot: Bot,
+		index: int,
+		scheduler: Optional[BaseScheduler] = None,
+	):
+		"""
+		Constructs a new instance.
+
+		:param		dispatcher:	 The dispatcher
+		:type		dispatcher:	 Dispatcher
+		:param		bot:		 The bot
+		:type		bot:		 Bot
+		:param		index:		 The worker index
+		:type		index:		 int
+		:param		scheduler:	 The scheduler which jobs are shared
+		:type		scheduler:	 Optional[BaseScheduler]
+		"""
+		self.dispatcher = dispatcher
+		self.bot = bot
+		self.index = index
+		self.scheduler = scheduler
+		self.writer: Optional[asyncio.StreamWriter] = None
+		self.reader: Optional[asyncio.StreamReader] = None
+		self.locks: Dict[Any, asyncio.Lock] = {}
+		self.waiting: Dict[Any, int] = defaultdict(int)
+		self.tasks: Set[asyncio.Task] = set()
+		self.handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {}
+
+		if scheduler is not None:
+			self._share_job_removal(scheduler)
+
+	def _share_job_removal(self, scheduler: BaseScheduler):
+		remove_job = scheduler.remove_job
+
+		def remove_shared_job(job_id: str, jobstore: Optional[str] = None):
+			try:
+				remove_job(job_id, jobstore)
+			except JobLookupError:
+				# job was added by other worker
+				self.broadcast({'type': 'remove_job', 'job_id': job_id})
+
+		self._remove_local_job = remove_job
+		scheduler.remove_job = remove_shared_job
+
+	async def connect(self, port: int, host: str = '127.0.0.1'):
+		"""
+		Connect to front process
+
+		:param		port:  The port
+		:type		port:  int
+		:param		host:  The host
+		:type		host:  str
+		"""
+		self.reader, self.writer = await asyncio.open_connection(host, port)
+		write_frame(self.writer, {'type': 'hello', 'index': self.index})
+		await self.writer.drain()
+
+	def broadcast(self, message: Dict[str, Any]):
+		"""
+		Send message to all other workers
+
+		:param		message:  The message
+		:type		message:  Dict[str, Any]
+		"""
+		if self.writer is not None:
+			write_frame(self.writer, {'type': 'broadcast', 'message': message})
+
+	async def _handle(self, key: Any, update: Dict[str, Any]):
+		lock = self.locks.setdefault(key, asyncio.Lock())
+		self.waiting[key] += 1
+
+		try:
+			async with lock:
+				await self.dispatcher.feed_raw_update(self.bot, update)
+		except Exception as ex:
+			logger.error(f'[sharding] update {update.get("update_id")} error: {ex}')
+		finally:
+			self.waiting[key] -= 1
+
+			if not self.waiting[key]:
+				del self.waiting[key]
+				del self.locks[key]
+
+	async def run(self):
+		"""
+		Handle messages from front until it asks to stop or disconnects,
+		then wait for updates in progress
+		"""
+		while (message := await read_frame(self.reader)) is not None:
+			if message['type'] == 'update':
+				task = asyncio.create_task(
+					self._handle(message['key'], message['update'])
+				)
+				self.tasks.add(task)
+				task.add_done_callback(self.tasks.discard)
+			elif message['type'] == 'remove_job' and self.scheduler is not None:
+				try:
+					self._remove_local_job(message['job_id'])
+				except JobLookupError:
+					pass
+			elif message['type'] in self.handlers:
+				self.handlers[message['type']](message)
+			elif message['type'] == 'metrics':
+				write_frame(self.writer, {'type': 'metrics', 'text': registry.render()})
+			elif message['type'] == 'stop':
+				break
+
+		if self.tasks:
+			logger.info(
+				f'[sharding] worker {self.index}: {len(self.tasks)} updates left'
+			)
+			await asyncio.wait(self.tasks)
+
+		self.writer.close()
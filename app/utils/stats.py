@@ -0,0 +1,408 @@
+from array import array
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+from app.api import APIRequest
+from app.loader import config
+from app.utils.caching import cached
+
+PERIODS = ('today', 'yesterday', 'last_week', 'last_month')
+METRICS = ('firstdep', 'dep', 'income')
+FIELDS = ('amount', 'income', 'x')
+
+# deposits and incomes which backend sends outside of the named periods
+OTHERS = 'others'
+
+IndexKey = Tuple[Optional[str], Optional[str], str, str]
+
+
+class StatsSnapshot:
+	"""
+	This class describes an indexed snapshot of /base/stats payload.
+
+	Every row of the payload is visited once and accumulated by
+	(partner_hash, game, period, metric) key. ``None`` in partner_hash or game
+	works as wildcard, so totals for all partners or all games are O(1) too.
+	"""
+
+	def __init__(self, result: Dict[str, Any]):
+		"""
+		Constructs a new instance.
+
+		:param		result:	 The /base/stats response
+		:type		result:	 Dict[str, Any]
+		"""
+		result = result or {}
+
+		self.data: Dict[str, Any] = result.get('data', {})
+		self.api_count: Dict[str, int] = result.get('api_count', {})
+		self.signals: Dict[str, Dict[str, int]] = result.get('signals', {})
+
+		self._counts: Dict[IndexKey, int] = defaultdict(int)
+		self._totals: Dict[Tuple[IndexKey, str], float] = defaultdict(float)
+		self._signals: Dict[Tuple[Optional[str], Optional[str]], int] = defaultdict(int)
+
+		self._build()
+
+	def _build(self):
+		"""
+		Build index in one linear pass over the payload
+		"""
+		for period in PERIODS:
+			for metric in METRICS:
+				self._add_rows(
+					period, metric, self.data.get(period, {}).get(metric, [])
+				)
+
+		for metric in METRICS:
+			rows = self.data.get(metric, [])
+
+			if isinstance(rows, list):
+				self._add_rows(OTHERS, metric, rows)
+
+		for game, info in self.signals.items():
+			for partner_hash, count in info.items():
+				for key in {
+					(partner_hash, game),
+					(partner_hash, None),
+					(None, game),
+					(None, None),
+				}:
+					self._signals[key] += count
+
+	def _add_rows(self, period: str, metric: str, rows: list):
+		"""
+		Adds rows of one period and metric to index.
+
+		:param		period:	 The period
+		:type		period:	 str
+		:param		metric:	 The metric
+		:type		metric:	 str
+		:param		rows:	 The rows
+		:type		rows:	 list
+		"""
+		counts = self._counts
+		totals = self._totals
+
+		for row in rows:
+			partner_hash = row.get('partner_hash')
+			game = row.get('game')
+
+			# set drops duplicated keys when partner_hash or game is missing
+			for key in {
+				(partner_hash, game, period, metric),
+				(partner_hash, None, period, metric),
+				(None, game, period, metric),
+				(None, None, period, metric),
+			}:
+				counts[key] += 1
+
+				for field in FIELDS:
+					value = row.get(field)
+
+					if value is not None:
+						totals[(key, field)] += value
+
+	def count(
+		self,
+		metric: str,
+		period: str,
+		partner_hash: Optional[str] = None,
+		game: Optional[str] = None,
+	) -> int:
+		"""
+		Get count of rows
+
+		:param		metric:		   The metric (firstdep, dep, income)
+		:type		metric:		   str
+		:param		period:		   The period
+		:type		period:		   str
+		:param		partner_hash:  The partner hash, None for all partners
+		:type		partner_hash:  Optional[str]
+		:param		game:		   The game, None for all games
+		:type		game:		   Optional[str]
+
+		:returns:	count of rows
+		:rtype:		int
+		"""
+		return self._counts.get((partner_hash, game, period, metric), 0)
+
+	def total(
+		self,
+		metric: str,
+		period: str,
+		field: str = 'amount',
+		partner_hash: Optional[str] = None,
+		game: Optional[str] = None,
+	) -> float:
+		"""
+		Get sum of field over rows
+
+		:param		metric:		   The metric (firstdep, dep, income)
+		:type		metric:		   str
+		:param		period:		   The period
+		:type		period:		   str
+		:param		field:		   The summed field
+		:type		field:		   str
+		:param		partner_hash:  The partner hash, None for all partners
+		:type		partner_hash:  Optional[str]
+		:param		game:		   The game, None for all games
+		:type		game:		   Optional[str]
+
+		:returns:	sum of field
+		:rtype:		float
+		"""
+		return self._totals.get(((partner_hash, game, period, metric), field), 0)
+
+	def signals_count(
+		self, partner_hash: Optional[str] = None, game: Optional[str] = None
+	) -> int:
+		"""
+		Get count of generated signals
+
+		:param		partner_hash:  The partner hash, None for all partners
+		:type		partner_hash:  Optional[str]
+		:param		game:		   The game, None for all games
+		:type		game:		   Optional[str]
+
+		:returns:	signals count
+		:rtype:		int
+		"""
+		return self._signals.get((partner_hash, game), 0)
+
+	def api(self, partner_hash: Optional[str] = None) -> int:
+		"""
+		Get API count
+
+		:param		partner_hash:  The partner hash, None for all partners
+		:type		partner_hash:  Optional[str]
+
+		:returns:	api count
+		:rtype:		int
+		"""
+		if partner_hash is None:
+			return sum(self.api_count.values())
+
+		return self.api_count.get(partner_hash, 0)
+
+	def summary(
+		self,
+		partner_hash: Optional[str] = None,
+		game: Optional[str] = None,
+		income_field: str = 'x',
+	) -> Dict[str, Any]:
+		"""
+		Get summary of partner (or all partners) statistics by periods
+
+		:param		partner_hash:  The partner hash, None for all partners
+		:type		partner_hash:  Optional[str]
+		:param		game:		   The game, None for all games
+		:type		game:		   Optional[str]
+		:param		income_field:  The income field
+		:type		income_field:  str
+
+		:returns:	statistics summary
+		:rtype:		Dict[str, Any]
+		"""
+		summary = {}
+		alltime_firstdeps = 0
+		alltime_deps = 0
+		alltime_income = 0
+
+		for period in PERIODS + (OTHERS,):
+			firstdeps = self.count('firstdep', period, partner_hash, game)
+			deps = self.total(
+				'firstdep', period, 'amount', partner_hash, game
+			) + self.total('dep', period, 'amount', partner_hash, game)
+			income = self.total('income', period, income_field, partner_hash, game)
+
+			alltime_firstdeps += firstdeps
+
+			if period != OTHERS:
+				# deposits and income of other dates are not counted, as before
+				alltime_deps += deps
+				alltime_income += income
+				summary[f'{period}_firstdeps'] = firstdeps
+				summary[f'{period}_deps'] = deps
+				summary[f'{period}_income'] = income
+
+		# rolling month (today + yesterday + last week + last month buckets)
+		summary['month_firstdeps'] = sum(
+			summary[f'{period}_firstdeps'] for period in PERIODS
+		)
+		summary['month_income'] = sum(summary[f'{period}_income'] for period in PERIODS)
+
+		summary['alltime_firstdeps'] = alltime_firstdeps
+		summary['alltime_deps'] = alltime_deps
+		summary['alltime_income'] = alltime_income
+		summary['api_count'] = self.api(partner_hash)
+		summary['signals_gens'] = self.signals_count(
+			partner_hash, game if partner_hash is None else None
+		)
+
+		return summary
+
+
+class UsersColumns:
+	"""
+	This class describes /user/find result stored column by column.
+
+	Register dates are parsed once into day ordinals, so period buckets are
+	integer comparisons over compact arrays.
+	"""
+
+	def __init__(self, users: List[Dict[str, Any]]):
+		"""
+		Constructs a new instance.
+
+		:param		users:	The users
+		:type		users:	List[Dict[str, Any]]
+		"""
+		self.register_day = array('l')
+		self.approved = bytearray()
+		self.balance = array('d')
+		self.income = array('d')
+
+		for user in users:
+			self.register_day.append(
+				# register_date is '%Y-%m-%dT%H:%M:%S', only the date part matters
+				date.fromisoformat(user['register_date'][:10]).toordinal()
+			)
+			self.approved.append(1 if user['approved'] else 0)
+			self.balance.append(user['balance'])
+			self.income.append(user['income'])
+
+	def __len__(self) -> int:
+		return len(self.register_day)
+
+	def aggregate(self, today: Optional[date] = None) -> Dict[str, Any]:
+		"""
+		Count period buckets, funnel buckets and income sum in one pass
+
+		:param		today:	The today date
+		:type		today:	Optional[date]
+
+		:returns:	users statistics
+		:rtype:		Dict[str, Any]
+		"""
+		today = today or datetime.now().date()
+		yesterday = today - timedelta(days=1)
+		last_week_start = today - timedelta(days=today.weekday() + 7)
+		last_week_end = last_week_start + timedelta(days=6)
+		last_month_start = today - relativedelta(months=1)
+		last_month_end = last_month_start + relativedelta(day=31)
+
+		today = today.toordinal()
+		yesterday = yesterday.toordinal()
+		last_week_start = last_week_start.toordinal()
+		last_week_end = last_week_end.toordinal()
+		last_month_start = last_month_start.toordinal()
+		last_month_end = last_month_end.toordinal()
+
+		users_today = users_yesterday = users_lastweek = users_month = 0
+		users_notreg_count = users_nottopup_count = users_gamed_count = 0
+		users_income = 0
+
+		for day, approved, balance, income in zip(
+			self.register_day, self.approved, self.balance, self.income
+		):
+			users_income += income
+
+			if day == today:
+				users_today += 1
+			elif day == yesterday:
+				users_yesterday += 1
+
+			if last_week_start <= day <= last_week_end:
+				users_lastweek += 1
+			if last_month_start <= day <= last_month_end:
+				users_month += 1
+
+			if not approved:
+				users_notreg_count += 1
+			elif balance < 500.0:
+				users_nottopup_count += 1
+			elif balance > 500.0:
+				users_gamed_count += 1
+
+		return {
+			'users_count': len(self),
+			'users_today': users_today,
+			'users_yesterday': users_yesterday,
+			'users_lastweek': users_lastweek,
+			'users_month': users_month,
+			'users_notreg_count': users_notreg_count,
+			'users_nottopup_count': users_nottopup_count,
+			'users_gamed_count': users_gamed_count,
+			'users_income': users_income,
+		}
+
+
+@cached(
+	ttl=config.stats.USERS_TTL,
+	namespace='stats',
+	# stale users are not cached, next call tries backend again
+	is_negative=lambda data: 'data_as_of' in data,
+)
+async def collect_stats(opts: dict) -> Dict[str, Any]:
+	"""
+	Collect users statistics of /user/find opts, cached for
+	STATS.USERS_TTL seconds
+
+	:param		opts:  The /user/find opts
+	:type		opts:  dict
+
+	:returns:	users statistics
+	:rtype:		Dict[str, Any]
+	"""
+	result, status = await APIRequest.post('/user/find', {'opts': opts})
+
+	data = UsersColumns(result['users']).aggregate()
+
+	if result.get('data_as_of'):
+		data['data_as_of'] = result['data_as_of']
+
+	return data
+
+
+@cached(
+	ttl=config.cache.ACHSTATS_TTL,
+	namespace='stats',
+	negative_ttl=config.cache.NEGATIVE_TTL,
+	is_negative=lambda response: response[1] != 200,
+)
+async def achievement_stats(partner_hash: str) -> Tuple[Any, int]:
+	"""
+	Get /base/achstats of partner, cached for CACHE.ACHSTATS_TTL seconds
+
+	:param		partner_hash:  The partner hash
+	:type		partner_hash:  str
+
+	:returns:	response and status code
+	:rtype:		Tuple[Any, int]
+	"""
+	return await APIRequest.get(f'/base/achstats?partnerhash={partner_hash}')
+
+
+@cached(
+	ttl=config.cache.REFERALS_TTL,
+	namespace='partners',
+	negative_ttl=config.cache.NEGATIVE_TTL,
+	is_negative=lambda response: response[1] != 200,
+)
+async def find_referals(partner_hash: str) -> Tuple[Any, int]:
+	"""
+	Find partners invited by partner, cached for CACHE.REFERALS_TTL seconds
+
+	:param		partner_hash:  The referrer partner hash
+	:type		partner_hash:  str
+
+	:returns:	/partner/find response and status code
+	:rtype:		Tuple[Any, int]
+	"""
+	return await APIRequest.post(
+		'/partner/find', {'opts': {'referrer_hash': partner_hash}}
+	)
@@ -0,0 +1,197 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, ClassVar, Dict, Optional, Tuple, Union
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from loguru import logger
+
+from app.api import STALE_STATUS, APIRequest
+from app.loader import config
+from app.utils.stats import StatsSnapshot
+
+STATS_VARIANTS = ('/base/stats', '/base/stats?exclude=1')
+
+
+@dataclass
+class StatsEntry:
+	"""
+	This dataclass describes cached /base/stats response.
+	"""
+
+	result: Union[Any, bool]
+	code: int
+	fetched_at: float
+	snapshot: Optional[StatsSnapshot] = None
+
+	@property
+	def age(self) -> float:
+		"""
+		Age of entry in seconds
+
+		:returns:	seconds since entry was fetched
+		:rtype:		float
+		"""
+		return time.monotonic() - self.fetched_at
+
+
+class StatsCache:
+	"""
+	This class describes in-memory cache of /base/stats variants.
+
+	Variants are refreshed in background by scheduler, concurrent misses
+	share one in-flight request to backend. Processes without scheduler
+	job (shard workers) refresh variant on request once it is older than
+	STATS.REFRESH_INTERVAL or was not fetched successfully.
+	"""
+
+	entries: ClassVar[Dict[str, StatsEntry]] = {}
+	inflight: ClassVar[Dict[str, asyncio.Future]] = {}
+	background: ClassVar[bool] = False
+
+	@staticmethod
+	async def _fetch(url: str) -> StatsEntry:
+		"""
+		Fetch variant from backend and store it
+
+		:param		url:  The stats url
+		:type		url:  str
+
+		:returns:	stored entry (previous one if backend failed)
+		:rtype:		StatsEntry
+		"""
+		result, code = await APIRequest.get(url)
+		entry = StatsEntry(result=result, code=code, fetched_at=time.monotonic())
+		previous = StatsCache.entries.get(url)
+
+		# stale response is not older than previous entry and carries marker
+		if code in (200, STALE_STATUS) or previous is None:
+			# indexed once per payload, in thread: it takes long on big payloads
+			entry.snapshot = await asyncio.to_thread(
+				StatsSnapshot, result if isinstance(result, dict) else {}
+			)
+			StatsCache.entries[url] = entry
+		else:
+			logger.warning(
+				f'[StatsCache] {url} refresh failed ({code}), keep entry aged {previous.age:.0f}s'
+			)
+			return previous
+
+		return entry
+
+	@staticmethod
+	async def refresh(url: str = '/base/stats') -> StatsEntry:
+		"""
+		Refresh variant, joining already running request if there is one
+
+		:param		url:  The stats url
+		:type		url:  str
+
+		:returns:	fresh entry
+		:rtype:		StatsEntry
+		"""
+		future = StatsCache.inflight.get(url)
+
+		if future is None:
+			future = asyncio.ensure_future(StatsCache._fetch(url))
+			StatsCache.inflight[url] = future
+			future.add_done_callback(lambda _: StatsCache.inflight.pop(url, None))
+
+		# shield: cancelled handler must not cancel request shared with others
+		return await asyncio.shield(future)
+
+	@staticmethod
+	async def _entry(url: str) -> StatsEntry:
+		"""
+		Get entry of variant, refreshing it when missing or expired
+
+		:param		url:  The stats url
+		:type		url:  str
+
+		:returns:	entry
+		:rtype:		StatsEntry
+		"""
+		entry = StatsCache.entries.get(url)
+
+		if entry is None:
+			return await StatsCache.refresh(url)
+
+		if StatsCache.background:
+			expired = entry.age > config.stats.MAX_AGE
+		else:
+			failed = entry.code not in (200, STALE_STATUS)
+			expired = failed or entry.age > config.stats.REFRESH_INTERVAL
+
+		if expired:
+			entry = await StatsCache.refresh(url)
+
+		return entry
+
+	@staticmethod
+	async def get(url: str = '/base/stats') -> Tuple[Union[Any, bool], int]:
+		"""
+		Get variant from memory, fetching it only when missing or expired
+
+		:param		url:  The stats url
+		:type		url:  str
+
+		:returns:	result and status code
+		:rtype:		Tuple[Union[Any, bool], int]
+		"""
+		entry = await StatsCache._entry(url)
+
+		return entry.result, entry.code
+
+	@staticmethod
+	async def get_snapshot(url: str = '/base/stats') -> Tuple[StatsSnapshot, Any]:
+		"""
+		Get indexed variant, built once when variant is fetched
+
+		:param		url:  The stats url
+		:type		url:  str
+
+		:returns:	snapshot and result (for data_as_of of stale result)
+		:rtype:		Tuple[StatsSnapshot, Any]
+		"""
+		entry = await StatsCache._entry(url)
+
+		return entry.snapshot, entry.result
+
+	@staticmethod
+	def age(url: str = '/base/stats') -> Optional[float]:
+		"""
+		Get age of cached variant
+
+		:param		url:  The stats url
+		:type		url:  str
+
+		:returns:	age in seconds or None if variant is not cached yet
+		:rtype:		Optional[float]
+		"""
+		entry = StatsCache.entries.get(url)
+
+		return None if entry is None else entry.age
+
+	@staticmethod
+	def setup(scheduler: AsyncIOScheduler):
+		"""
+		Add refresh jobs of all variants to scheduler
+
+		:param		scheduler:	The scheduler
+		:type		scheduler:	AsyncIOScheduler
+		"""
+		StatsCache.background = True
+
+		for url in STATS_VARIANTS:
+			scheduler.add_job(
+				StatsCache.refresh,
+				'interval',
+				seconds=config.stats.REFRESH_INTERVAL,
+				args=[url],
+				id=f'statscache_{url}',
+				replace_existing=True,
+				max_instances=1,
+				coalesce=True,
+				next_run_time=datetime.now(scheduler.timezone),
+			)
@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import hashlib
+import signal
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+from loguru import logger
+
+from app.loader import config
+from app.utils.jsonlib import loads
+
+# header with secret token Telegram sends with every webhook request
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+def webhook_secret() -> str:
+	"""
+	Get webhook secret token: WEBHOOK.SECRET or derived from bot token, so
+	it is stable between restarts
+
+	:returns:	secret token
+	:rtype:		str
+	"""
+	if config.webhook.SECRET:
+		return config.webhook.SECRET
+
+	return hashlib.sha256(config.secrets.TOKEN.encode()).hexdigest()
+
+
+class WebhookRequestHandler(SimpleRequestHandler):
+	"""
+	This class describes webhook handler which acknowledges updates at once
+	and on shutdown waits for updates still being handled.
+	"""
+
+	def __init__(
+		self, dispatcher: Dispatcher, bot: Bot, drain_timeout: float, **data: Any
+	):
+		"""
+		Constructs a new instance.
+
+		:param		dispatcher:		The dispatcher
+		:type		dispatcher:		Dispatcher
+		:param		bot:			The bot
+		:type		bot:			Bot
+		:param		drain_timeout:	The seconds to wait for updates on shutdown
+		:type		drain_timeout:	float
+		:param		data:			The dispatcher workflow data
+		:type		data:			dict
+		"""
+		super().__init__(
+			dispatcher,
+			bot,
+			handle_in_background=True,
+			secret_token=webhook_secret(),
+			**data,
+		)
+		self.drain_timeout = drain_timeout
+
+	async def close(self):
+		"""
+		Wait for updates being handled, then close bot session
+		"""
+		tasks = set(self._background_feed_update_tasks)
+
+		if tasks:
+			logger.info(f'[webhook] waiting for {len(tasks)} updates')
+			done, pending = await asyncio.wait(tasks, timeout=self.drain_timeout)
+
+			if pending:
+				logger.warning(f'[webhook] {len(pending)} updates left unfinished')
+
+		await super().close()
+
+
+def setup_webhook(
+	app: web.Application,
+	dispatcher: Dispatcher,
+	bot: Bot,
+	allowed_updates: Optional[List[str]] = None,
+	**data: Any,
+) -> WebhookRequestHandler:
+	"""
+	Register webhook route and dispatcher startup/shutdown on application
+
+	Webhook is set on startup (if WEBHOOK.URL is set) and is not deleted on
+	shutdown: Telegram keeps updates while bot restarts and delivers them
+	after.
+
+	:param		app:		 The application
+	:type		app:		 web.Application
+	:param		dispatcher:	 The dispatcher
+	:type		dispatcher:	 Dispatcher
+	:param		bot:		 The bot
+	:type		bot:		 Bot
+	:param		allowed_updates:  The update types, by default used by dispatcher
+	:type		allowed_updates:  Optional[List[str]]
+	:param		data:		 The dispatcher workflow data
+	:type		data:		 dict
+
+	:returns:	webhook handler
+	:rtype:		WebhookRequestHandler
+	"""
+	handler = WebhookRequestHandler(
+		dispatcher, bot, config.webhook.DRAIN_TIMEOUT, **data
+	)
+	# registered first, so updates are drained before dispatcher shutdown
+	handler.register(app, path=config.webhook.PATH)
+	setup_application(app, dispatcher, bot=bot, **data)
+
+	async def set_webhook(app: web.Application):
+		if not config.webhook.URL:
+			logger.warning('[webhook] WEBHOOK.URL is empty, webhook is not set')
+			return
+
+		await bot.set_webhook(
+			url=f'{config.webhook.URL.rstrip("/")}{config.webhook.PATH}',
+			secret_token=webhook_secret(),
+			allowed_updates=allowed_updates or dispatcher.resolve_used_update_types(),
+			max_connections=config.webhook.MAX_CONNECTIONS,
+			drop_pending_updates=False,
+		)
+		logger.info(f'[webhook] set to {config.webhook.URL}{config.webhook.PATH}')
+
+	app.on_startup.append(set_webhook)
+
+	return handler
+
+
+async def wait_for_stop():
+	"""
+	Wait for SIGINT or SIGTERM
+	"""
+	stop = asyncio.Event()
+	loop = asyncio.get_running_loop()
+
+	for signum in (signal.SIGINT, signal.SIGTERM):
+		try:
+			loop.add_signal_handler(signum, stop.set)
+		except NotImplementedError:
+			# Windows: KeyboardInterrupt cancels main task instead
+			pass
+
+	await stop.wait()
+
+
+async def run_webhook(
+	dispatcher: Dispatcher, bot: Bot, host: str, port: int, **data: Any
+):
+	"""
+	Serve webhook until SIGINT or SIGTERM
+
+	:param		dispatcher:	 The dispatcher
+	:type		dispatcher:	 Dispatcher
+	:param		bot:		 The bot
+	:type		bot:		 Bot
+	:param		host:		 The host
+	:type		host:		 str
+	:param		port:		 The port
+	:type		port:		 int
+	:param		data:		 The dispatcher workflow data
+	:type		data:		 dict
+	"""
+	app = web.Application()
+	setup_webhook(app, dispatcher, bot, **data)
+
+	runner = web.AppRunner(app, access_log=None)
+	await runner.setup()
+	await web.TCPSite(runner, host, port).start()
+
+	logger.info(f'Webhook is served on http://{host}:{port}{config.webhook.PATH}')
+
+	try:
+		await wait_for_stop()
+	finally:
+		await runner.cleanup()
+
+
+def read_updates(file_name: str) -> List[Dict[str, Any]]:
+	"""
+	Read recorded updates (JSON lines)
+
+	:param		file_name:	The updates file name
+	:type		file_name:	str
+
+	:returns:	updates
+	:rtype:		List[Dict[str, Any]]
+	"""
+	with open(file_name, encoding='utf-8') as file:
+		return [loads(line) for line in file if line.strip()]
+
+
+async def post_updates(
+	updates: List[Dict[str, Any]],
+	url: str,
+	secret: Optional[str],
+	concurrency: int = 1,
+):
+	"""
+	Post recorded updates to webhook endpoint
+
+	:param		updates:	  The updates, see read_updates
+	:type		updates:	  List[Dict[str, Any]]
+	:param		url:		  The webhook url
+	:type		url:		  str
+	:param		secret:		  The secret token
+	:type		secret:		  Optional[str]
+	:param		concurrency:  The count of parallel requests
+	:type		concurrency:  int
+	"""
+	headers = {SECRET_HEADER: secret} if secret else {}
+	queue: asyncio.Queue = asyncio.Queue()
+	statuses = {}
+
+	for update in updates:
+		queue.put_nowait(update)
+
+	async def worker(session: aiohttp.ClientSession):
+		while not queue.empty():
+			update = queue.get_nowait()
+
+			async with session.post(url, json=update, headers=headers) as response:
+				statuses[response.status] = statuses.get(response.status, 0) + 1
+
+	loop = asyncio.get_running_loop()
+	started_at = loop.time()
+
+	async with aiohttp.ClientSession() as session:
+		await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+
+	seconds = loop.time() - started_at
+	print(
+		f'{len(updates)} updates in {seconds:.2f}s '
+		f'({len(updates) / seconds:.0f}/s), statuses: {statuses}'
+	)
+
+
+if __name__ == '__main__':
+	parser = argparse.ArgumentParser(
+		prog='python -m app.utils.webhook',
+		description='Post recorded updates (JSON lines) to webhook endpoint',
+	)
+	parser.add_argument('updates', help='file with one update per line')
+	parser.add_argument(
+		'--url',
+		default=f'http://127.0.0.1:{config.metrics.PORT}{config.webhook.PATH}',
+	)
+	parser.add_argument('--secret', default=webhook_secret())
+	parser.add_argument('--concurrency', type=int, default=1)
+	args = parser.parse_args()
+
+	updates = read_updates(args.updates)
+
+	asyncio.run(post_updates(updates, args.url, args.secret, args.concurrency))
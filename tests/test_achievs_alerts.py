@@ -0,0 +1,57 @@
+import asyncio
+
+from aiohttp.test_utils import TestServer
+
+import app.__main__ as bot_main
+from app.api import APIRequest
+from app.database.test import loaded_achievements
+from app.loader import config
+from app.mockapi import create_app
+
+TG_ID = 111
+
+PARTNERS = [
+	# backend keeps tg_id as string
+	{'tg_id': str(TG_ID), 'partner_hash': 'a1', 'approved': True},
+	{'tg_id': '222', 'partner_hash': 'b2', 'referrer_hash': 'a1', 'approved': True},
+	{'tg_id': '333', 'partner_hash': 'c3', 'referrer_hash': 'a1', 'approved': True},
+]
+
+
+async def run_alerts(sent: list) -> dict:
+	server = TestServer(create_app(partners=PARTNERS))
+	await server.start_server()
+
+	url = config.secrets.URL
+	config.secrets.URL = str(server.make_url('')).rstrip('/')
+
+	async def send_message(**kwargs):
+		sent.append(kwargs)
+
+	send = bot_main.sender.send_message
+	bot_main.sender.send_message = send_message
+
+	try:
+		# the previous run saw no referrals and fewer achievements
+		loaded = bot_main.check_achievements_for_reload(0, 0.0, 0.0, 0, 0, 0, 0)
+		await loaded_achievements.set(TG_ID, {**loaded, 'count': 0})
+		shared = await bot_main.get_achievs_partners()
+		await bot_main.user_achievs_alerts(TG_ID, shared)
+
+		return shared
+	finally:
+		bot_main.sender.send_message = send
+		config.secrets.URL = url
+		await APIRequest.close_session()
+		await server.close()
+
+
+def test_alerts_are_sent_with_shared_partners():
+	sent = []
+	shared = asyncio.run(run_alerts(sent))
+
+	assert shared is not None
+	assert shared['referrals']['a1'] == 2
+	assert sent
+	assert {message['chat_id'] for message in sent} == {TG_ID}
+	assert any('Количество рефералов: больше 2' in m['text'] for m in sent)
@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+import app.database.redis as redis_module
+from app.api import api_deadline
+from app.utils import caching
+from app.utils.caching import cached
+
+calls = []
+
+
+@cached(ttl=60)
+async def lookup(value: int) -> int:
+	calls.append(api_deadline.get())
+	return value * 2
+
+
+async def run_lookups() -> list:
+	api_deadline.set(time.monotonic() + 5)
+	results = [await lookup(1) for _ in range(3)]
+
+	# make cached entry due, so the next hit refreshes it in background
+	for entry in caching.local.values():
+		entry['expires_at'] = time.time() + 0.001
+		entry['delta'] = 1000.0
+
+	results.append(await lookup(1))
+	await asyncio.gather(*caching.inflight.values())
+
+	return results
+
+
+def test_cached_while_redis_is_paused():
+	paused_until = redis_module.redis_paused_until
+	redis_module.redis_paused_until = time.monotonic() + 60
+	caching.local.clear()
+
+	try:
+		results = asyncio.run(run_lookups())
+	finally:
+		redis_module.redis_paused_until = paused_until
+		caching.local.clear()
+
+	assert results == [2, 2, 2, 2]
+	# one miss and one early refresh, which doesn't inherit the deadline
+	assert len(calls) == 2
+	assert calls[0] is not None
+	assert calls[1] is None
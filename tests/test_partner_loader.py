@@ -0,0 +1,104 @@
+import asyncio
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.api import APIRequest, PartnerLoader, breaker
+from app.loader import config
+from app.mockapi import create_app
+
+PARTNERS = [
+	{'tg_id': 1, 'partner_hash': 'a1', 'referrer_hash': None},
+	{'tg_id': 2, 'partner_hash': 'b2', 'referrer_hash': 'a1'},
+	{'tg_id': 3, 'partner_hash': 'c3', 'referrer_hash': 'a1'},
+]
+
+LOOKUPS = [
+	{'tg_id': 1},
+	{'tg_id': 2},
+	{'partner_hash': 'c3'},
+	{'referrer_hash': 'a1'},
+	{'tg_id': 1},
+	{'tg_id': 404},
+]
+
+
+@web.middleware
+async def no_bulk_endpoint(request: web.Request, handler) -> web.StreamResponse:
+	if request.path == '/partner/find_many':
+		raise web.HTTPNotFound()
+
+	return await handler(request)
+
+
+@web.middleware
+async def failing_bulk_endpoint(request: web.Request, handler) -> web.StreamResponse:
+	if request.path == '/partner/find_many':
+		raise web.HTTPServiceUnavailable()
+
+	return await handler(request)
+
+
+async def run_lookups(app: web.Application) -> list:
+	server = TestServer(app)
+	await server.start_server()
+
+	url = config.secrets.URL
+	config.secrets.URL = str(server.make_url('')).rstrip('/')
+	PartnerLoader.pending = {}
+	PartnerLoader.flush_handle = None
+	PartnerLoader.bulk_disabled_until = 0.0
+	PartnerLoader.counters.update(lookups=0, deduplicated=0, batches=0)
+	breaker.success()
+
+	try:
+		return await asyncio.gather(*[PartnerLoader.load(opts) for opts in LOOKUPS])
+	finally:
+		config.secrets.URL = url
+		await APIRequest.close_session()
+		await server.close()
+
+
+def assert_results(results: list):
+	tg_ids = [
+		[partner['tg_id'] for partner in result['partners']] for result, _ in results
+	]
+
+	assert [status for _, status in results] == [200] * len(LOOKUPS)
+	assert tg_ids == [[1], [2], [3], [2, 3], [1], []]
+
+
+def test_lookups_are_batched():
+	app = create_app(partners=PARTNERS, latency=0, jitter=0, error_rate=0)
+	results = asyncio.run(run_lookups(app))
+
+	assert_results(results)
+	assert [path for path, _ in app['requests']] == ['/partner/find_many']
+	assert len(app['requests'][0][1]['opts']) == len(LOOKUPS) - 1
+	assert PartnerLoader.counters == {'lookups': 6, 'deduplicated': 1, 'batches': 1}
+	assert PartnerLoader.bulk_disabled_until == 0.0
+
+
+def test_lookups_fall_back_to_single_finds():
+	app = create_app(partners=PARTNERS, latency=0, jitter=0, error_rate=0)
+	app.middlewares.append(no_bulk_endpoint)
+	results = asyncio.run(run_lookups(app))
+
+	assert_results(results)
+	assert [path for path, _ in app['requests']] == ['/partner/find'] * (
+		len(LOOKUPS) - 1
+	)
+	assert PartnerLoader.counters['batches'] == 1
+	assert PartnerLoader.bulk_disabled_until > 0
+
+
+def test_failed_bulk_endpoint_is_kept():
+	app = create_app(partners=PARTNERS, latency=0, jitter=0, error_rate=0)
+	app.middlewares.append(failing_bulk_endpoint)
+	results = asyncio.run(run_lookups(app))
+
+	assert_results(results)
+	assert [path for path, _ in app['requests']] == ['/partner/find'] * (
+		len(LOOKUPS) - 1
+	)
+	assert PartnerLoader.bulk_disabled_until == 0.0
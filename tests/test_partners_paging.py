@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.api import APIRequest
+from app.loader import config
+from app.mockapi import create_app
+
+PAGE_SIZE = 5
+
+
+def make_partners(count: int) -> list:
+	return [{'tg_id': index, 'partner_hash': f'{index:x}'} for index in range(count)]
+
+
+def create_non_paging_app(partners: list) -> web.Application:
+	async def partner_get(request: web.Request) -> web.Response:
+		return web.json_response({'partners': partners})
+
+	app = web.Application()
+	app.router.add_post('/partner/get', partner_get)
+
+	return app
+
+
+async def run_paging(app: web.Application) -> tuple:
+	server = TestServer(app)
+	await server.start_server()
+
+	url = config.secrets.URL
+	config.secrets.URL = str(server.make_url('')).rstrip('/')
+
+	try:
+		iterated = [
+			partner['tg_id'] async for partner in APIRequest.iter_partners(PAGE_SIZE)
+		]
+		pages = []
+		offset, has_next = 0, True
+
+		while has_next and offset < PAGE_SIZE * 10:
+			partners, has_next = await APIRequest.get_partners_page(offset, PAGE_SIZE)
+			pages.append([partner['tg_id'] for partner in partners])
+			offset += PAGE_SIZE
+
+		return iterated, pages
+	finally:
+		config.secrets.URL = url
+		await APIRequest.close_session()
+		await server.close()
+
+
+@pytest.mark.parametrize('count', [0, 3, PAGE_SIZE, PAGE_SIZE + 1, PAGE_SIZE * 2 + 2])
+@pytest.mark.parametrize('paging', [True, False])
+def test_partners_are_iterated_once(count: int, paging: bool):
+	partners = make_partners(count)
+
+	if paging:
+		app = create_app(partners=partners, latency=0, jitter=0, error_rate=0)
+	else:
+		app = create_non_paging_app(partners)
+
+	iterated, pages = asyncio.run(asyncio.wait_for(run_paging(app), 30))
+
+	assert iterated == list(range(count))
+	assert [tg_id for page in pages for tg_id in page] == list(range(count))
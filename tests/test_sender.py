@@ -0,0 +1,31 @@
+import asyncio
+
+from app.utils.sender import SendQueue
+
+
+class SlowBot:
+	async def send_message(self, **kwargs):
+		await asyncio.sleep(60)
+
+
+async def stop_with_pending() -> list:
+	sender = SendQueue(SlowBot())
+	# the same chat: one request is being sent, others are queued or delayed
+	calls = [
+		asyncio.create_task(sender.send_message(1, text=str(index)))
+		for index in range(5)
+	]
+	calls.append(asyncio.create_task(sender.send_message(2, text='other')))
+	await asyncio.sleep(0.1)
+	await sender.stop()
+
+	return await asyncio.wait_for(
+		asyncio.gather(*calls, return_exceptions=True), timeout=5
+	)
+
+
+def test_stop_fails_pending_sends():
+	results = asyncio.run(stop_with_pending())
+
+	assert len(results) == 6
+	assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,49 @@
+import asyncio
+import multiprocessing
+
+from app.database.shared import SharedDict
+
+registry = SharedDict('test_shared')
+
+WORKERS = 4
+UPDATES = 25
+
+
+async def modify(index: int) -> bool:
+	for update in range(UPDATES):
+		await registry.update('fields', **{f'{index}:{update}': update})
+
+	return await registry.claim('claimed', index)
+
+
+def run_worker(index: int, items, lock, results):
+	SharedDict.attach({'test_shared': items}, lock)
+	results.put(asyncio.run(modify(index)))
+
+
+def test_updates_and_claims_of_workers_are_atomic():
+	context = multiprocessing.get_context('fork')
+
+	with context.Manager() as manager:
+		items = manager.dict()
+		lock = manager.Lock()
+		results = manager.Queue()
+		processes = [
+			context.Process(target=run_worker, args=(index, items, lock, results))
+			for index in range(WORKERS)
+		]
+
+		for process in processes:
+			process.start()
+
+		for process in processes:
+			process.join(60)
+
+		claims = [results.get(timeout=5) for _ in processes]
+		SharedDict.attach({'test_shared': items}, lock)
+		fields = asyncio.run(registry.get('fields'))
+		claimed = asyncio.run(registry.get('claimed'))
+
+	assert len(fields) == WORKERS * UPDATES
+	assert claims.count(True) == 1
+	assert claimed in range(WORKERS)